@@ -15,6 +15,7 @@ from .frontend import (
     async_register_static_path_to_hass_router,
 )
 from .services import async_register_services, async_remove_services
+from .websocket import async_register_websocket_commands
 
 PLATFORMS = [
     Platform.SENSOR,
@@ -33,6 +34,7 @@ async def async_setup(hass: HomeAssistant, config: ConfigType):
     hass.data.setdefault(DOMAIN, {})[DATA_KEY_RESOURCE_REGISTRY] = (
         FrontendResourcesRegistry(hass, version="1.0")
     )
+    async_register_websocket_commands(hass)
 
     if not hass.config_entries.async_entries(DOMAIN):
         # We avoid creating an import flow if its already
@@ -74,6 +76,9 @@ async def async_setup_entry(hass: HomeAssistant, entry: DockerConfigEntry) -> bo
     # register entities
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
+    # reload when the options are changed
+    entry.async_on_unload(entry.add_update_listener(_async_update_listener))
+
     # register services
     async_register_services(hass)
 
@@ -91,6 +96,10 @@ async def async_setup_entry(hass: HomeAssistant, entry: DockerConfigEntry) -> bo
     return True
 
 
+async def _async_update_listener(hass: HomeAssistant, entry: DockerConfigEntry):
+    await hass.config_entries.async_reload(entry.entry_id)
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: DockerConfigEntry) -> bool:
     _LOGGER.debug(f"__init__ async_unload_entry {entry.entry_id}")
 
@@ -99,13 +108,18 @@ async def async_unload_entry(hass: HomeAssistant, entry: DockerConfigEntry) -> b
         await entry.runtime_data.async_shutdown()
         entry.runtime_data = None
 
-        # unload services
-        async_remove_services(hass)
-
-        # unload frontend resources
-        registry: FrontendResourcesRegistry = hass.data[DOMAIN][
-            DATA_KEY_RESOURCE_REGISTRY
-        ]
-        await registry.async_unload_frontend_resources()
+        # the services and the dashboard are shared by all the docker hosts
+        if not any(
+            x.entry_id != entry.entry_id
+            for x in hass.config_entries.async_loaded_entries(DOMAIN)
+        ):
+            # unload services
+            async_remove_services(hass)
+
+            # unload frontend resources
+            registry: FrontendResourcesRegistry = hass.data[DOMAIN][
+                DATA_KEY_RESOURCE_REGISTRY
+            ]
+            await registry.async_unload_frontend_resources()
 
     return unload_ok
@@ -1,27 +1,105 @@
 import asyncio
+import base64
+import json
+import os
 import re
+import ssl
+import threading
+import time
 import typing
-from dataclasses import dataclass
+from dataclasses import dataclass, field, replace
+from datetime import datetime, timezone
 
 import aiohttp
 import docker
-from docker.errors import ImageNotFound, NotFound
-
-from .const import _LOGGER
+from docker.auth import INDEX_NAME, load_config, resolve_authconfig
+from docker.errors import APIError, ImageNotFound, NotFound
+
+from ._docker_executor import DockerExecutor
+from ._docker_swarm import (
+    SWARM_EVENT_TYPES,
+    SWARM_TASK_FILTERS,
+    DockerSwarmInfo,
+    DockerSwarmNodeInfo,
+    DockerSwarmServiceInfo,
+    DockerSwarmTaskInfo,
+    to_swarm_info,
+    to_swarm_node,
+    to_swarm_service,
+    to_swarm_tasks,
+)
+from .const import (
+    _LOGGER,
+    DEFAULT_FAST_WORKERS,
+    DEFAULT_HOST,
+    DEFAULT_SLOW_WORKERS,
+)
+
+DOCKER_EVENT_TYPES = ("container", "image", "volume", "network") + SWARM_EVENT_TYPES
+COMPOSE_SERVICE_LABEL = "com.docker.compose.service"
+COMPOSE_DEPENDS_ON_LABEL = "com.docker.compose.depends_on"
+
+# stop checking a registry when only so many requests are left in the window
+RATE_LIMIT_RESERVE = 10
+# backoff after a 429 response without a Retry-After header
+RATE_LIMIT_BACKOFF = 900
+# uname machine of the engine info -> OCI platform architecture
+OCI_ARCHITECTURES = {
+    "x86_64": "amd64",
+    "aarch64": "arm64",
+    "armv7l": "arm",
+    "i686": "386",
+}
+# Accept both V2 and OCI manifests
+MANIFEST_ACCEPT = (
+    "application/vnd.docker.distribution.manifest.v2+json, "
+    "application/vnd.oci.image.manifest.v1+json, "
+    "application/vnd.docker.distribution.manifest.list.v2+json, "
+    "application/vnd.oci.image.index.v1+json"
+)
+# token lifetime when the token response has no expires_in (per the spec)
+TOKEN_DEFAULT_EXPIRY = 60
+# renew tokens this many seconds before they expire
+TOKEN_EXPIRY_MARGIN = 10
+# log chunks buffered between a followed docker stream and its reader
+LOG_STREAM_QUEUE_SIZE = 64
+# seconds a recreated container has to become running (or healthy)
+UPDATE_READY_TIMEOUT = 120
+UPDATE_READY_POLL = 1
+# seconds a docker-py request may take, an unreachable host fails within it
+CLIENT_TIMEOUT = 60
+
+
+class DockerUpdateError(Exception):
+    """Raised when a recreated container does not get ready."""
 
 
 @dataclass(kw_only=True)
 class DockerContainerInfo:
     id: str
     name: str
-    state: typing.Literal["restarting", "running", "paused", "exited"]
-    status: str
+    # starting, stopping and removing are shown until an action is confirmed
+    state: typing.Literal[
+        "created",
+        "starting",
+        "restarting",
+        "running",
+        "stopping",
+        "removing",
+        "paused",
+        "exited",
+        "dead",
+    ]
     image_id: str
     image_name: str
     compose_project: typing.Optional[str]
     short_id: str
     ports: list[str]
     mounts: list[str]
+    started_at: datetime | None = None
+    health: str | None = None
+    exit_code: int | None = None
+    labels: dict[str, str] = field(default_factory=dict)
 
 
 @dataclass(kw_only=True)
@@ -32,6 +110,11 @@ class DockerImageInfo:
     rev: str
     description: str
     in_use: bool
+    size: str = ""
+    size_measured_at: datetime | None = None
+    repo_tags: list[str] = field(default_factory=list)
+    repo_digests: list[str] = field(default_factory=list)
+    labels: dict[str, str] = field(default_factory=dict)
 
 
 @dataclass(kw_only=True)
@@ -40,6 +123,7 @@ class DockerVolumeInfo:
     in_use: bool
     size: str
     mount_point: str
+    size_measured_at: datetime | None = None
 
 
 @dataclass(kw_only=True)
@@ -52,6 +136,19 @@ class DockerHostInfo:
     containers: dict[str, DockerContainerInfo]
     images: dict[str, DockerImageInfo]
     volumes: dict[str, DockerVolumeInfo]
+    # the services, tasks and nodes can be listed only on a swarm manager
+    swarm_manager: bool = False
+    # os/architecture of the images pulled on the host
+    platform: str = "linux/amd64"
+
+
+@dataclass(kw_only=True)
+class DockerDiskUsage:
+    """Sizes from the (slow) docker disk usage scan."""
+
+    measured_at: datetime
+    images: dict[str, int]
+    volumes: dict[str, int]
 
 
 @dataclass()
@@ -60,6 +157,20 @@ class DockerImageUpdateInfo:
     current_ver: str
     new_ver: str
     source: str
+    # the newer image is already pulled, installing only recreates the container
+    pre_pulled: bool = False
+
+
+@dataclass(kw_only=True)
+class DockerContainerStats:
+    cpu_percent: float
+    memory_usage: int
+    memory_limit: int
+    memory_percent: float
+    network_rx: int
+    network_tx: int
+    block_read: int
+    block_write: int
 
 
 def get_img_id(id: str):
@@ -78,6 +189,18 @@ def get_version_from_labels(hash: str, labels: list[str] | None):
     )
 
 
+def split_image_tag(image_name: str) -> tuple[str, str]:
+    """Split an image reference into the repository and the tag (or digest)."""
+    if "@" in image_name:
+        return tuple(image_name.split("@", 1))
+
+    repository, _, tag = image_name.rpartition(":")
+    if not repository or "/" in tag:
+        return image_name, "latest"
+
+    return repository, tag
+
+
 def parse_image_name(image_name: str) -> tuple[str, str, str]:
     """Parse image name into registry, repository, and tag."""
     parts = image_name.split("/")
@@ -103,9 +226,658 @@ def parse_image_name(image_name: str) -> tuple[str, str, str]:
     return registry, repository, tag
 
 
-class DockerHttpApi:
+UPTIME_UNITS = {
+    "second": 1,
+    "minute": 60,
+    "hour": 3600,
+    "day": 86400,
+    "week": 604800,
+    "month": 2592000,
+    "year": 31536000,
+}
+# the engine rounds the hours, the days, weeks and months are counted from the
+# rounded hours, the seconds, minutes and years are floored
+ROUNDED_UPTIME_UNITS = {"hour", "day", "week", "month"}
+
+
+def parse_docker_time(value: str | None) -> datetime | None:
+    """Parse an engine timestamp, the zero time means never."""
+    if not value or value.startswith("0001-"):
+        return None
+    return datetime.fromisoformat(value)
+
+
+def parse_health(status: str) -> str | None:
+    match = re.search(r"\((healthy|unhealthy|health: starting)\)", status)
+    return match.group(1).removeprefix("health: ") if match else None
+
+
+def parse_exit_code(status: str) -> int | None:
+    match = re.match(r"Exited \((-?\d+)\)", status)
+    return int(match.group(1)) if match else None
+
+
+def parse_uptime(status: str) -> tuple[int, int] | None:
+    """Return the (min, max) uptime seconds of the human readable status."""
+    match = re.match(
+        r"Up (?:(Less than a second)|About an? (\w+)|(\d+) (\w+?)s?\b)", status
+    )
+    if not match:
+        return None
+    if match.group(1):
+        return 0, 1
+    if match.group(2) == "hour":
+        # below an hour the minutes are shown, the rounded hour ends at 1.5
+        return 3600, 5400
+    if match.group(2):
+        unit = UPTIME_UNITS.get(match.group(2), 0)
+        return unit, unit * 2
+    unit = UPTIME_UNITS.get(match.group(4), 0)
+    low, high = int(match.group(3)) * unit, (int(match.group(3)) + 1) * unit
+    if match.group(4) in ROUNDED_UPTIME_UNITS:
+        return low - 1800, high - 1800
+    return low, high
+
+
+def keeps_started_at(status: str, started_at: datetime | None) -> bool:
+    """Check if a known start time still matches the status (no restart since)."""
+    uptime = parse_uptime(status)
+    if started_at is None or uptime is None:
+        return False
+
+    # the status is rendered by the engine, allow some clock and request slack
+    elapsed = (datetime.now(timezone.utc) - started_at).total_seconds()
+    return uptime[0] - 5 <= elapsed <= uptime[1] + 5
+
+
+def get_volume_names(container: DockerContainerInfo) -> set[str]:
+    """Return the names of the volumes mounted by a container."""
+    return set(m[2 : m.index("):")] for m in container.mounts if m.startswith("v("))
+
+
+def to_size_str(size: int) -> str:
+    return str(round(size / 1024, 2)) + "KB" if size >= 0 else ""
+
+
+def to_container_info(
+    x: dict, previous: DockerContainerInfo | None = None
+) -> DockerContainerInfo:
+    """Map a container listing entry, the start time is kept from the previous."""
+    status = x["Status"]
+    return DockerContainerInfo(
+        id=x["Id"],
+        short_id=x["Id"][:12],
+        name=x["Names"][0][1:],
+        state=x["State"],
+        started_at=(
+            previous.started_at
+            if previous and keeps_started_at(status, previous.started_at)
+            else None
+        ),
+        health=parse_health(status),
+        exit_code=parse_exit_code(status),
+        image_id=get_img_id(x["ImageID"]),
+        image_name=x["Image"],
+        compose_project=(
+            x["Labels"]["com.docker.compose.project"]
+            if ("com.docker.compose.project" in x["Labels"])
+            else None
+        ),
+        labels=x["Labels"] or {},
+        ports=set(
+            (
+                str(p["PrivatePort"])
+                + ":"
+                + (str(p["PublicPort"]) if "PublicPort" in p else str(p["PrivatePort"]))
+            )
+            for p in x["Ports"]
+        ),
+        mounts=set(
+            (
+                ("b:" if o["Type"] == "bind" else (f"v({o["Name"]}):"))
+                + o["Source"]
+                + ":"
+                + o["Destination"]
+                + ":"
+                + o["Mode"]
+            )
+            for o in x["Mounts"]
+        ),
+    )
+
+
+def to_image_info(x: dict, in_use: bool) -> DockerImageInfo:
+    # image listing has top level labels, image inspect has them in the config
+    labels = x["Labels"] if "Labels" in x else (x.get("Config") or {}).get("Labels")
+    return DockerImageInfo(
+        id=get_img_id(x["Id"]),
+        tag=x["RepoTags"][0] if x["RepoTags"] else None,
+        title=get_label("org.opencontainers.image.title", labels),
+        rev=get_label("org.opencontainers.image.revision", labels),
+        description=get_label("org.opencontainers.image.description", labels),
+        in_use=in_use,
+        repo_tags=x.get("RepoTags") or [],
+        repo_digests=x.get("RepoDigests") or [],
+        labels=labels or {},
+    )
+
+
+def normalize_image_ref(name: str) -> str:
+    """Return the repo:tag form docker lists in RepoTags for an image name."""
+    if "@" in name or name.startswith("sha256:"):
+        return name
+
+    for prefix in ("docker.io/library/", "docker.io/"):
+        if name.startswith(prefix):
+            name = name[len(prefix) :]
+            break
+
+    if ":" not in name.rsplit("/", 1)[-1]:
+        name += ":latest"
+
+    return name
+
+
+def build_image_index(images: dict[str, DockerImageInfo]) -> dict[str, DockerImageInfo]:
+    """Index the listed images by their repo:tag references and ids."""
+    index = {}
+    for image in images.values():
+        index[f"sha256:{image.id}"] = image
+        index[image.id[:12]] = image
+        for tag in image.repo_tags:
+            index[tag] = image
+
+    return index
+
+
+def get_repo_digest(repo_digests: list[str], image_name: str) -> str | None:
+    """Return the digest hash of the repository the image was pulled from."""
+    ref = normalize_image_ref(image_name)
+    if "@" in ref:
+        return ref.split("@", 1)[1]
+
+    repo = ref.rsplit(":", 1)[0]
+    digests = [d for d in repo_digests if d.split("@", 1)[0] == repo] or repo_digests
+    return digests[0].split("@", 1)[1] if digests else None
+
+
+def to_volume_info(x: dict) -> DockerVolumeInfo:
+    usage = x.get("UsageData") or {"RefCount": 0, "Size": -1}
+    return DockerVolumeInfo(
+        name=x["Name"],
+        in_use=usage["RefCount"] > 0,
+        size=to_size_str(usage["Size"]),
+        mount_point=x["Mountpoint"],
+    )
+
+
+type DockerChangeSet = set[tuple[str, str]]
+"""Changed (key, id) pairs, the key is containers, images, volumes or host."""
+
+HOST_COUNTER_KEYS = ("containers_total", "containers_running", "images_total")
+
+
+def diff_host_info(
+    old: DockerHostInfo | None, new: DockerHostInfo
+) -> DockerChangeSet | None:
+    """Return the changed items between two snapshots (None is everything)."""
+    if not old:
+        return None
+
+    changed = set(
+        ("host", key)
+        for key in HOST_COUNTER_KEYS
+        if getattr(old, key) != getattr(new, key)
+    )
+    for key in ("containers", "images", "volumes"):
+        old_items: dict = getattr(old, key)
+        new_items: dict = getattr(new, key)
+        for id in old_items.keys() | new_items.keys():
+            if old_items.get(id) != new_items.get(id):
+                changed.add((key, id))
+
+    return changed
+
+
+def update_usage(data: DockerHostInfo) -> DockerChangeSet:
+    """Recalculate the usage flags and counters from the cached containers."""
+    changed = set()
+    image_ids = set(c.image_id for c in data.containers.values())
+    volume_names = set()
+    for container in data.containers.values():
+        volume_names.update(get_volume_names(container))
+
+    for key, image in data.images.items():
+        if image.in_use != (image.id in image_ids):
+            data.images[key] = replace(image, in_use=not image.in_use)
+            changed.add(("images", key))
+    for key, volume in data.volumes.items():
+        if volume.in_use != (volume.name in volume_names):
+            data.volumes[key] = replace(volume, in_use=not volume.in_use)
+            changed.add(("volumes", key))
+
+    counters = {
+        "containers_total": len(data.containers),
+        "containers_running": sum(
+            1 for c in data.containers.values() if c.state == "running"
+        ),
+        "images_total": len(data.images),
+    }
+    for key, value in counters.items():
+        if getattr(data, key) != value:
+            setattr(data, key, value)
+            changed.add(("host", key))
+
+    return changed
+
+
+def apply_disk_usage(
+    data: DockerHostInfo, usage: DockerDiskUsage | None
+) -> DockerChangeSet:
+    """Copy the last measured sizes to the cached images and volumes."""
+    changed = set()
+    if usage is None:
+        return changed
+
+    for key, image in data.images.items():
+        if key in usage.images and image.size_measured_at != usage.measured_at:
+            data.images[key] = replace(
+                image,
+                size=to_size_str(usage.images[key]),
+                size_measured_at=usage.measured_at,
+            )
+            changed.add(("images", key))
+    for key, volume in data.volumes.items():
+        if key in usage.volumes and volume.size_measured_at != usage.measured_at:
+            data.volumes[key] = replace(
+                volume,
+                size=to_size_str(usage.volumes[key]),
+                size_measured_at=usage.measured_at,
+            )
+            changed.add(("volumes", key))
+
+    return changed
+
+
+class DockerPullProgress:
+    """Aggregated progress of the per layer image pull events."""
+
     def __init__(self):
+        # layer id -> [total, downloaded, extracted] bytes
+        self.layers: dict[str, list[int]] = {}
+        self.percentage: int | None = None
+
+    def update(self, event: dict) -> bool:
+        """Apply a pull event, return True when the percentage changed."""
+        layer_id = event.get("id")
+        status = event.get("status", "")
+        if not layer_id or status.startswith("Pulling from"):
+            return False
+
+        layer = self.layers.setdefault(layer_id, [0, 0, 0])
+        detail = event.get("progressDetail") or {}
+        if detail.get("total"):
+            layer[0] = detail["total"]
+        if status == "Downloading":
+            layer[1] = detail.get("current", layer[1])
+        elif status == "Download complete":
+            layer[1] = layer[0]
+        elif status == "Extracting":
+            layer[1] = layer[0]
+            layer[2] = detail.get("current", layer[2])
+        elif status in ("Pull complete", "Already exists"):
+            layer[1] = layer[2] = layer[0] = layer[0] or 1
+
+        total = sum(x[0] for x in self.layers.values())
+        done = sum(x[1] + x[2] for x in self.layers.values())
+        percentage = int(done * 50 / total) if total else None
+        if percentage == self.percentage:
+            return False
+
+        self.percentage = percentage
+        return True
+
+    @property
+    def downloaded(self) -> int:
+        """Bytes downloaded over all layers."""
+        return sum(x[1] for x in self.layers.values())
+
+
+def to_container_stats(
+    sample: dict, previous: dict | None = None
+) -> DockerContainerStats | None:
+    """
+    Build the stats from a /containers/{id}/stats sample. The CPU usage is the
+    delta to the previous sample (or the sample's precpu_stats) relative to
+    the host CPU time passed. None for samples of a stopped container.
+    """
+    cpu = sample.get("cpu_stats") or {}
+    memory = sample.get("memory_stats") or {}
+    if not memory.get("usage") and not cpu.get("system_cpu_usage"):
+        return None
+
+    pre = (previous or {}).get("cpu_stats") or sample.get("precpu_stats") or {}
+    cpu_delta = cpu.get("cpu_usage", {}).get("total_usage", 0) - pre.get(
+        "cpu_usage", {}
+    ).get("total_usage", 0)
+    system_delta = cpu.get("system_cpu_usage", 0) - pre.get("system_cpu_usage", 0)
+    online_cpus = cpu.get("online_cpus") or len(
+        cpu.get("cpu_usage", {}).get("percpu_usage") or [1]
+    )
+    cpu_percent = (
+        cpu_delta / system_delta * online_cpus * 100
+        if pre.get("system_cpu_usage") and system_delta > 0 and cpu_delta >= 0
+        else 0.0
+    )
+
+    # the page cache is reclaimable, "cache" with cgroup v1, "inactive_file" v2
+    details = memory.get("stats") or {}
+    memory_usage = memory.get("usage", 0) - details.get(
+        "cache", details.get("inactive_file", 0)
+    )
+    memory_limit = memory.get("limit", 0)
+
+    networks = (sample.get("networks") or {}).values()
+    block_io = (sample.get("blkio_stats") or {}).get("io_service_bytes_recursive") or []
+    return DockerContainerStats(
+        cpu_percent=round(cpu_percent, 2),
+        memory_usage=max(memory_usage, 0),
+        memory_limit=memory_limit,
+        memory_percent=(
+            round(memory_usage / memory_limit * 100, 2) if memory_limit else 0.0
+        ),
+        network_rx=sum(x.get("rx_bytes", 0) for x in networks),
+        network_tx=sum(x.get("tx_bytes", 0) for x in networks),
+        block_read=sum(
+            x.get("value", 0) for x in block_io if x.get("op", "").lower() == "read"
+        ),
+        block_write=sum(
+            x.get("value", 0) for x in block_io if x.get("op", "").lower() == "write"
+        ),
+    )
+
+
+def to_recreate_config(attrs: dict) -> tuple[dict, dict[str, dict]]:
+    """
+    Build the create body of a replacement from an inspected container and the
+    endpoints of its additional networks (older engines attach one at create).
+    """
+    short_id = attrs["Id"][:12]
+    config = dict(attrs.get("Config") or {})
+    if config.get("Hostname") == short_id:
+        # the default hostname is the id, the replacement gets its own
+        del config["Hostname"]
+
+    host_config = attrs.get("HostConfig") or {}
+    endpoints = {}
+    networks = (attrs.get("NetworkSettings") or {}).get("Networks") or {}
+    for network, endpoint in networks.items():
+        endpoints[network] = {
+            "IPAMConfig": endpoint.get("IPAMConfig"),
+            "Links": endpoint.get("Links"),
+            "Aliases": [a for a in endpoint.get("Aliases") or [] if a != short_id]
+            or None,
+        }
+
+    primary = host_config.get("NetworkMode")
+    if primary == "default":
+        primary = "bridge"
+    create_endpoints = {primary: endpoints.pop(primary)} if primary in endpoints else {}
+    config["HostConfig"] = host_config
+    config["NetworkingConfig"] = {"EndpointsConfig": create_endpoints}
+    return config, endpoints
+
+
+class DockerEventStream:
+    """Async iterator over a docker stream (events, log chunks) which can be
+    closed from the loop."""
+
+    def __init__(
+        self, events: typing.AsyncIterator, close: typing.Callable[[], None]
+    ):
+        self._events = events
+        self._close = close
+
+    def __aiter__(self):
+        return self._events
+
+    def close(self):
+        self._close()
+
+
+def to_platform(info: dict) -> str:
+    """The OCI platform of the engine, the info reports the uname machine."""
+    architecture = info.get("Architecture", "")
+    return "/".join(
+        (
+            info.get("OSType") or "linux",
+            OCI_ARCHITECTURES.get(architecture, architecture),
+        )
+    )
+
+
+def select_platform_manifest(index: dict, platform: str) -> str | None:
+    """Digest of the manifest for the platform in a manifest list or index."""
+    os, _, architecture = platform.partition("/")
+    for manifest in index.get("manifests", []):
+        target = manifest.get("platform") or {}
+        if target.get("os") == os and target.get("architecture") == architecture:
+            return manifest.get("digest")
+    return None
+
+
+def get_manifest_size(manifest: dict) -> int:
+    """Compressed bytes of the config and the layers of an image manifest."""
+    return (manifest.get("config") or {}).get("size", 0) + sum(
+        layer.get("size", 0) for layer in manifest.get("layers", [])
+    )
+
+
+def to_host_info(
+    info: dict,
+    containers: list[dict],
+    images: list[dict],
+    volumes: list[dict],
+    previous: DockerHostInfo | None = None,
+) -> DockerHostInfo:
+    """Build the host info from the /info and the listing endpoints."""
+    known = previous.containers if previous else {}
+    data = DockerHostInfo(
+        version=info["ServerVersion"],
+        firewall=info["FirewallBackend"]["Driver"],
+        containers_total=info["Containers"],
+        containers_running=info["ContainersRunning"],
+        images_total=info["Images"],
+        containers=dict(
+            map(
+                lambda x: (x.short_id, x),
+                map(lambda x: to_container_info(x, known.get(x["Id"][:12])), containers),
+            )
+        ),
+        images=dict(
+            map(
+                lambda x: (x.id[:12], x),
+                map(lambda x: to_image_info(x, in_use=False), images),
+            )
+        ),
+        volumes=dict(map(lambda x: (x.name[:26], x), map(to_volume_info, volumes))),
+        swarm_manager=(info.get("Swarm") or {}).get("ControlAvailable", False),
+        platform=to_platform(info),
+    )
+    update_usage(data)
+    return data
+
+
+def select_containers(
+    containers: dict[str, DockerContainerInfo],
+    ids: list[str] | None = None,
+    compose_project: str | None = None,
+    labels: list[str] | None = None,
+) -> list[DockerContainerInfo]:
+    """
+    Select containers by id, short id or name, by compose project and by label
+    selectors like 'key' or 'key=value'. All given criteria have to match.
+    """
+    selected = list(containers.values())
+    if ids:
+        wanted = set(ids)
+        selected = [c for c in selected if wanted & {c.id, c.short_id, c.name}]
+    if compose_project:
+        selected = [c for c in selected if c.compose_project == compose_project]
+    for selector in labels or []:
+        key, has_value, value = selector.partition("=")
+        selected = [
+            c
+            for c in selected
+            if key in c.labels and (not has_value or c.labels[key] == value)
+        ]
+
+    return selected
+
+
+def get_compose_waves(
+    containers: list[DockerContainerInfo],
+) -> list[list[DockerContainerInfo]]:
+    """
+    Group containers in start order by the compose depends_on labels, the
+    containers of a wave only depend on the previous waves.
+    """
+    services = dict(
+        ((c.compose_project, c.labels.get(COMPOSE_SERVICE_LABEL)), c)
+        for c in containers
+        if COMPOSE_SERVICE_LABEL in c.labels
+    )
+    depends = {}
+    for c in containers:
+        # "db:service_healthy:true,cache:service_started:false"
+        names = [
+            d.split(":", 1)[0]
+            for d in c.labels.get(COMPOSE_DEPENDS_ON_LABEL, "").split(",")
+            if d
+        ]
+        depends[c.id] = [
+            services[(c.compose_project, n)].id
+            for n in names
+            if (c.compose_project, n) in services
+        ]
+
+    waves = []
+    done: set[str] = set()
+    remaining = list(containers)
+    while remaining:
+        wave = [c for c in remaining if done.issuperset(depends[c.id])]
+        if not wave:
+            # a dependency cycle, start the rest together
+            wave = remaining
+        waves.append(wave)
+        done.update(c.id for c in wave)
+        remaining = [c for c in remaining if c.id not in done]
+
+    return waves
+
+
+def get_missing_started_at(containers: dict[str, DockerContainerInfo]) -> list[str]:
+    """Return the ids of the running containers that have to be inspected."""
+    return [
+        c.id for c in containers.values() if c.state == "running" and not c.started_at
+    ]
+
+
+def to_disk_usage(data: dict) -> DockerDiskUsage:
+    """Read the sizes from the /system/df response."""
+    return DockerDiskUsage(
+        measured_at=datetime.now(timezone.utc),
+        images=dict(
+            (get_img_id(x["Id"])[:12], x["Size"]) for x in data.get("Images") or []
+        ),
+        volumes=dict(
+            (x["Name"][:26], x["UsageData"]["Size"])
+            for x in data.get("Volumes") or []
+            if x.get("UsageData")
+        ),
+    )
+
+
+def to_local_image_info(attrs: dict) -> tuple[str | None, dict | None]:
+    """Read the repo digest hash and labels of an inspected local image."""
+    local_digest = (attrs.get("RepoDigests") or [None])[0]
+    if not local_digest:
+        return None, None
+
+    local_digest_hash = local_digest.split("@")[1]
+    local_labels = attrs.get("Config", {}).get("Labels") or {}
+    return local_digest_hash, local_labels
+
+
+def parse_rate_limit(value: str | None) -> tuple[int, int] | None:
+    """Parse a RateLimit header value like '76;w=21600' to (count, window)."""
+    match = re.match(r"\s*(\d+)\s*;\s*w=(\d+)", value or "")
+    return (int(match.group(1)), int(match.group(2))) if match else None
+
+
+def parse_auth_challenge(header: str) -> tuple[str, dict[str, str]] | None:
+    """Parse a Www-Authenticate header into the scheme and its parameters."""
+    if not header:
+        return None
+
+    scheme, _, rest = header.partition(" ")
+    params = dict(re.findall(r'(\w+)="([^"]*)"', rest))
+    return scheme.lower(), params
+
+
+def load_registry_credentials(registry: str) -> dict | None:
+    """Read the registry credentials from the docker config (blocking)."""
+    name = INDEX_NAME if registry == "registry-1.docker.io" else registry
+    try:
+        credentials = resolve_authconfig(load_config(), name)
+    except Exception as e:
+        _LOGGER.warning(f"Failed to read docker credentials for {registry}: {e}")
+        return None
+
+    if credentials and credentials.get("username") and credentials.get("password"):
+        return credentials
+
+    return None
+
+
+class DockerHttpApi:
+    def __init__(self, executor: DockerExecutor):
+        self.executor = executor
         self.session: aiohttp.ClientSession | None = None
+        self._blocked_until: dict[str, float] = {}
+        # registry -> parsed Www-Authenticate challenge, None when anonymous
+        self._challenges: dict[str, tuple[str, dict[str, str]] | None] = {}
+        # (realm, service, scope) -> (token, monotonic expiry)
+        self._tokens: dict[tuple[str, str, str], tuple[str, float]] = {}
+        self._credentials: dict[str, dict | None] = {}
+        # (manifest digest, platform) -> estimated pull bytes, a digest never changes
+        self._sizes: dict[tuple[str, str], int] = {}
+        # registry/repository:tag -> digest, etag and labels of the last check,
+        # persisted by the update coordinator
+        self.digests: dict[str, dict] = {}
+
+    def rate_limit_delay(self, registry: str) -> float:
+        """Seconds to wait before the registry should be requested again."""
+        return max(0, self._blocked_until.get(registry, 0) - time.monotonic())
+
+    def _record_rate_limit(self, registry: str, resp: aiohttp.ClientResponse):
+        if resp.status == 429:
+            retry_after = resp.headers.get("Retry-After", "")
+            backoff = int(retry_after) if retry_after.isdigit() else RATE_LIMIT_BACKOFF
+            self._blocked_until[registry] = time.monotonic() + backoff
+            _LOGGER.warning(f"Rate limited by {registry}, backing off {backoff}s")
+            return
+
+        remaining = parse_rate_limit(resp.headers.get("RateLimit-Remaining"))
+        limit = parse_rate_limit(resp.headers.get("RateLimit-Limit"))
+        if remaining and limit and remaining[0] <= RATE_LIMIT_RESERVE:
+            # the window is rolling, wait until the reserve is replenished
+            missing = RATE_LIMIT_RESERVE - remaining[0] + 1
+            backoff = limit[1] / max(limit[0], 1) * missing
+            self._blocked_until[registry] = time.monotonic() + backoff
+            _LOGGER.debug(
+                f"{registry} rate limit remaining {remaining[0]}, backing off {backoff}s"
+            )
 
     async def async_connect(self):
         self.session = aiohttp.ClientSession()
@@ -115,71 +887,206 @@ class DockerHttpApi:
             await self.session.close()
             self.session = None
 
-    async def get_registry_image_info(self, image_name: str) -> tuple[str | None, dict]:
+    def _forget_auth(self, registry: str):
+        challenge = self._challenges.pop(registry, None)
+        if challenge:
+            realm = challenge[1].get("realm")
+            for key in [k for k in self._tokens if k[0] == realm]:
+                del self._tokens[key]
+
+    async def _async_credentials(self, registry: str) -> dict | None:
+        if registry not in self._credentials:
+            self._credentials[registry] = await self.executor.fast(
+                "registry_credentials", load_registry_credentials, registry
+            )
+        return self._credentials[registry]
+
+    async def async_registry_auth(self, image_name: str) -> str | None:
+        """X-Registry-Auth header of an engine pull, None without credentials."""
+        credentials = await self._async_credentials(parse_image_name(image_name)[0])
+        if not credentials:
+            return None
+        return base64.urlsafe_b64encode(json.dumps(credentials).encode()).decode()
+
+    async def _async_auth_headers(self, registry: str, repository: str) -> dict | None:
+        """Authorization headers to pull the repository, None when denied."""
+        if registry not in self._challenges:
+            async with self.session.get(f"https://{registry}/v2/") as resp:
+                self._record_rate_limit(registry, resp)
+                if resp.status not in (200, 401):
+                    return {}
+
+                self._challenges[registry] = parse_auth_challenge(
+                    resp.headers.get("Www-Authenticate", "")
+                )
+
+        challenge = self._challenges[registry]
+        if challenge is None:
+            return {}
+
+        scheme, params = challenge
+        credentials = await self._async_credentials(registry)
+        auth = (
+            aiohttp.BasicAuth(credentials["username"], credentials["password"])
+            if credentials
+            else None
+        )
+        if scheme == "basic":
+            return {"Authorization": auth.encode()} if auth else {}
+        if scheme != "bearer" or "realm" not in params:
+            return {}
+
+        scope = f"repository:{repository}:pull"
+        key = (params["realm"], params.get("service", ""), scope)
+        token, expires_at = self._tokens.get(key, (None, 0))
+        if token is None or expires_at <= time.monotonic():
+            query = {"scope": scope}
+            if "service" in params:
+                query["service"] = params["service"]
+
+            async with self.session.get(
+                params["realm"], params=query, auth=auth
+            ) as resp:
+                if resp.status != 200:
+                    _LOGGER.warning(
+                        f"Failed to get auth token for {registry}/{repository}: {resp.status}"
+                    )
+                    return None
+
+                token_data = await resp.json()
+
+            token = token_data.get("token") or token_data.get("access_token")
+            expires_in = token_data.get("expires_in") or TOKEN_DEFAULT_EXPIRY
+            self._tokens[key] = (
+                token,
+                time.monotonic() + max(0, expires_in - TOKEN_EXPIRY_MARGIN),
+            )
+
+        return {"Authorization": f"Bearer {token}"}
+
+    async def get_registry_image_size(
+        self, image_name: str, platform: str
+    ) -> int | None:
+        """
+        Estimate the download of a pull from the manifest of the platform, None
+        when unknown. Layers already on the host are counted too, so the
+        estimate is an upper bound. A manifest GET counts as a pull on some
+        registries, the tag is resolved with a HEAD and the manifests are
+        fetched once per digest.
+        """
+        if not self.session:
+            self.session = aiohttp.ClientSession()
+
+        try:
+            registry, repository, reference = parse_image_name(image_name)
+            headers = await self._async_auth_headers(registry, repository)
+            if headers is None:
+                return None
+
+            headers["Accept"] = MANIFEST_ACCEPT
+            url = f"https://{registry}/v2/{repository}/manifests/{reference}"
+            async with self.session.head(
+                url, headers=headers, allow_redirects=True
+            ) as resp:
+                self._record_rate_limit(registry, resp)
+                if resp.status != 200:
+                    return None
+                reference = resp.headers.get("Docker-Content-Digest")
+
+            key = (reference, platform)
+            if reference is None or key in self._sizes:
+                return self._sizes.get(key)
+
+            # a manifest list or index points to the manifest of every platform
+            for _ in range(2):
+                url = f"https://{registry}/v2/{repository}/manifests/{reference}"
+                async with self.session.get(url, headers=headers) as resp:
+                    self._record_rate_limit(registry, resp)
+                    if resp.status != 200:
+                        return None
+                    manifest = await resp.json()
+
+                if "manifests" not in manifest:
+                    self._sizes[key] = get_manifest_size(manifest)
+                    return self._sizes[key]
+
+                reference = select_platform_manifest(manifest, platform)
+                if reference is None:
+                    return None
+        except Exception as e:
+            _LOGGER.debug(f"Failed to estimate the pull of {image_name}: {e}")
+        return None
+
+    async def get_registry_image_info(
+        self, image_name: str, local_digest: str | None = None
+    ) -> tuple[str | None, dict]:
         """Fetch remote digest and labels from registry directly."""
         if not self.session:
             self.session = aiohttp.ClientSession()
 
         try:
             registry, repository, tag = parse_image_name(image_name)
-            # 1. Get Auth Token
-            auth_url = f"https://{registry}/v2/"
-            async with self.session.get(auth_url) as resp:
-                if resp.status == 401:
-                    auth_header = resp.headers.get("Www-Authenticate")
-                    if auth_header:
-                        match = re.match(
-                            r'Bearer realm="([^"]+)",service="([^"]+)"', auth_header
+            url = f"https://{registry}/v2/{repository}/manifests/{tag}"
+            key = f"{registry}/{repository}:{tag}"
+            cached = self.digests.get(key)
+
+            # a rejected cached token (revoked, changed realm) is renewed once
+            for retry in (True, False):
+                # 1. Get Auth Token (cached per registry and scope)
+                headers = await self._async_auth_headers(registry, repository)
+                if headers is None:
+                    return None, {}
+
+                headers["Accept"] = MANIFEST_ACCEPT
+
+                # 2. Get Digest, HEAD does not count as a pull
+                _LOGGER.debug(f"Fetching digest from {url}")
+                etag_headers = dict(headers)
+                if cached and cached.get("etag"):
+                    etag_headers["If-None-Match"] = cached["etag"]
+
+                async with self.session.head(
+                    url, headers=etag_headers, allow_redirects=True
+                ) as resp:
+                    self._record_rate_limit(registry, resp)
+                    if resp.status == 401 and retry:
+                        self._forget_auth(registry)
+                        continue
+
+                    if resp.status == 304:
+                        remote_digest, etag = cached["digest"], cached["etag"]
+                    elif resp.status == 200:
+                        remote_digest = resp.headers.get("Docker-Content-Digest")
+                        etag = resp.headers.get("ETag")
+                    else:
+                        _LOGGER.warning(
+                            f"Failed to get manifest for {image_name}: {resp.status}"
                         )
-                        if match:
-                            realm = match.group(1)
-                            service = match.group(2)
-                            scope = f"repository:{repository}:pull"
-                            token_url = f"{realm}?service={service}&scope={scope}"
-                            async with self.session.get(token_url) as token_resp:
-                                if token_resp.status == 200:
-                                    token_data = await token_resp.json()
-                                    token = token_data.get("token") or token_data.get(
-                                        "access_token"
-                                    )
-                                    headers = {"Authorization": f"Bearer {token}"}
-                                else:
-                                    _LOGGER.warning(
-                                        f"Failed to get auth token for {image_name}: {token_resp.status}"
-                                    )
-                                    return None, {}
-                        else:
-                            # Try parsing without regex if it's simpler or different fmt
-                            pass
-
-            api_base = f"https://{registry}/v2/{repository}"
-            headers = headers if "headers" in locals() else {}
-            # Accept both V2 and OCI manifests
-            headers["Accept"] = (
-                "application/vnd.docker.distribution.manifest.v2+json, "
-                "application/vnd.oci.image.manifest.v1+json, "
-                "application/vnd.docker.distribution.manifest.list.v2+json, "
-                "application/vnd.oci.image.index.v1+json"
+                        return None, {}
+                break
+
+            labels = (
+                cached.get("labels")
+                if cached and cached["digest"] == remote_digest
+                else None
             )
+            if remote_digest and (remote_digest == local_digest or labels is not None):
+                # the labels are only needed to name a newer version
+                self.digests[key] = dict(digest=remote_digest, etag=etag, labels=labels)
+                return remote_digest, labels or {}
 
-            # 2. Get Manifest
-            _LOGGER.debug(f"Fetching manifest from {api_base}/manifests/{tag}")
+            # 3. Get Manifest
+            _LOGGER.debug(f"Fetching manifest from {url}")
             remote_labels = {}
-            async with self.session.get(
-                f"{api_base}/manifests/{tag}", headers=headers
-            ) as resp:
+            async with self.session.get(url, headers=headers) as resp:
+                self._record_rate_limit(registry, resp)
                 if resp.status != 200:
                     _LOGGER.warning(
                         f"Failed to get manifest for {image_name}: {resp.status}"
                     )
                     return None, {}
 
-                # Check Digest Header
-                remote_digest = resp.headers.get("Docker-Content-Digest")
-                if not remote_digest:
-                    # Calculate or read from body? usually header is best for v2
-                    pass
-
+                remote_digest = resp.headers.get("Docker-Content-Digest", remote_digest)
                 manifest = await resp.json()
                 manifests = manifest.get("manifests", [])
                 annotations = manifest.get("annotations", {})
@@ -190,6 +1097,11 @@ class DockerHttpApi:
                 # combine annotations as labels
                 remote_labels.update(annotations)
 
+            if remote_digest:
+                self.digests[key] = dict(
+                    digest=remote_digest, etag=etag, labels=remote_labels
+                )
+
             return remote_digest, remote_labels
 
         except Exception as e:
@@ -197,12 +1109,38 @@ class DockerHttpApi:
             return None, {}
 
 
+def get_tls_files(cert_path: str) -> tuple[str, str, str]:
+    """The ca, cert and key files of a docker cert directory."""
+    return tuple(os.path.join(cert_path, x) for x in ("ca.pem", "cert.pem", "key.pem"))
+
+
+def create_ssl_context(cert_path: str, verify: bool) -> ssl.SSLContext:
+    """Client TLS context for a tcp:// host, loads files so run it in the executor."""
+    ca, cert, key = get_tls_files(cert_path)
+    context = ssl.create_default_context(cafile=ca if verify else None)
+    if not verify:
+        context.check_hostname = False
+        context.verify_mode = ssl.CERT_NONE
+    context.load_cert_chain(cert, key)
+    return context
+
+
 class DockerApi:
-    def __init__(self):
-        self.base_url = "unix://var/run/docker.sock"
+    def __init__(
+        self,
+        base_url: str = DEFAULT_HOST,
+        cert_path: str | None = None,
+        tls_verify: bool = True,
+        fast_workers: int = DEFAULT_FAST_WORKERS,
+        slow_workers: int = DEFAULT_SLOW_WORKERS,
+    ):
+        self.base_url = base_url
+        self.cert_path = cert_path
+        self.tls_verify = tls_verify
         self.loop = asyncio.get_running_loop()
         self.client = None
-        self.http = DockerHttpApi()
+        self.executor = DockerExecutor(fast_workers, slow_workers)
+        self.http = DockerHttpApi(self.executor)
 
     @property
     def connected(self) -> bool:
@@ -210,92 +1148,154 @@ class DockerApi:
 
     async def async_connect(self) -> None:
         def docker_client_init(obj):
-            obj.client = docker.DockerClient(base_url=obj.base_url)
+            tls = False
+            if obj.cert_path:
+                ca, cert, key = get_tls_files(obj.cert_path)
+                tls = docker.TLSConfig(
+                    client_cert=(cert, key),
+                    ca_cert=ca if obj.tls_verify else None,
+                    verify=obj.tls_verify,
+                )
+            obj.client = docker.DockerClient(
+                base_url=obj.base_url, tls=tls, timeout=CLIENT_TIMEOUT
+            )
 
-        await self.loop.run_in_executor(None, docker_client_init, self)
+        await self.executor.fast("connect", docker_client_init, self)
         await self.http.async_connect()
 
-    def async_fetch_data(self):
+    def async_fetch_data(self, previous: DockerHostInfo | None = None):
+        """Fetch the host info from the cheap listing endpoints (no sizes)."""
+
         def docker_data(client):
-            info = client.info()
-            data: dict = client.df()
-            containers = map(
-                lambda x: DockerContainerInfo(
-                    id=x["Id"],
-                    short_id=x["Id"][:12],
-                    name=x["Names"][0][1:],
-                    state=x["State"],
-                    status=x["Status"],
-                    image_id=get_img_id(x["ImageID"]),
-                    image_name=x["Image"],
-                    compose_project=(
-                        x["Labels"]["com.docker.compose.project"]
-                        if ("com.docker.compose.project" in x["Labels"])
-                        else None
-                    ),
-                    ports=set(
-                        (
-                            str(p["PrivatePort"])
-                            + ":"
-                            + (
-                                str(p["PublicPort"])
-                                if "PublicPort" in p
-                                else str(p["PrivatePort"])
-                            )
-                        )
-                        for p in x["Ports"]
-                    ),
-                    mounts=set(
-                        (
-                            ("b:" if o["Type"] == "bind" else (f"v({o["Name"]}):"))
-                            + o["Source"]
-                            + ":"
-                            + o["Destination"]
-                            + ":"
-                            + o["Mode"]
-                        )
-                        for o in x["Mounts"]
-                    ),
-                ),
-                data.get("Containers", []),
+            data = to_host_info(
+                client.info(),
+                client.api.containers(all=True),
+                client.api.images(),
+                client.api.volumes().get("Volumes") or [],
+                previous,
             )
+            # only (re)started containers are inspected for the start time
+            for id in get_missing_started_at(data.containers):
+                data.containers[id[:12]].started_at = parse_docker_time(
+                    client.api.inspect_container(id)["State"]["StartedAt"]
+                )
+            return data
 
-            images = map(
-                lambda x: DockerImageInfo(
-                    id=get_img_id(x["Id"]),
-                    tag=x["RepoTags"][0] if x["RepoTags"] else None,
-                    title=get_label("org.opencontainers.image.title", x["Labels"]),
-                    rev=get_label("org.opencontainers.image.revision", x["Labels"]),
-                    description=get_label(
-                        "org.opencontainers.image.description", x["Labels"]
-                    ),
-                    in_use=x["Containers"] > 0,
-                ),
-                data.get("Images", []),
-            )
+        return self.executor.fast("fetch_data", docker_data, self.client)
 
-            volumes = map(
-                lambda x: DockerVolumeInfo(
-                    name=x["Name"],
-                    in_use=x["UsageData"]["RefCount"] > 0,
-                    size=str(round(x["UsageData"]["Size"] / 1024, 2)) + "KB",
-                    mount_point=x["Mountpoint"],
-                ),
-                data.get("Volumes", []),
-            )
+    def async_fetch_disk_usage(self):
+        """Run the size computing docker disk usage scan."""
+        return self.executor.slow(
+            "disk_usage", lambda client: to_disk_usage(client.df()), self.client
+        )
+
+    def async_fetch_container(
+        self, id: str, previous: DockerContainerInfo | None = None
+    ):
+        """Fetch the listing entry of a single container."""
+
+        def fetch(client, id: str) -> DockerContainerInfo | None:
+            items = client.api.containers(all=True, filters={"id": id})
+            if not items:
+                return None
+
+            info = to_container_info(items[0], previous)
+            if get_missing_started_at({info.short_id: info}):
+                info.started_at = parse_docker_time(
+                    client.api.inspect_container(id)["State"]["StartedAt"]
+                )
+            return info
+
+        return self.executor.fast("fetch_container", fetch, self.client, id)
+
+    def async_fetch_image(self, id: str):
+        """Fetch a single image by id or reference."""
+
+        def fetch(client, id: str) -> DockerImageInfo | None:
+            try:
+                return to_image_info(client.api.inspect_image(id), in_use=False)
+            except ImageNotFound:
+                return None
+
+        return self.executor.fast("fetch_image", fetch, self.client, id)
 
-            return DockerHostInfo(
-                version=info["ServerVersion"],
-                firewall=info["FirewallBackend"]["Driver"],
-                containers_total=info["Containers"],
-                containers_running=info["ContainersRunning"],
-                images_total=info["Images"],
-                containers=dict(map(lambda x: (x.short_id, x), containers)),
-                images=dict(map(lambda x: (x.id[:12], x), images)),
-                volumes=dict(map(lambda x: (x.name[:26], x), volumes)),
+    def async_fetch_volume(self, name: str):
+        """Fetch a single volume by name."""
+
+        def fetch(client, name: str) -> DockerVolumeInfo | None:
+            try:
+                return to_volume_info(client.api.inspect_volume(name))
+            except NotFound:
+                return None
+
+        return self.executor.fast("fetch_volume", fetch, self.client, name)
+
+    def async_fetch_swarm(self):
+        """Fetch the services, the scheduled tasks and the nodes of the swarm."""
+
+        def fetch(client) -> DockerSwarmInfo:
+            return to_swarm_info(
+                client.api.services(),
+                client.api.tasks(filters=SWARM_TASK_FILTERS),
+                client.api.nodes(),
             )
 
-        return self.loop.run_in_executor(None, docker_data, self.client)
+        return self.executor.fast("fetch_swarm", fetch, self.client)
+
+    def async_fetch_swarm_service(self, id: str):
+        """Fetch a single swarm service with its scheduled tasks."""
+
+        def fetch(
+            client, id: str
+        ) -> tuple[DockerSwarmServiceInfo | None, dict[str, DockerSwarmTaskInfo]]:
+            try:
+                service = to_swarm_service(client.api.inspect_service(id))
+            except NotFound:
+                return None, {}
+
+            tasks = client.api.tasks(filters={**SWARM_TASK_FILTERS, "service": [id]})
+            return service, to_swarm_tasks(tasks)
+
+        return self.executor.fast("fetch_swarm_service", fetch, self.client, id)
+
+    def async_fetch_swarm_node(self, id: str):
+        """Fetch a single swarm node."""
+
+        def fetch(client, id: str) -> DockerSwarmNodeInfo | None:
+            try:
+                return to_swarm_node(client.api.inspect_node(id))
+            except NotFound:
+                return None
+
+        return self.executor.fast("fetch_swarm_node", fetch, self.client, id)
+
+    async def async_subscribe_events(self) -> DockerEventStream:
+        """Open a long-lived subscription to the docker /events endpoint."""
+        loop = self.loop
+        queue = asyncio.Queue[dict | None]()
+        stream = await self.executor.fast(
+            "subscribe_events",
+            lambda client: client.events(
+                decode=True, filters={"type": list(DOCKER_EVENT_TYPES)}
+            ),
+            self.client,
+        )
+
+        def pump():
+            try:
+                for event in stream:
+                    loop.call_soon_threadsafe(queue.put_nowait, event)
+            except Exception as e:
+                _LOGGER.debug(f"Docker events stream failed: {e}")
+            finally:
+                loop.call_soon_threadsafe(queue.put_nowait, None)
+
+        async def events():
+            while (event := await queue.get()) is not None:
+                yield event
+
+        self.executor.start_stream("events", pump)
+        return DockerEventStream(events(), stream.close)
 
     def async_test(self):
         def action(client):
@@ -303,29 +1303,35 @@ class DockerApi:
             # _LOGGER.warning(df)
             pass
 
-        return self.loop.run_in_executor(None, action, self.client)
+        return self.executor.fast("test", action, self.client)
 
     def async_container_start(self, id: str):
-        return self.loop.run_in_executor(
-            None, lambda client, id: client.containers.get(id).start(), self.client, id
+        return self.executor.slow(
+            "container_start",
+            lambda client, id: client.containers.get(id).start(),
+            self.client,
+            id,
         )
 
     def async_container_stop(self, id: str):
-        return self.loop.run_in_executor(
-            None, lambda client, id: client.containers.get(id).stop(), self.client, id
+        return self.executor.slow(
+            "container_stop",
+            lambda client, id: client.containers.get(id).stop(),
+            self.client,
+            id,
         )
 
     def async_container_restart(self, id: str):
-        return self.loop.run_in_executor(
-            None,
+        return self.executor.slow(
+            "container_restart",
             lambda client, id: client.containers.get(id).restart(),
             self.client,
             id,
         )
 
     def async_container_remove(self, id: str, remove_volumes=False):
-        return self.loop.run_in_executor(
-            None,
+        return self.executor.slow(
+            "container_remove",
             lambda client, id, volumes: client.containers.get(id).remove(v=volumes),
             self.client,
             id,
@@ -341,8 +1347,9 @@ class DockerApi:
         volumes: list = None,
         restart_policy: dict = None,
     ):
-        return self.loop.run_in_executor(
-            None,
+        """Create a container, returning its id."""
+        return self.executor.slow(
+            "container_create",
             lambda client, image, name, ports, network, volumes, restart_policy: client.containers.create(
                 image,
                 detach=True,
@@ -351,7 +1358,7 @@ class DockerApi:
                 network=network,
                 volumes=volumes,
                 restart_policy=restart_policy,
-            ),
+            ).id,
             self.client,
             image,
             name,
@@ -362,126 +1369,310 @@ class DockerApi:
         )
 
     def async_volumes_prune(self):
-        return self.loop.run_in_executor(
-            None, lambda client: client.volumes.prune(), self.client
+        return self.executor.slow(
+            "volumes_prune", lambda client: client.volumes.prune(), self.client
         )
 
     def async_images_prune(self, dangling=False):
-        return self.loop.run_in_executor(
-            None,
+        return self.executor.slow(
+            "images_prune",
             lambda client, dangling: client.images.prune({"dangling": dangling}),
             self.client,
             dangling,
         )
 
     def async_container_logs(self, id: str):
-        return self.loop.run_in_executor(
-            None,
+        return self.executor.fast(
+            "container_logs",
             lambda client, id: client.containers.get(id).logs(tail=100).decode("utf-8"),
             self.client,
             id,
         )
 
+    async def async_container_logs_stream(
+        self,
+        id: str,
+        since: int | None = None,
+        timestamps: bool = False,
+        tail: int | str = "all",
+        follow: bool = True,
+        until: int | None = None,
+    ) -> DockerEventStream:
+        """Stream the container output, the pump blocks while the queue is full."""
+        loop = self.loop
+        queue = asyncio.Queue[bytes | None](LOG_STREAM_QUEUE_SIZE)
+        stream = await self.executor.fast(
+            "container_logs_stream",
+            lambda client: client.api.logs(
+                id,
+                stream=True,
+                follow=follow,
+                since=since,
+                until=until,
+                timestamps=timestamps,
+                tail=tail,
+            ),
+            self.client,
+        )
+
+        ended = False
+
+        def end():
+            nonlocal ended
+            try:
+                queue.put_nowait(None)
+            except asyncio.QueueFull:
+                # nothing may drain a closed stream, a waiting put would hang
+                ended = True
+
+        def pump():
+            try:
+                for chunk in stream:
+                    asyncio.run_coroutine_threadsafe(queue.put(chunk), loop).result()
+            except Exception as e:
+                _LOGGER.debug(f"Docker logs stream of {id} ended: {e}")
+            finally:
+                loop.call_soon_threadsafe(end)
+
+        async def chunks():
+            while not (ended and queue.empty()):
+                if (chunk := await queue.get()) is None:
+                    return
+                yield chunk
+
+        def close():
+            stream.close()
+            # release a pump blocked on the full queue
+            while not queue.empty():
+                queue.get_nowait()
+
+        self.executor.start_stream(f"logs_{id[:12]}", pump)
+        return DockerEventStream(chunks(), close)
+
+    async def async_container_stats_stream(
+        self, id: str, interval: float
+    ) -> DockerEventStream:
+        """
+        Sample the container stats every interval. One shot requests instead
+        of a streaming request keep no executor thread busy per container.
+        """
+        closed = asyncio.Event()
+
+        async def samples():
+            while not closed.is_set():
+                sample = await self.executor.fast(
+                    "container_stats",
+                    lambda client: client.api.stats(id, stream=False, one_shot=True),
+                    self.client,
+                )
+                yield sample
+                try:
+                    await asyncio.wait_for(closed.wait(), interval)
+                except TimeoutError:
+                    pass
+
+        return DockerEventStream(samples(), closed.set)
+
     def async_containers_prune(self):
-        return self.loop.run_in_executor(
-            None, lambda client: client.containers.prune(), self.client
+        return self.executor.slow(
+            "containers_prune", lambda client: client.containers.prune(), self.client
         )
 
-    def async_container_update(self, id: str) -> bool:
-        def _update_container(client, id: str):
+    async def async_image_pull(
+        self,
+        image_name: str,
+        progress: typing.Callable[[DockerPullProgress], None] | None = None,
+    ) -> DockerPullProgress:
+        """Pull an image streaming the layer progress, cancelling stops the pull."""
+        pull_progress = DockerPullProgress()
+        cancelled = threading.Event()
+
+        def pull(client, image_name: str):
+            repository, tag = split_image_tag(image_name)
+            events = client.api.pull(repository, tag, stream=True, decode=True)
             try:
-                container = client.containers.get(id)
+                for event in events:
+                    if cancelled.is_set():
+                        return
+                    if "error" in event:
+                        raise APIError(event["error"])
+                    if pull_progress.update(event) and progress:
+                        self.loop.call_soon_threadsafe(progress, pull_progress)
+            finally:
+                events.close()
+
+        try:
+            await self.executor.slow("image_pull", pull, self.client, image_name)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+        return pull_progress
+
+    def async_container_inspect(self, id: str):
+        """Inspect a container, None when it does not exist."""
+
+        def inspect(client, id: str) -> dict | None:
+            try:
+                return client.api.inspect_container(id)
             except NotFound:
-                _LOGGER.warning(f"Container '{id}' not found")
-                return False
-
-            name = container.name
-            attrs = container.attrs
-            config = attrs.get("Config", {})
-            image_name = config.get("Image", None)
-            if not image_name:
-                _LOGGER.warning(f"No image for container {name}")
-                return False
-
-            _LOGGER.debug(f"Updating container '{name}' to latest '{image_name}'")
-            client.images.pull(image_name)
-
-            # Extract options
-            host_cfg = attrs.get("HostConfig", {})
-            networking = attrs.get("NetworkSettings", {}).get("Networks", {})
-            env = config.get("Env", [])
-            cmd = config.get("Cmd", None)
-            entrypoint = config.get("Entrypoint", None)
-            working_dir = config.get("WorkingDir", None)
-            labels = config.get("Labels", None)
-            user = config.get("User", None)
-            restart_policy = host_cfg.get("RestartPolicy", {})
-            ports = {
-                p.split("/")[0]: binding[0]["HostPort"]
-                for p, binding in (host_cfg.get("PortBindings", {}) or {}).items()
-            } or None
-            mounts = {
-                m["Source"]: {
-                    "bind": m["Destination"],
-                    "mode": "rw" if m.get("RW", True) else "ro",
-                }
-                for m in attrs.get("Mounts", [])
-            }
-
-            _LOGGER.debug("Stopping and removing old container...")
-            container.stop()
-            container.remove()
-
-            _LOGGER.debug("Creating new container with preserved settings...")
-            new_container = client.containers.run(
-                image_name,
-                name=name,
-                detach=True,
-                environment=env,
-                ports=ports,
-                volumes=mounts,
-                restart_policy=restart_policy,
-                working_dir=working_dir,
-                command=cmd,
-                entrypoint=entrypoint,
-                labels=labels,
-                user=user,
-            )
+                return None
 
-            # attach networks
-            for net_name in networking.keys():
-                try:
-                    client.networks.get(net_name).connect(new_container)
-                except Exception as e:
-                    _LOGGER.warning(f"Failed to reattach network '{net_name}': {e}")
+        return self.executor.fast("container_inspect", inspect, self.client, id)
 
-            return True
+    def async_container_create_from_config(self, name: str, config: dict):
+        """Create a container from a raw create body, returning its id."""
+        return self.executor.slow(
+            "container_create",
+            lambda client, name, config: client.api.create_container_from_config(
+                config, name
+            )["Id"],
+            self.client,
+            name,
+            config,
+        )
 
-        return self.loop.run_in_executor(None, _update_container, self.client, id)
+    def async_container_rename(self, id: str, name: str):
+        return self.executor.slow(
+            "container_rename",
+            lambda client, id, name: client.api.rename(id, name),
+            self.client,
+            id,
+            name,
+        )
+
+    def async_network_connect(self, network: str, id: str, endpoint: dict):
+        return self.executor.slow(
+            "network_connect",
+            lambda client: client.api.connect_container_to_network(
+                id,
+                network,
+                aliases=endpoint.get("Aliases"),
+                links=endpoint.get("Links"),
+                ipv4_address=(endpoint.get("IPAMConfig") or {}).get("IPv4Address"),
+                ipv6_address=(endpoint.get("IPAMConfig") or {}).get("IPv6Address"),
+            ),
+            self.client,
+        )
 
-    async def async_images_check_update(self, image_name: str) -> DockerImageUpdateInfo:
+    async def async_container_update(
+        self,
+        id: str,
+        progress: typing.Callable[[DockerPullProgress], None] | None = None,
+        pull: bool = True,
+    ) -> float | None:
         """
-        Check if a newer version of the image exists on the registry.
+        Recreate a container from its latest image, returning the downtime in seconds.
+        The replacement is created before the old container is stopped, which is
+        removed only when the replacement is ready and restored otherwise.
         """
-        _LOGGER.debug(f"async_images_check_update: {image_name}")
+        attrs = await self.async_container_inspect(id)
+        if attrs is None:
+            _LOGGER.warning(f"Container '{id}' not found")
+            return None
+
+        name = attrs["Name"][1:]
+        image_name = (attrs.get("Config") or {}).get("Image", None)
+        if not image_name:
+            _LOGGER.warning(f"No image for container {name}")
+            return None
+
+        _LOGGER.debug(f"Updating container '{name}' to latest '{image_name}'")
+        if pull:
+            await self.async_image_pull(image_name, progress)
+
+        _LOGGER.debug("Creating new container with preserved settings...")
+        suffix = int(time.time())
+        config, endpoints = to_recreate_config(attrs)
+        new_id = await self.async_container_create_from_config(
+            f"{name}-update-{suffix}", config
+        )
 
-        def get_local_info(client, image_name: str) -> tuple[str | None, dict | None]:
+        was_running = (attrs.get("State") or {}).get("Running", False)
+        stopped = renamed = False
+        downtime = 0.0
+        try:
+            # the primary network is attached at create, the others before start
+            for network, endpoint in endpoints.items():
+                await self.async_network_connect(network, new_id, endpoint)
+
+            if was_running:
+                _LOGGER.debug("Stopping old container and starting the new one...")
+                started = time.monotonic()
+                stopped = True
+                await self.async_container_stop(id)
+                await self.async_container_start(new_id)
+                await self._async_wait_ready(new_id)
+                downtime = time.monotonic() - started
+
+            renamed = True
+            await self.async_container_rename(id, f"{name}-old-{suffix}")
+            await self.async_container_rename(new_id, name)
+        except BaseException as e:
+            # also on a cancelled or timed out job, shielded so that a second
+            # cancel does not stop the rollback halfway
+            _LOGGER.warning(
+                f"Failed to update container '{name}', rolling back: {e!r}"
+            )
+            await asyncio.shield(
+                self._async_rollback(id, new_id, name, stopped, renamed)
+            )
+            raise
+
+        await self.async_container_remove(id)
+        _LOGGER.info(f"Updated container '{name}' with {downtime:.1f}s downtime")
+        return downtime
+
+    async def _async_wait_ready(self, id: str):
+        """Wait for a started container to run, or to be healthy with a healthcheck."""
+        deadline = time.monotonic() + UPDATE_READY_TIMEOUT
+        while True:
+            attrs = await self.async_container_inspect(id) or {}
+            state = attrs.get("State") or {}
+            health = (state.get("Health") or {}).get("Status")
+            if state.get("Running") and health in (None, "none", "healthy"):
+                return
+            if state.get("Status") in ("exited", "dead") or health == "unhealthy":
+                status = health or state.get("Status")
+                raise DockerUpdateError(f"New container is {status}")
+            if time.monotonic() > deadline:
+                raise DockerUpdateError("New container did not get ready in time")
+
+            await asyncio.sleep(UPDATE_READY_POLL)
+
+    async def _async_rollback(
+        self, id: str, new_id: str, name: str, stopped: bool, renamed: bool
+    ):
+        """Remove the replacement and bring the old container back."""
+        steps = [
+            lambda: self.async_container_stop(new_id),
+            lambda: self.async_container_remove(new_id),
+        ]
+        if renamed:
+            steps.append(lambda: self.async_container_rename(id, name))
+        if stopped:
+            steps.append(lambda: self.async_container_start(id))
+
+        # keep going after a failed step to restore as much as possible
+        for step in steps:
             try:
-                local_image = client.images.get(image_name)
-                local_digest = local_image.attrs.get("RepoDigests", [None])[0]
-
-                if not local_digest:
-                    return None, None
+                await step()
+            except Exception as e:
+                _LOGGER.warning(f"Rollback of container '{name}' step failed: {e}")
 
-                local_digest_hash = local_digest.split("@")[1]
-                local_labels = local_image.attrs.get("Config", {}).get("Labels") or {}
-                return local_digest_hash, local_labels
+    def _async_local_image_info(self, image_name: str):
+        def get_local_info(client, image_name: str) -> tuple[str | None, dict | None]:
+            try:
+                return to_local_image_info(client.images.get(image_name).attrs)
             except ImageNotFound:
                 return None, None
             except Exception as e:
                 _LOGGER.warning(f"Error getting local image info for {image_name}: {e}")
                 raise e
 
+        return self.executor.fast("image_inspect", get_local_info, self.client, image_name)
+
+    def _async_registry_data(self, image_name: str):
         # Fallback: Use blocking docker-py check which handles auth better sometimes?
         def fallback_get_registry_image_info(client, image_name):
             try:
@@ -490,18 +1681,35 @@ class DockerApi:
             except Exception:
                 return None, {}
 
+        return self.executor.fast(
+            "registry_data", fallback_get_registry_image_info, self.client, image_name
+        )
+
+    async def async_images_check_update(
+        self, image_name: str, local_image: DockerImageInfo | None = None
+    ) -> DockerImageUpdateInfo:
+        """
+        Check if a newer version of the image exists on the registry.
+        The local image is inspected when it is not given from the listing.
+        """
+        _LOGGER.debug(f"async_images_check_update: {image_name}")
+
         info = DockerImageUpdateInfo(
             has_newer=False, current_ver=None, new_ver=None, source=None
         )
 
         # 1. Get Local Info
-        try:
-            local_digest_hash, local_labels = await self.loop.run_in_executor(
-                None, get_local_info, self.client, image_name
-            )
-        except Exception:
-            # If error happens, assume we can't check
-            return info
+        if local_image is not None:
+            local_digest_hash = get_repo_digest(local_image.repo_digests, image_name)
+            local_labels = local_image.labels
+        else:
+            try:
+                local_digest_hash, local_labels = await self._async_local_image_info(
+                    image_name
+                )
+            except Exception:
+                # If error happens, assume we can't check
+                return info
 
         if not local_digest_hash:
             # Not found or no digest, assume update available (standard behavior)
@@ -516,14 +1724,15 @@ class DockerApi:
         # Actually logic is robust enough to return None.
         _LOGGER.debug(f"Checking registry for {image_name}...")
         remote_digest_hash, remote_labels = await self.http.get_registry_image_info(
-            image_name
+            image_name, local_digest_hash
         )
         _LOGGER.debug(f"Remote digest (http): {remote_digest_hash}:::{remote_labels}")
 
-        if not remote_digest_hash:
+        registry = parse_image_name(image_name)[0]
+        if not remote_digest_hash and not self.http.rate_limit_delay(registry):
             _LOGGER.debug("Falling back to docker client for registry info")
-            remote_digest_hash, remote_labels = await self.loop.run_in_executor(
-                None, fallback_get_registry_image_info, self.client, image_name
+            remote_digest_hash, remote_labels = await self._async_registry_data(
+                image_name
             )
             _LOGGER.debug(f"Remote digest (fallback): {remote_digest_hash}")
 
@@ -548,3 +1757,4 @@ class DockerApi:
         if self.connected:
             self.client.close()
             self.client = None
+        self.executor.shutdown()
@@ -0,0 +1,579 @@
+import asyncio
+import ssl
+import typing
+from urllib.parse import quote
+
+import aiohttp
+import orjson
+
+from ._docker_api import (
+    DOCKER_EVENT_TYPES,
+    DockerApi,
+    DockerContainerInfo,
+    DockerDiskUsage,
+    DockerEventStream,
+    DockerHostInfo,
+    DockerImageInfo,
+    DockerPullProgress,
+    DockerVolumeInfo,
+    create_ssl_context,
+    get_missing_started_at,
+    parse_docker_time,
+    split_image_tag,
+    to_container_info,
+    to_disk_usage,
+    to_host_info,
+    to_image_info,
+    to_local_image_info,
+    to_volume_info,
+)
+from ._docker_executor import DockerExecutor, DockerLane
+from ._docker_swarm import (
+    SWARM_TASK_FILTERS,
+    DockerSwarmInfo,
+    DockerSwarmNodeInfo,
+    DockerSwarmServiceInfo,
+    DockerSwarmTaskInfo,
+    to_swarm_info,
+    to_swarm_node,
+    to_swarm_service,
+    to_swarm_tasks,
+)
+from .const import _LOGGER, DEFAULT_FAST_WORKERS, DEFAULT_SLOW_WORKERS
+
+DEFAULT_SOCKET_PATH = "/var/run/docker.sock"
+# no pool limit, the lanes bound the requests and every open stream (events,
+# logs, stats) holds a connection
+CONNECTION_LIMIT = 0
+KEEPALIVE_TIMEOUT = 30
+READ_TIMEOUT = aiohttp.ClientTimeout(total=60, sock_connect=10)
+STREAM_TIMEOUT = aiohttp.ClientTimeout(total=None, sock_connect=10)
+MULTIPLEXED_STREAM = "application/vnd.docker.multiplexed-stream"
+# second path segments naming an endpoint of the collection, not an item
+COLLECTION_ACTIONS = {"json", "create", "prune", "df"}
+# reads computing sizes, kept out of the lane of the polls
+SLOW_PATHS = {"/system/df"}
+
+
+class DockerEngineError(Exception):
+    """Error response from the docker engine."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(f"{status}: {message}")
+        self.status = status
+
+
+def to_query(params: dict | None) -> dict[str, str]:
+    """Encode the query parameters the way the engine expects them."""
+    query = {}
+    for key, value in (params or {}).items():
+        if value is None:
+            continue
+        if isinstance(value, bool):
+            query[key] = "1" if value else "0"
+        elif isinstance(value, dict | list):
+            query[key] = orjson.dumps(value).decode()
+        else:
+            query[key] = str(value)
+
+    return query
+
+
+def to_operation(method: str, path: str) -> tuple[DockerLane, str]:
+    """The lane and the operation type (the path without ids) of a request."""
+    segments = path.strip("/").split("/")
+    if len(segments) == 1 or (len(segments) == 2 and segments[1] in COLLECTION_ACTIONS):
+        operation = path
+    elif len(segments) == 2:
+        operation = f"/{segments[0]}/{{id}}"
+    else:
+        operation = f"/{segments[0]}/{{id}}/{segments[-1]}"
+
+    slow = method != "GET" or path in SLOW_PATHS
+    return "slow" if slow else "fast", f"{method} {operation}"
+
+
+def _error_message(body: bytes) -> str:
+    try:
+        return orjson.loads(body).get("message", "")
+    except orjson.JSONDecodeError:
+        return body.decode("utf-8", errors="replace")
+
+
+async def read_json_lines(
+    resp: aiohttp.ClientResponse,
+) -> typing.AsyncIterator[dict]:
+    """Decode a streamed response with one JSON document per line."""
+    try:
+        async for line in resp.content:
+            if line.strip():
+                yield orjson.loads(line)
+    finally:
+        resp.close()
+
+
+async def read_log_frames(
+    resp: aiohttp.ClientResponse, tty: bool
+) -> typing.AsyncIterator[bytes]:
+    """Read the log payload, removing the stdout/stderr frame headers."""
+    try:
+        if tty and resp.content_type != MULTIPLEXED_STREAM:
+            async for chunk in resp.content.iter_any():
+                yield chunk
+            return
+
+        while True:
+            try:
+                header = await resp.content.readexactly(8)
+            except asyncio.IncompleteReadError:
+                return
+            yield await resp.content.readexactly(int.from_bytes(header[4:], "big"))
+    finally:
+        resp.close()
+
+
+class DockerEngineClient:
+    """
+    Minimal async client for the docker engine API over the unix socket or
+    a tcp:// host (TLS when a ssl context is given).
+    """
+
+    def __init__(
+        self,
+        base_url: str = DEFAULT_SOCKET_PATH,
+        executor: DockerExecutor | None = None,
+    ):
+        self.base_url = base_url
+        self.executor = executor
+        self.session: aiohttp.ClientSession | None = None
+
+    async def async_connect(self, ssl_context: ssl.SSLContext | None = None):
+        if self.base_url.startswith("tcp://"):
+            connector = aiohttp.TCPConnector(
+                ssl=ssl_context or False,
+                limit=CONNECTION_LIMIT,
+                keepalive_timeout=KEEPALIVE_TIMEOUT,
+            )
+            scheme = "https" if ssl_context else "http"
+            base_url = f"{scheme}://{self.base_url.removeprefix('tcp://')}"
+        else:
+            connector = aiohttp.UnixConnector(
+                path=self.base_url.removeprefix("unix://"),
+                limit=CONNECTION_LIMIT,
+                keepalive_timeout=KEEPALIVE_TIMEOUT,
+            )
+            base_url = "http://docker"
+
+        self.session = aiohttp.ClientSession(
+            base_url=base_url,
+            connector=connector,
+            json_serialize=lambda x: orjson.dumps(x).decode(),
+        )
+
+    async def close(self):
+        if self.session:
+            await self.session.close()
+            self.session = None
+
+    async def open(
+        self,
+        method: str,
+        path: str,
+        params: dict | None = None,
+        json: typing.Any = None,
+        timeout: aiohttp.ClientTimeout = STREAM_TIMEOUT,
+        headers: dict[str, str] | None = None,
+    ) -> aiohttp.ClientResponse:
+        """Send a request and return the unread response, the caller closes it."""
+        resp = await self.session.request(
+            method,
+            path,
+            params=to_query(params),
+            json=json,
+            timeout=timeout,
+            headers=headers,
+        )
+        if resp.status >= 400:
+            try:
+                raise DockerEngineError(resp.status, _error_message(await resp.read()))
+            finally:
+                resp.release()
+
+        return resp
+
+    async def request(
+        self,
+        method: str,
+        path: str,
+        params: dict | None = None,
+        json: typing.Any = None,
+        timeout: aiohttp.ClientTimeout = READ_TIMEOUT,
+    ) -> typing.Any:
+        """Send a request and return the decoded JSON response (if any)."""
+        if self.executor is None:
+            return await self._request(method, path, params, json, timeout)
+
+        lane, operation = to_operation(method, path)
+        async with self.executor.lanes[lane].slot(operation):
+            return await self._request(method, path, params, json, timeout)
+
+    async def _request(
+        self,
+        method: str,
+        path: str,
+        params: dict | None,
+        json: typing.Any,
+        timeout: aiohttp.ClientTimeout,
+    ) -> typing.Any:
+        resp = await self.open(method, path, params, json, timeout)
+        async with resp:
+            body = await resp.read()
+            if body and resp.content_type == "application/json":
+                return orjson.loads(body)
+            return None
+
+    async def get(self, path: str, params: dict | None = None) -> typing.Any:
+        return await self.request("GET", path, params)
+
+    async def post(
+        self, path: str, params: dict | None = None, json: typing.Any = None
+    ) -> typing.Any:
+        # mutations (stop, prune, ...) can take longer than any read timeout
+        return await self.request("POST", path, params, json, timeout=STREAM_TIMEOUT)
+
+    async def stream_json(
+        self,
+        method: str,
+        path: str,
+        params: dict | None = None,
+        headers: dict[str, str] | None = None,
+    ) -> typing.AsyncIterator[dict]:
+        """Stream a response with one JSON document per line."""
+        resp = await self.open(method, path, params, headers=headers)
+        async for item in read_json_lines(resp):
+            yield item
+
+
+class DockerEngineApi(DockerApi):
+    """DockerApi backed by the async engine client instead of executor threads."""
+
+    def __init__(
+        self,
+        base_url: str = DEFAULT_SOCKET_PATH,
+        cert_path: str | None = None,
+        tls_verify: bool = True,
+        fast_workers: int = DEFAULT_FAST_WORKERS,
+        slow_workers: int = DEFAULT_SLOW_WORKERS,
+    ):
+        super().__init__(base_url, cert_path, tls_verify, fast_workers, slow_workers)
+        self.engine = DockerEngineClient(base_url, self.executor)
+
+    @property
+    def connected(self) -> bool:
+        return self.engine.session is not None
+
+    async def async_connect(self) -> None:
+        ssl_context = None
+        if self.cert_path and self.base_url.startswith("tcp://"):
+            ssl_context = await self.executor.fast(
+                "ssl_context", create_ssl_context, self.cert_path, self.tls_verify
+            )
+        await self.engine.async_connect(ssl_context)
+        await self.http.async_connect()
+
+    async def async_fetch_data(
+        self, previous: DockerHostInfo | None = None
+    ) -> DockerHostInfo:
+        info, containers, images, volumes = await asyncio.gather(
+            self.engine.get("/info"),
+            self.engine.get("/containers/json", {"all": True}),
+            self.engine.get("/images/json"),
+            self.engine.get("/volumes"),
+        )
+
+        data = to_host_info(
+            info, containers, images, volumes.get("Volumes") or [], previous
+        )
+        await self._async_fill_started_at(data.containers)
+        return data
+
+    async def _async_fill_started_at(self, containers: dict[str, DockerContainerInfo]):
+        # only (re)started containers are inspected for the start time
+        ids = get_missing_started_at(containers)
+        for id, attrs in zip(
+            ids,
+            await asyncio.gather(
+                *(self.engine.get(f"/containers/{id}/json") for id in ids)
+            ),
+        ):
+            containers[id[:12]].started_at = parse_docker_time(
+                attrs["State"]["StartedAt"]
+            )
+
+    async def async_fetch_disk_usage(self) -> DockerDiskUsage:
+        return to_disk_usage(await self.engine.get("/system/df"))
+
+    async def async_fetch_container(
+        self, id: str, previous: DockerContainerInfo | None = None
+    ) -> DockerContainerInfo | None:
+        items = await self.engine.get(
+            "/containers/json", {"all": True, "filters": {"id": [id]}}
+        )
+        if not items:
+            return None
+
+        info = to_container_info(items[0], previous)
+        await self._async_fill_started_at({info.short_id: info})
+        return info
+
+    async def async_fetch_image(self, id: str) -> DockerImageInfo | None:
+        try:
+            attrs = await self.engine.get(f"/images/{quote(id, safe='/:@')}/json")
+        except DockerEngineError as e:
+            if e.status == 404:
+                return None
+            raise
+
+        return to_image_info(attrs, in_use=False)
+
+    async def async_fetch_volume(self, name: str) -> DockerVolumeInfo | None:
+        try:
+            attrs = await self.engine.get(f"/volumes/{quote(name)}")
+        except DockerEngineError as e:
+            if e.status == 404:
+                return None
+            raise
+
+        return to_volume_info(attrs)
+
+    async def async_fetch_swarm(self) -> DockerSwarmInfo:
+        services, tasks, nodes = await asyncio.gather(
+            self.engine.get("/services"),
+            self.engine.get("/tasks", {"filters": SWARM_TASK_FILTERS}),
+            self.engine.get("/nodes"),
+        )
+        return to_swarm_info(services, tasks, nodes)
+
+    async def async_fetch_swarm_service(
+        self, id: str
+    ) -> tuple[DockerSwarmServiceInfo | None, dict[str, DockerSwarmTaskInfo]]:
+        try:
+            attrs, tasks = await asyncio.gather(
+                self.engine.get(f"/services/{id}"),
+                self.engine.get(
+                    "/tasks", {"filters": {**SWARM_TASK_FILTERS, "service": [id]}}
+                ),
+            )
+        except DockerEngineError as e:
+            if e.status == 404:
+                return None, {}
+            raise
+
+        return to_swarm_service(attrs), to_swarm_tasks(tasks)
+
+    async def async_fetch_swarm_node(self, id: str) -> DockerSwarmNodeInfo | None:
+        try:
+            attrs = await self.engine.get(f"/nodes/{id}")
+        except DockerEngineError as e:
+            if e.status == 404:
+                return None
+            raise
+
+        return to_swarm_node(attrs)
+
+    async def async_subscribe_events(self) -> DockerEventStream:
+        resp = await self.engine.open(
+            "GET", "/events", {"filters": {"type": list(DOCKER_EVENT_TYPES)}}
+        )
+
+        return DockerEventStream(read_json_lines(resp), resp.close)
+
+    async def async_container_start(self, id: str):
+        await self.engine.post(f"/containers/{id}/start")
+
+    async def async_container_stop(self, id: str):
+        await self.engine.post(f"/containers/{id}/stop")
+
+    async def async_container_restart(self, id: str):
+        await self.engine.post(f"/containers/{id}/restart")
+
+    async def async_container_remove(self, id: str, remove_volumes=False):
+        await self.engine.request(
+            "DELETE",
+            f"/containers/{id}",
+            {"v": remove_volumes},
+            timeout=STREAM_TIMEOUT,
+        )
+
+    async def async_container_create(
+        self,
+        image: str,
+        name: str = None,
+        ports: list[str] = None,
+        network: str = None,
+        volumes: list[str] = None,
+        restart_policy: dict = None,
+    ) -> str:
+        """Create a container, returning its id."""
+        exposed_ports = {}
+        port_bindings = {}
+        for port in ports or []:
+            host_port, _, container_port = port.rpartition(":")
+            if "/" not in container_port:
+                container_port += "/tcp"
+            exposed_ports[container_port] = {}
+            if host_port:
+                port_bindings.setdefault(container_port, []).append(
+                    {"HostPort": host_port}
+                )
+
+        created = await self.engine.post(
+            "/containers/create",
+            {"name": name},
+            {
+                "Image": image,
+                "ExposedPorts": exposed_ports,
+                "HostConfig": {
+                    "PortBindings": port_bindings,
+                    "Binds": volumes or [],
+                    "NetworkMode": network,
+                    "RestartPolicy": restart_policy,
+                },
+            },
+        )
+        return created["Id"]
+
+    async def async_volumes_prune(self):
+        return await self.engine.post("/volumes/prune")
+
+    async def async_images_prune(self, dangling=False):
+        return await self.engine.post(
+            "/images/prune", {"filters": {"dangling": [str(dangling).lower()]}}
+        )
+
+    async def async_containers_prune(self):
+        return await self.engine.post("/containers/prune")
+
+    async def async_container_logs(self, id: str) -> str:
+        attrs = await self.engine.get(f"/containers/{id}/json")
+        resp = await self.engine.open(
+            "GET",
+            f"/containers/{id}/logs",
+            {"stdout": True, "stderr": True, "tail": 100},
+            timeout=READ_TIMEOUT,
+        )
+        tty = attrs.get("Config", {}).get("Tty", False)
+        return b"".join([chunk async for chunk in read_log_frames(resp, tty)]).decode(
+            "utf-8"
+        )
+
+    async def async_container_logs_stream(
+        self,
+        id: str,
+        since: int | None = None,
+        timestamps: bool = False,
+        tail: int | str = "all",
+        follow: bool = True,
+        until: int | None = None,
+    ) -> DockerEventStream:
+        attrs = await self.engine.get(f"/containers/{id}/json")
+        params = {
+            "stdout": True,
+            "stderr": True,
+            "follow": follow,
+            "timestamps": timestamps,
+            "tail": tail,
+        }
+        if since is not None:
+            params["since"] = since
+        if until is not None:
+            params["until"] = until
+
+        # not reading the socket holds back the engine, no buffering needed
+        resp = await self.engine.open("GET", f"/containers/{id}/logs", params)
+        tty = attrs.get("Config", {}).get("Tty", False)
+        return DockerEventStream(read_log_frames(resp, tty), resp.close)
+
+    async def async_container_stats_stream(
+        self, id: str, interval: float
+    ) -> DockerEventStream:
+        # the engine pushes a sample every second, the caller keeps the last one
+        resp = await self.engine.open(
+            "GET", f"/containers/{id}/stats", {"stream": True}
+        )
+        return DockerEventStream(read_json_lines(resp), resp.close)
+
+    async def async_image_pull(
+        self,
+        image_name: str,
+        progress: typing.Callable[[DockerPullProgress], None] | None = None,
+    ) -> DockerPullProgress:
+        """Pull an image, consuming the progress stream until it finishes."""
+        pull_progress = DockerPullProgress()
+        repository, tag = split_image_tag(image_name)
+        # the engine does not read the docker config of the client, as docker-py
+        # the credentials for the registry are sent along
+        auth = await self.http.async_registry_auth(image_name)
+        async with self.executor.lanes["slow"].slot("POST /images/create"):
+            async for event in self.engine.stream_json(
+                "POST",
+                "/images/create",
+                {"fromImage": repository, "tag": tag},
+                {"X-Registry-Auth": auth} if auth else None,
+            ):
+                if "error" in event:
+                    raise DockerEngineError(500, event["error"])
+                if pull_progress.update(event) and progress:
+                    progress(pull_progress)
+
+        return pull_progress
+
+    async def async_container_inspect(self, id: str) -> dict | None:
+        try:
+            return await self.engine.get(f"/containers/{id}/json")
+        except DockerEngineError as e:
+            if e.status == 404:
+                return None
+            raise
+
+    async def async_container_create_from_config(self, name: str, config: dict) -> str:
+        container = await self.engine.post("/containers/create", {"name": name}, config)
+        return container["Id"]
+
+    async def async_container_rename(self, id: str, name: str):
+        await self.engine.post(f"/containers/{id}/rename", {"name": name})
+
+    async def async_network_connect(self, network: str, id: str, endpoint: dict):
+        await self.engine.post(
+            f"/networks/{network}/connect",
+            json={"Container": id, "EndpointConfig": endpoint},
+        )
+
+    async def _async_local_image_info(
+        self, image_name: str
+    ) -> tuple[str | None, dict | None]:
+        try:
+            attrs = await self.engine.get(
+                f"/images/{quote(image_name, safe='/:@')}/json"
+            )
+        except DockerEngineError as e:
+            if e.status == 404:
+                return None, None
+            _LOGGER.warning(f"Error getting local image info for {image_name}: {e}")
+            raise
+
+        return to_local_image_info(attrs)
+
+    async def _async_registry_data(self, image_name: str) -> tuple[str | None, dict]:
+        try:
+            data = await self.engine.get(
+                f"/distribution/{quote(image_name, safe='/:@')}/json"
+            )
+            return data["Descriptor"]["digest"], {}
+        except Exception:
+            return None, {}
+
+    async def disconnect(self):
+        await self.http.close()
+        await self.engine.close()
+        self.executor.shutdown()
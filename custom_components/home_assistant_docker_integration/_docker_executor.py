@@ -0,0 +1,149 @@
+import asyncio
+import contextlib
+import threading
+import time
+import typing
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+# fast: listing, inspecting and log search, slow: pulls, stops, updates, prunes and df
+EXECUTOR_LANES = ("fast", "slow")
+type DockerLane = typing.Literal["fast", "slow"]
+
+
+@dataclass(kw_only=True)
+class DockerOperationStats:
+    """Counts and seconds spent queued and running of one operation type."""
+
+    count: int = 0
+    errors: int = 0
+    wait_total: float = 0.0
+    wait_max: float = 0.0
+    run_total: float = 0.0
+    run_max: float = 0.0
+
+    def add(self, wait: float, run: float, failed: bool) -> None:
+        self.count += 1
+        self.errors += failed
+        self.wait_total += wait
+        self.wait_max = max(self.wait_max, wait)
+        self.run_total += run
+        self.run_max = max(self.run_max, run)
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "wait_mean_ms": round(self.wait_total / self.count * 1000, 1),
+            "wait_max_ms": round(self.wait_max * 1000, 1),
+            "run_mean_ms": round(self.run_total / self.count * 1000, 1),
+            "run_max_ms": round(self.run_max * 1000, 1),
+        }
+
+
+class DockerWorkerLane:
+    """
+    At most size operations of the lane run at once, the others wait in the
+    queue. The blocking calls run on the own threads of the lane, the async
+    (engine) requests only take a slot.
+    """
+
+    def __init__(self, name: str, size: int):
+        self.name = name
+        self.size = size
+        self.queued = 0
+        self.running = 0
+        self.operations: dict[str, DockerOperationStats] = {}
+        self._semaphore = asyncio.Semaphore(size)
+        self._executor: ThreadPoolExecutor | None = None
+
+    @contextlib.asynccontextmanager
+    async def slot(self, operation: str) -> typing.AsyncIterator[None]:
+        queued_at = time.monotonic()
+        self.queued += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.queued -= 1
+
+        started_at = time.monotonic()
+        self.running += 1
+        failed = True
+        try:
+            yield
+            failed = False
+        finally:
+            self.running -= 1
+            self._semaphore.release()
+            self.operations.setdefault(operation, DockerOperationStats()).add(
+                started_at - queued_at, time.monotonic() - started_at, failed
+            )
+
+    async def run[T](self, operation: str, func: typing.Callable[..., T], *args) -> T:
+        """Run a blocking call on a thread of the lane."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                self.size, thread_name_prefix=f"docker_{self.name}"
+            )
+        async with self.slot(operation):
+            return await asyncio.get_running_loop().run_in_executor(
+                self._executor, func, *args
+            )
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def to_dict(self) -> dict:
+        return {
+            "size": self.size,
+            "queued": self.queued,
+            "running": self.running,
+            "operations": dict(
+                (name, stats.to_dict()) for name, stats in self.operations.items()
+            ),
+        }
+
+
+class DockerExecutor:
+    """
+    The own workers of a docker host instead of the shared executor of home
+    assistant, a slow stop or pull queues behind the other mutations and
+    never holds back the polls. The long-lived stream readers get their own
+    threads, they would hold a worker for as long as they are open.
+    """
+
+    def __init__(self, fast_workers: int, slow_workers: int):
+        self.lanes: dict[DockerLane, DockerWorkerLane] = {
+            "fast": DockerWorkerLane("fast", fast_workers),
+            "slow": DockerWorkerLane("slow", slow_workers),
+        }
+        self._stream_threads: list[threading.Thread] = []
+
+    def fast[T](self, operation: str, func: typing.Callable[..., T], *args):
+        return self.lanes["fast"].run(operation, func, *args)
+
+    def slow[T](self, operation: str, func: typing.Callable[..., T], *args):
+        return self.lanes["slow"].run(operation, func, *args)
+
+    @property
+    def streams(self) -> int:
+        return sum(1 for x in self._stream_threads if x.is_alive())
+
+    def start_stream(self, name: str, func: typing.Callable[[], None]) -> None:
+        """Read a blocking stream on a daemon thread until it is closed."""
+        self._stream_threads = [x for x in self._stream_threads if x.is_alive()]
+        thread = threading.Thread(target=func, name=f"docker_{name}", daemon=True)
+        thread.start()
+        self._stream_threads.append(thread)
+
+    def shutdown(self) -> None:
+        for lane in self.lanes.values():
+            lane.shutdown()
+
+    def to_dict(self) -> dict:
+        return {
+            "streams": self.streams,
+            "lanes": dict((name, lane.to_dict()) for name, lane in self.lanes.items()),
+        }
@@ -0,0 +1,190 @@
+import asyncio
+import contextlib
+import time
+import typing
+import uuid
+from dataclasses import dataclass, field
+
+from .const import _LOGGER
+
+# seconds a job may run once it holds its locks
+DEFAULT_JOB_TIMEOUT = 1800
+# finished jobs kept for the late subscribers
+JOB_HISTORY = 50
+
+JOB_FINISHED_STATES = ("succeeded", "failed", "cancelled", "timeout")
+type DockerJobState = typing.Literal[
+    "queued", "running", "succeeded", "failed", "cancelled", "timeout"
+]
+
+
+@dataclass(kw_only=True)
+class DockerJob:
+    """A long-running operation, the locked keys are the container names."""
+
+    id: str
+    operation: str
+    host: str
+    keys: tuple[str, ...] = ()
+    timeout: float = DEFAULT_JOB_TIMEOUT
+    state: DockerJobState = "queued"
+    progress: int | None = None
+    result: typing.Any = None
+    error: str | None = None
+    created_at: float = field(default_factory=time.time)
+    started_at: float | None = None
+    finished_at: float | None = None
+    task: asyncio.Task | None = field(default=None, repr=False, compare=False)
+
+    @property
+    def finished(self) -> bool:
+        return self.state in JOB_FINISHED_STATES
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "operation": self.operation,
+            "host": self.host,
+            "keys": list(self.keys),
+            "state": self.state,
+            "progress": self.progress,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+type DockerJobRun = typing.Callable[[DockerJob], typing.Awaitable[typing.Any]]
+type DockerJobListener = typing.Callable[[DockerJob], None]
+
+
+class DockerJobManager:
+    """
+    Runs the jobs of a docker host in the background. A job waits for the
+    locks of its keys, so the operations on one container serialize while the
+    other containers proceed. The locks are taken in sorted order, so two jobs
+    over overlapping containers can not deadlock.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        create_task: typing.Callable[[typing.Coroutine, str], asyncio.Task],
+    ):
+        self.host = host
+        self.jobs: dict[str, DockerJob] = {}
+        self._create_task = create_task
+        # key -> lock and the number of jobs holding or waiting for it
+        self._locks: dict[str, tuple[asyncio.Lock, int]] = {}
+        self._listeners: list[DockerJobListener] = []
+
+    def add_listener(self, listener: DockerJobListener) -> typing.Callable[[], None]:
+        """Called on every state or progress change, returns the remove call."""
+        self._listeners.append(listener)
+        return lambda: self._listeners.remove(listener)
+
+    def submit(
+        self,
+        operation: str,
+        run: DockerJobRun,
+        keys: typing.Iterable[str] = (),
+        timeout: float | None = None,
+    ) -> DockerJob:
+        """Start the job and return it at once, the result comes to the listeners."""
+        job = DockerJob(
+            id=uuid.uuid4().hex,
+            operation=operation,
+            host=self.host,
+            keys=tuple(sorted(set(keys))),
+            timeout=timeout or DEFAULT_JOB_TIMEOUT,
+        )
+        self.jobs[job.id] = job
+        job.task = self._create_task(
+            self._async_run(job, run), f"job {operation} {job.id}"
+        )
+        self._notify(job)
+        return job
+
+    def cancel(self, id: str) -> bool:
+        job = self.jobs.get(id)
+        if job is None or job.finished:
+            return False
+        job.task.cancel()
+        return True
+
+    def set_progress(self, job: DockerJob, progress: int | None) -> None:
+        if job.progress != progress:
+            job.progress = progress
+            self._notify(job)
+
+    @contextlib.asynccontextmanager
+    async def lock(self, *keys: str) -> typing.AsyncIterator[None]:
+        """Hold the locks of the keys, for the steps of a job over many containers."""
+        keys = sorted(set(keys))
+        for key in keys:
+            lock, users = self._locks.get(key, (None, 0))
+            self._locks[key] = (lock or asyncio.Lock(), users + 1)
+
+        acquired: list[asyncio.Lock] = []
+        try:
+            for key in keys:
+                lock = self._locks[key][0]
+                await lock.acquire()
+                acquired.append(lock)
+            yield
+        finally:
+            for lock in acquired:
+                lock.release()
+            for key in keys:
+                lock, users = self._locks[key]
+                if users == 1:
+                    del self._locks[key]
+                else:
+                    self._locks[key] = (lock, users - 1)
+
+    async def _async_run(self, job: DockerJob, run: DockerJobRun) -> None:
+        deadline: asyncio.Timeout | None = None
+        try:
+            async with self.lock(*job.keys):
+                job.state = "running"
+                job.started_at = time.time()
+                self._notify(job)
+                async with asyncio.timeout(job.timeout) as deadline:
+                    job.result = await run(job)
+            job.state = "succeeded"
+        except TimeoutError as e:
+            if deadline is not None and deadline.expired():
+                job.state = "timeout"
+                job.error = f"Timed out after {job.timeout} seconds"
+                _LOGGER.warning(f"Job {job.operation} {job.id}: {job.error}")
+            else:
+                # a timeout of the job itself, such as a registry request
+                job.state = "failed"
+                job.error = str(e) or "Timed out"
+                _LOGGER.warning(f"Job {job.operation} {job.id} failed: {job.error}")
+        except asyncio.CancelledError:
+            job.state = "cancelled"
+        except Exception as e:
+            job.state = "failed"
+            job.error = str(e)
+            _LOGGER.warning(f"Job {job.operation} {job.id} failed: {e}")
+        finally:
+            job.finished_at = time.time()
+            self._notify(job)
+            self._prune()
+
+    def _prune(self) -> None:
+        finished = [x for x in self.jobs.values() if x.finished]
+        for job in finished[: max(len(finished) - JOB_HISTORY, 0)]:
+            del self.jobs[job.id]
+
+    def _notify(self, job: DockerJob) -> None:
+        for listener in list(self._listeners):
+            listener(job)
+
+    def shutdown(self) -> None:
+        for job in self.jobs.values():
+            if not job.finished:
+                job.task.cancel()
@@ -0,0 +1,129 @@
+import re
+from collections import deque
+
+from ._docker_api import DockerApi
+
+# bytes of log collected before a batch is matched on a worker
+SEARCH_CHUNK_SIZE = 256 * 1024
+
+
+def split_log_lines(pending: bytes, chunks: list[bytes]) -> tuple[list[str], bytes]:
+    """Split log chunks in complete lines, the partial last line stays pending."""
+    *lines, pending = (pending + b"".join(chunks)).split(b"\n")
+    return [x.decode("utf-8", errors="replace") for x in lines], pending
+
+
+def log_sort_key(timestamp: str) -> str:
+    """Sortable form of a docker RFC3339Nano timestamp (trailing zeros trimmed)."""
+    base, _, fraction = timestamp.rstrip("Z").partition(".")
+    return f"{base}.{fraction.ljust(9, '0')}"
+
+
+def split_log_timestamp(line: str) -> tuple[str, str]:
+    """Split a line of a timestamps=True log into the timestamp and the text."""
+    timestamp, _, text = line.partition(" ")
+    return timestamp, text
+
+
+class DockerLogSearch:
+    """
+    Match log lines keeping only the context lines and the capped results, so
+    the memory does not depend on the log size. Feeding is blocking.
+    """
+
+    def __init__(
+        self,
+        pattern: str,
+        regex: bool = False,
+        ignore_case: bool = False,
+        context: int = 2,
+        max_results: int = 100,
+    ):
+        flags = re.IGNORECASE if ignore_case else 0
+        self._search = re.compile(
+            pattern if regex else re.escape(pattern), flags
+        ).search
+        self.context = context
+        self.max_results = max_results
+        self.results: list[dict] = []
+        # a match was dropped after the cap
+        self.truncated = False
+        self.lines = 0
+        self._before: deque[str] = deque(maxlen=context)
+        # results still collecting their after context
+        self._open: list[dict] = []
+        self._pending = b""
+
+    @property
+    def done(self) -> bool:
+        return self.truncated and not self._open
+
+    def feed(self, chunks: list[bytes]):
+        lines, self._pending = split_log_lines(self._pending, chunks)
+        for line in lines:
+            self._feed_line(line)
+
+    def finish(self):
+        if self._pending:
+            self.feed([b"\n"])
+
+    def _feed_line(self, line: str):
+        self.lines += 1
+        for result in self._open:
+            result["after"].append(line)
+        self._open = [r for r in self._open if len(r["after"]) < self.context]
+
+        if not self.truncated and self._search(line):
+            if len(self.results) >= self.max_results:
+                self.truncated = True
+            else:
+                result = {
+                    "line_number": self.lines,
+                    "line": line,
+                    "before": list(self._before),
+                    "after": [],
+                }
+                self.results.append(result)
+                if self.context:
+                    self._open.append(result)
+
+        self._before.append(line)
+
+
+async def async_search_logs(
+    api: DockerApi,
+    id: str,
+    search: DockerLogSearch,
+    since: int | None = None,
+    until: int | None = None,
+    timestamps: bool = False,
+) -> dict:
+    """
+    Stream the (windowed) container log and match it batch by batch on the
+    fast lane, a large search must not queue the stops and pulls behind it.
+    """
+    stream = await api.async_container_logs_stream(
+        id, since=since, until=until, timestamps=timestamps, follow=False
+    )
+    chunks: list[bytes] = []
+    size = 0
+    try:
+        async for chunk in stream:
+            chunks.append(chunk)
+            size += len(chunk)
+            if size >= SEARCH_CHUNK_SIZE:
+                await api.executor.fast("logs_search", search.feed, chunks)
+                chunks, size = [], 0
+                if search.done:
+                    break
+        else:
+            await api.executor.fast("logs_search", search.feed, chunks)
+            search.finish()
+    finally:
+        stream.close()
+
+    return {
+        "matches": search.results,
+        "lines_scanned": search.lines,
+        "truncated": search.truncated,
+    }
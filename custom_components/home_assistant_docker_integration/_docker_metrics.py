@@ -0,0 +1,134 @@
+import math
+from array import array
+from dataclasses import replace
+
+from ._docker_api import DockerContainerStats
+
+# (seconds per slot, slots): 10 minutes of 1 s, 2 hours of 10 s, 24 hours of 1 min
+METRICS_RESOLUTIONS = ((1, 600), (10, 720), (60, 1440))
+# cpu percent, memory bytes, network received and sent bytes per second
+METRICS_FIELDS = ("cpu", "memory", "rx", "tx")
+
+
+class MetricsRing:
+    """
+    Fixed size ring with one float32 slot per step and field, a slot holds
+    the mean of the samples which fell into it. Missing slots are NaN.
+    """
+
+    def __init__(self, step: int, size: int):
+        self.step = step
+        self.size = size
+        self.values = [array("f", [math.nan]) * size for _ in METRICS_FIELDS]
+        # slot numbers (timestamp // step) of the oldest and the newest sample
+        self.first: int | None = None
+        self.last: int | None = None
+        # running sums and counts of the newest slot
+        self._sums = [0.0] * len(METRICS_FIELDS)
+        self._counts = [0] * len(METRICS_FIELDS)
+
+    def add(self, timestamp: float, sample: tuple[float, ...]) -> None:
+        slot = int(timestamp // self.step)
+        if self.last is None:
+            self.first = self.last = slot
+        elif slot > self.last:
+            # clear the slots skipped while no samples arrived and the new one,
+            # a NaN field of the sample must not keep the value of a wrap ago
+            for skipped in range(max(self.last + 1, slot - self.size + 1), slot + 1):
+                for values in self.values:
+                    values[skipped % self.size] = math.nan
+            self.last = slot
+            self._sums = [0.0] * len(METRICS_FIELDS)
+            self._counts = [0] * len(METRICS_FIELDS)
+        elif slot < self.last:
+            return
+
+        index = slot % self.size
+        for i, value in enumerate(sample):
+            if math.isnan(value):
+                continue
+            self._sums[i] += value
+            self._counts[i] += 1
+            self.values[i][index] = self._sums[i] / self._counts[i]
+
+    def slots(self, count: int | None = None) -> range:
+        """The slot numbers of the kept samples, the newest count of them."""
+        if self.last is None:
+            return range(0)
+
+        start = max(self.first, self.last - self.size + 1)
+        if count is not None:
+            start = max(start, self.last - count + 1)
+        return range(start, self.last + 1)
+
+    def mean(self, field: int, count: int) -> float:
+        """Mean of the newest count slots of a field, NaN without samples."""
+        values = [self.values[field][s % self.size] for s in self.slots(count)]
+        values = [x for x in values if not math.isnan(x)]
+        return sum(values) / len(values) if values else math.nan
+
+    def to_dict(self, count: int | None = None) -> dict:
+        slots = self.slots(count)
+        result = {
+            "step": self.step,
+            "start": slots.start * self.step if slots else None,
+        }
+        for field, values in zip(METRICS_FIELDS, self.values):
+            result[field] = [
+                None if math.isnan(x) else round(x, 2)
+                for x in (values[s % self.size] for s in slots)
+            ]
+        return result
+
+
+class DockerContainerMetrics:
+    """Recent resource usage of a container in every resolution."""
+
+    def __init__(self):
+        self.rings = dict(
+            (step, MetricsRing(step, size)) for step, size in METRICS_RESOLUTIONS
+        )
+        # (timestamp, rx, tx) of the previous sample for the network rates
+        self._previous: tuple[float, int, int] | None = None
+
+    def add(self, timestamp: float, stats: DockerContainerStats) -> None:
+        rx = tx = math.nan
+        if self._previous is not None and timestamp > self._previous[0]:
+            elapsed = timestamp - self._previous[0]
+            rx = (stats.network_rx - self._previous[1]) / elapsed
+            tx = (stats.network_tx - self._previous[2]) / elapsed
+            # the counters start over when the container restarts
+            rx = rx if rx >= 0 else math.nan
+            tx = tx if tx >= 0 else math.nan
+        self._previous = (timestamp, stats.network_rx, stats.network_tx)
+
+        sample = (stats.cpu_percent, float(stats.memory_usage), rx, tx)
+        for ring in self.rings.values():
+            ring.add(timestamp, sample)
+
+    def mean(self, seconds: float) -> tuple[float, ...]:
+        """Mean of every field over the last seconds, from the finest ring."""
+        ring = next(
+            (r for r in self.rings.values() if r.step * r.size >= seconds),
+            self.rings[METRICS_RESOLUTIONS[-1][0]],
+        )
+        count = max(1, math.ceil(seconds / ring.step))
+        return tuple(ring.mean(i, count) for i in range(len(METRICS_FIELDS)))
+
+
+def downsample_stats(
+    stats: DockerContainerStats, metrics: DockerContainerMetrics, seconds: float
+) -> DockerContainerStats:
+    """Replace the CPU and memory of the latest sample with the means."""
+    cpu, memory = metrics.mean(seconds)[:2]
+    if math.isnan(cpu) or math.isnan(memory):
+        return stats
+
+    return replace(
+        stats,
+        cpu_percent=round(cpu, 2),
+        memory_usage=int(memory),
+        memory_percent=(
+            round(memory / stats.memory_limit * 100, 2) if stats.memory_limit else 0.0
+        ),
+    )
@@ -0,0 +1,189 @@
+import typing
+from collections import Counter
+from dataclasses import dataclass, field, replace
+
+SWARM_EVENT_TYPES = ("service", "node")
+# set on the containers of swarm tasks, on the node running them
+SWARM_SERVICE_ID_LABEL = "com.docker.swarm.service.id"
+# only the tasks which should run, not the shut down history of every service
+SWARM_TASK_FILTERS = {"desired-state": ["running"]}
+
+
+@dataclass(kw_only=True)
+class DockerSwarmServiceInfo:
+    id: str
+    name: str
+    image: str
+    mode: typing.Literal["replicated", "global"]
+    desired_replicas: int
+    running_replicas: int = 0
+    update_state: str | None = None
+    update_message: str | None = None
+
+
+@dataclass(kw_only=True)
+class DockerSwarmNodeInfo:
+    id: str
+    hostname: str
+    role: str
+    availability: str
+    state: str
+    address: str | None = None
+    manager_status: str | None = None
+    engine_version: str | None = None
+    running_tasks: int = 0
+
+
+@dataclass(kw_only=True)
+class DockerSwarmTaskInfo:
+    service_id: str
+    node_id: str
+    state: str
+
+
+@dataclass(kw_only=True)
+class DockerSwarmInfo:
+    """Services and nodes of the cluster, keyed by the short (12 chars) ids."""
+
+    services: dict[str, DockerSwarmServiceInfo] = field(default_factory=dict)
+    nodes: dict[str, DockerSwarmNodeInfo] = field(default_factory=dict)
+    # task id -> task, only the tasks with the running desired state
+    tasks: dict[str, DockerSwarmTaskInfo] = field(default_factory=dict)
+
+
+def to_swarm_service(attrs: dict) -> DockerSwarmServiceInfo:
+    spec = attrs.get("Spec", {})
+    mode = spec.get("Mode", {})
+    update = attrs.get("UpdateStatus") or {}
+    image = spec.get("TaskTemplate", {}).get("ContainerSpec", {}).get("Image", "")
+    return DockerSwarmServiceInfo(
+        id=attrs["ID"],
+        name=spec.get("Name", attrs["ID"][:12]),
+        # the image is pinned by digest, the tag is enough
+        image=image.split("@", 1)[0],
+        mode="replicated" if "Replicated" in mode else "global",
+        desired_replicas=(mode.get("Replicated") or {}).get("Replicas", 0),
+        update_state=update.get("State"),
+        update_message=update.get("Message"),
+    )
+
+
+def to_swarm_node(attrs: dict) -> DockerSwarmNodeInfo:
+    description = attrs.get("Description", {})
+    spec = attrs.get("Spec", {})
+    status = attrs.get("Status", {})
+    manager = attrs.get("ManagerStatus")
+    return DockerSwarmNodeInfo(
+        id=attrs["ID"],
+        hostname=description.get("Hostname", attrs["ID"][:12]),
+        role=spec.get("Role", "worker"),
+        availability=spec.get("Availability", "active"),
+        state=status.get("State", "unknown"),
+        address=status.get("Addr"),
+        manager_status=(
+            None
+            if manager is None
+            else "leader"
+            if manager.get("Leader")
+            else manager.get("Reachability")
+        ),
+        engine_version=description.get("Engine", {}).get("EngineVersion"),
+    )
+
+
+def to_swarm_tasks(tasks: list[dict]) -> dict[str, DockerSwarmTaskInfo]:
+    return dict(
+        (
+            x["ID"],
+            DockerSwarmTaskInfo(
+                service_id=x["ServiceID"][:12],
+                node_id=x.get("NodeID", "")[:12],
+                state=x.get("Status", {}).get("State", "new"),
+            ),
+        )
+        for x in tasks
+    )
+
+
+def to_swarm_info(
+    services: list[dict], tasks: list[dict], nodes: list[dict]
+) -> DockerSwarmInfo:
+    """Build the cluster info from the /services, /tasks and /nodes listings."""
+    data = DockerSwarmInfo(
+        services=dict((x["ID"][:12], to_swarm_service(x)) for x in services),
+        nodes=dict((x["ID"][:12], to_swarm_node(x)) for x in nodes),
+        tasks=to_swarm_tasks(tasks),
+    )
+    count_swarm_tasks(data)
+    return data
+
+
+def set_swarm_service(
+    data: DockerSwarmInfo,
+    key: str,
+    service: DockerSwarmServiceInfo | None,
+    tasks: dict[str, DockerSwarmTaskInfo],
+) -> None:
+    """Set or remove (when None) a service and replace its tasks."""
+    data.services.pop(key, None)
+    if service is not None:
+        # the replicas are counted by count_swarm_tasks
+        data.services[key] = service
+
+    for id in [id for id, task in data.tasks.items() if task.service_id == key]:
+        del data.tasks[id]
+    data.tasks.update(tasks)
+
+
+def set_swarm_node(
+    data: DockerSwarmInfo, key: str, node: DockerSwarmNodeInfo | None
+) -> None:
+    """Set or remove (when None) a node."""
+    data.nodes.pop(key, None)
+    if node is not None:
+        data.nodes[key] = node
+
+
+def count_swarm_tasks(data: DockerSwarmInfo) -> None:
+    """Aggregate the tasks to the replicas of the services and the node loads."""
+    running = [x for x in data.tasks.values() if x.state == "running"]
+    service_running = Counter(x.service_id for x in running)
+    service_tasks = Counter(x.service_id for x in data.tasks.values())
+    node_running = Counter(x.node_id for x in running)
+
+    for key, service in data.services.items():
+        counts = {"running_replicas": service_running[key]}
+        if service.mode == "global":
+            # one task on every eligible node
+            counts["desired_replicas"] = service_tasks[key]
+        if any(getattr(service, k) != v for k, v in counts.items()):
+            data.services[key] = replace(service, **counts)
+
+    for key, node in data.nodes.items():
+        if node.running_tasks != node_running[key]:
+            data.nodes[key] = replace(node, running_tasks=node_running[key])
+
+
+def copy_swarm_info(data: DockerSwarmInfo) -> DockerSwarmInfo:
+    """Shallow snapshot, the items are replaced and never changed in place."""
+    return DockerSwarmInfo(
+        services=dict(data.services), nodes=dict(data.nodes), tasks=dict(data.tasks)
+    )
+
+
+def diff_swarm_info(
+    old: DockerSwarmInfo | None, new: DockerSwarmInfo | None
+) -> set[tuple[str, str]] | None:
+    """Return the changed (services or nodes, id) pairs (None is everything)."""
+    if not old or not new:
+        return None
+
+    changed = set()
+    for key in ("services", "nodes"):
+        old_items: dict = getattr(old, key)
+        new_items: dict = getattr(new, key)
+        for id in old_items.keys() | new_items.keys():
+            if old_items.get(id) != new_items.get(id):
+                changed.add((key, id))
+
+    return changed
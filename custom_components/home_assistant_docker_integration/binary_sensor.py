@@ -41,6 +41,9 @@ async def async_setup_entry(
 
 
 class DockerImageSensor(BaseDeviceEntity[DockerImageInfo], BinarySensorEntity):
+    # changes on every disk usage scan
+    _unrecorded_attributes = frozenset({"size_measured_at"})
+
     def __init__(
         self,
         coordinator: DockerDataUpdateCoordinator,
@@ -63,16 +66,22 @@ class DockerImageSensor(BaseDeviceEntity[DockerImageInfo], BinarySensorEntity):
 
     @property
     def extra_state_attributes(self) -> dict[str, str]:
-        dev = self.device
-        return {
-            "tag": dev.tag,
-            "title": dev.title,
-            "revision": dev.rev,
-            "description": dev.description,
-        }
+        return self._cached_attributes(
+            lambda dev: {
+                "tag": dev.tag,
+                "title": dev.title,
+                "revision": dev.rev,
+                "description": dev.description,
+                "size": dev.size,
+                "size_measured_at": dev.size_measured_at,
+            }
+        )
 
 
 class DockerVolumeSensor(BaseDeviceEntity[DockerVolumeInfo], BinarySensorEntity):
+    # changes on every disk usage scan
+    _unrecorded_attributes = frozenset({"size_measured_at"})
+
     def __init__(
         self,
         coordinator: DockerDataUpdateCoordinator,
@@ -95,5 +104,10 @@ class DockerVolumeSensor(BaseDeviceEntity[DockerVolumeInfo], BinarySensorEntity)
 
     @property
     def extra_state_attributes(self) -> dict[str, str]:
-        dev = self.device
-        return {"size": dev.size, "mount": dev.mount_point}
+        return self._cached_attributes(
+            lambda dev: {
+                "size": dev.size,
+                "size_measured_at": dev.size_measured_at,
+                "mount": dev.mount_point,
+            }
+        )
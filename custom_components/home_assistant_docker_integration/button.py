@@ -51,4 +51,8 @@ class DockerContainerRestartButton(BaseDeviceEntity[DockerContainerInfo], Button
         self.id = dev.id
 
     async def async_press(self) -> None:
-        await self.coordinator.api.async_container_restart(self.id)
+        await self.coordinator.async_run_container_action(
+            self.id,
+            "restarting",
+            lambda: self.coordinator.api.async_container_restart(self.id),
+        )
@@ -1,8 +1,97 @@
 from typing import Any
 
-from homeassistant.config_entries import ConfigFlow, ConfigFlowResult
+import voluptuous as vol
+from homeassistant.config_entries import (
+    ConfigEntry,
+    ConfigFlow,
+    ConfigFlowResult,
+    OptionsFlow,
+)
+from homeassistant.core import callback
 
-from .const import DEFAULT_NAME, DOMAIN
+from .const import (
+    BACKEND_DOCKER_PY,
+    BACKEND_ENGINE,
+    CONF_BACKEND,
+    CONF_CERT_PATH,
+    CONF_DISK_USAGE_INTERVAL,
+    CONF_EVENT_STREAM,
+    CONF_FAST_WORKERS,
+    CONF_HOST,
+    CONF_PRE_PULL,
+    CONF_PRE_PULL_CONCURRENCY,
+    CONF_PRE_PULL_DAILY_BUDGET,
+    CONF_PRE_PULL_WINDOW,
+    CONF_SLOW_WORKERS,
+    CONF_STATS_INTERVAL,
+    CONF_TLS_VERIFY,
+    DEFAULT_BACKEND,
+    DEFAULT_DISK_USAGE_INTERVAL,
+    DEFAULT_EVENT_STREAM,
+    DEFAULT_FAST_WORKERS,
+    DEFAULT_HOST,
+    DEFAULT_PRE_PULL,
+    DEFAULT_PRE_PULL_CONCURRENCY,
+    DEFAULT_PRE_PULL_DAILY_BUDGET,
+    DEFAULT_PRE_PULL_WINDOW,
+    DEFAULT_NAME,
+    DEFAULT_SLOW_WORKERS,
+    DEFAULT_STATS_INTERVAL,
+    DEFAULT_TLS_VERIFY,
+    DOMAIN,
+)
+
+CONF_NAME = "name"
+
+USER_SCHEMA = vol.Schema(
+    {
+        vol.Required(CONF_NAME, default=DEFAULT_NAME): str,
+        # unix:///var/run/docker.sock, tcp://host:2376 or ssh://user@host
+        vol.Required(CONF_HOST, default=DEFAULT_HOST): vol.Match(
+            r"^(unix|tcp|ssh)://.+"
+        ),
+        vol.Optional(CONF_CERT_PATH): str,
+        vol.Optional(CONF_TLS_VERIFY, default=DEFAULT_TLS_VERIFY): bool,
+    }
+)
+
+OPTIONS_SCHEMA = vol.Schema(
+    {
+        # docker_py is the fallback running the blocking docker client in threads
+        vol.Optional(CONF_BACKEND, default=DEFAULT_BACKEND): vol.In(
+            [BACKEND_ENGINE, BACKEND_DOCKER_PY]
+        ),
+        vol.Optional(CONF_EVENT_STREAM, default=DEFAULT_EVENT_STREAM): bool,
+        # minutes between the size computing disk usage scans
+        vol.Optional(
+            CONF_DISK_USAGE_INTERVAL, default=DEFAULT_DISK_USAGE_INTERVAL
+        ): vol.All(vol.Coerce(int), vol.Range(min=1)),
+        # download available updates in the background, install only recreates
+        vol.Optional(CONF_PRE_PULL, default=DEFAULT_PRE_PULL): bool,
+        vol.Optional(
+            CONF_PRE_PULL_CONCURRENCY, default=DEFAULT_PRE_PULL_CONCURRENCY
+        ): vol.All(vol.Coerce(int), vol.Range(min=1)),
+        # MB downloaded by pre-pulls per 24 hours, 0 is unlimited
+        vol.Optional(
+            CONF_PRE_PULL_DAILY_BUDGET, default=DEFAULT_PRE_PULL_DAILY_BUDGET
+        ): vol.All(vol.Coerce(int), vol.Range(min=0)),
+        # local time window like 01:00-05:00, empty is any time
+        vol.Optional(CONF_PRE_PULL_WINDOW, default=DEFAULT_PRE_PULL_WINDOW): vol.Any(
+            "", vol.Match(r"^\d{2}:\d{2}-\d{2}:\d{2}$")
+        ),
+        # seconds between the container resource sensor updates
+        vol.Optional(CONF_STATS_INTERVAL, default=DEFAULT_STATS_INTERVAL): vol.All(
+            vol.Coerce(int), vol.Range(min=1)
+        ),
+        # concurrent docker calls of the listing and of the mutating lane
+        vol.Optional(CONF_FAST_WORKERS, default=DEFAULT_FAST_WORKERS): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=32)
+        ),
+        vol.Optional(CONF_SLOW_WORKERS, default=DEFAULT_SLOW_WORKERS): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=32)
+        ),
+    }
+)
 
 
 class ConfigFlow(ConfigFlow, domain=DOMAIN):
@@ -10,13 +99,45 @@ class ConfigFlow(ConfigFlow, domain=DOMAIN):
 
     VERSION = 1
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry: ConfigEntry) -> OptionsFlow:
+        return DockerOptionsFlow()
+
     async def async_step_user(self, user_input=None):
-        """Handle a flow initialized by the user."""
+        """Handle a flow initialized by the user, one entry per docker host."""
         if user_input is not None:
-            return self.async_create_entry(title=DEFAULT_NAME, data={})
+            user_input = USER_SCHEMA(user_input)
+            # the entries of the single host versions have no host (and unique id)
+            for entry in self._async_current_entries():
+                if entry.data.get(CONF_HOST, DEFAULT_HOST) == user_input[CONF_HOST]:
+                    return self.async_abort(reason="already_configured")
+
+            await self.async_set_unique_id(user_input[CONF_HOST])
+            return self.async_create_entry(
+                title=user_input.pop(CONF_NAME), data=user_input
+            )
 
-        return self.async_show_form(step_id="user")
+        return self.async_show_form(step_id="user", data_schema=USER_SCHEMA)
 
     async def async_step_import(self, import_data: dict[str, Any]) -> ConfigFlowResult:
-        """Handle import from configuration.yaml."""
-        return await self.async_step_user(import_data)
+        """Handle import from configuration.yaml, the whole config is passed."""
+        known = (CONF_NAME, CONF_HOST, CONF_CERT_PATH, CONF_TLS_VERIFY)
+        return await self.async_step_user(
+            dict((key, value) for key, value in import_data.items() if key in known)
+        )
+
+
+class DockerOptionsFlow(OptionsFlow):
+    """Options flow for Docker."""
+
+    async def async_step_init(self, user_input=None) -> ConfigFlowResult:
+        if user_input is not None:
+            return self.async_create_entry(data=user_input)
+
+        return self.async_show_form(
+            step_id="init",
+            data_schema=self.add_suggested_values_to_schema(
+                OPTIONS_SCHEMA, self.config_entry.options
+            ),
+        )
@@ -7,4 +7,35 @@ DEFAULT_NAME = "Docker Integration"
 FRONTEND_URL = "/hacsfiles/" + DOMAIN
 DATA_KEY_RESOURCE_REGISTRY = "resource_registry"
 
+CONF_HOST = "host"
+DEFAULT_HOST = "unix:///var/run/docker.sock"
+# directory with the ca.pem, cert.pem and key.pem files, like DOCKER_CERT_PATH
+CONF_CERT_PATH = "cert_path"
+CONF_TLS_VERIFY = "tls_verify"
+DEFAULT_TLS_VERIFY = True
+
+CONF_BACKEND = "backend"
+BACKEND_ENGINE = "engine"
+BACKEND_DOCKER_PY = "docker_py"
+DEFAULT_BACKEND = BACKEND_ENGINE
+CONF_EVENT_STREAM = "event_stream"
+DEFAULT_EVENT_STREAM = True
+CONF_DISK_USAGE_INTERVAL = "disk_usage_interval"
+DEFAULT_DISK_USAGE_INTERVAL = 30
+CONF_PRE_PULL = "pre_pull"
+DEFAULT_PRE_PULL = False
+CONF_PRE_PULL_CONCURRENCY = "pre_pull_concurrency"
+DEFAULT_PRE_PULL_CONCURRENCY = 1
+CONF_PRE_PULL_DAILY_BUDGET = "pre_pull_daily_budget"
+DEFAULT_PRE_PULL_DAILY_BUDGET = 0
+CONF_PRE_PULL_WINDOW = "pre_pull_window"
+DEFAULT_PRE_PULL_WINDOW = ""
+CONF_STATS_INTERVAL = "stats_interval"
+DEFAULT_STATS_INTERVAL = 10
+# own worker lanes: fast listing and inspecting, slow pulls, stops and prunes
+CONF_FAST_WORKERS = "fast_workers"
+DEFAULT_FAST_WORKERS = 4
+CONF_SLOW_WORKERS = "slow_workers"
+DEFAULT_SLOW_WORKERS = 4
+
 _LOGGER = logging.getLogger(__name__)
@@ -1,46 +1,224 @@
+import asyncio
+import random
 import typing
-from datetime import timedelta
+from collections import deque
+from dataclasses import asdict, replace
+from datetime import datetime, time, timedelta, timezone
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import ConfigEntryNotReady
 from homeassistant.helpers import device_registry as dr
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.helpers.storage import Store
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
+from homeassistant.util import dt as dt_util
 
-from ._docker_api import DockerApi, DockerHostInfo, DockerImageUpdateInfo
-from .const import _LOGGER, DOMAIN
+from ._docker_api import (
+    DockerApi,
+    DockerChangeSet,
+    DockerContainerStats,
+    DockerDiskUsage,
+    DockerEventStream,
+    DockerHostInfo,
+    DockerImageInfo,
+    DockerImageUpdateInfo,
+    apply_disk_usage,
+    build_image_index,
+    diff_host_info,
+    normalize_image_ref,
+    parse_image_name,
+    to_container_stats,
+    update_usage,
+)
+from ._docker_engine import DockerEngineApi
+from ._docker_jobs import DockerJobManager
+from ._docker_swarm import (
+    SWARM_EVENT_TYPES,
+    SWARM_SERVICE_ID_LABEL,
+    DockerSwarmInfo,
+    copy_swarm_info,
+    count_swarm_tasks,
+    diff_swarm_info,
+    set_swarm_node,
+    set_swarm_service,
+)
+from ._docker_metrics import DockerContainerMetrics, downsample_stats
+from .const import (
+    _LOGGER,
+    BACKEND_DOCKER_PY,
+    CONF_BACKEND,
+    CONF_CERT_PATH,
+    CONF_DISK_USAGE_INTERVAL,
+    CONF_EVENT_STREAM,
+    CONF_FAST_WORKERS,
+    CONF_HOST,
+    CONF_PRE_PULL,
+    CONF_PRE_PULL_CONCURRENCY,
+    CONF_PRE_PULL_DAILY_BUDGET,
+    CONF_PRE_PULL_WINDOW,
+    CONF_SLOW_WORKERS,
+    CONF_STATS_INTERVAL,
+    CONF_TLS_VERIFY,
+    DEFAULT_BACKEND,
+    DEFAULT_DISK_USAGE_INTERVAL,
+    DEFAULT_EVENT_STREAM,
+    DEFAULT_FAST_WORKERS,
+    DEFAULT_HOST,
+    DEFAULT_PRE_PULL,
+    DEFAULT_PRE_PULL_CONCURRENCY,
+    DEFAULT_PRE_PULL_DAILY_BUDGET,
+    DEFAULT_PRE_PULL_WINDOW,
+    DEFAULT_SLOW_WORKERS,
+    DEFAULT_STATS_INTERVAL,
+    DEFAULT_TLS_VERIFY,
+    DOMAIN,
+)
 
-SCAN_INTERVAL = timedelta(seconds=5)
+# polling without the event stream, fast only while a dashboard is watching
+IDLE_SCAN_INTERVAL = timedelta(seconds=30)
+WATCH_SCAN_INTERVAL = timedelta(milliseconds=500)
+RECONCILE_INTERVAL = timedelta(minutes=5)
+# with the event stream, a watching dashboard gets a fresh state on subscribe
+# and what the events do not carry (the uptime status) reconciled this often
+WATCH_RECONCILE_INTERVAL = timedelta(seconds=10)
+UPDATE_CHECK_INTERVAL = timedelta(hours=6)
+UPDATE_CHECK_TICK = timedelta(minutes=10)
+UPDATE_CHECK_RETRY = timedelta(minutes=30)
+UPDATE_CHECK_JITTER = 0.1
+MAX_CONCURRENT_CHECKS = 8
+MAX_CONCURRENT_REGISTRY_CHECKS = 2
+STORAGE_VERSION = 1
+STORAGE_SAVE_DELAY = 30
+EVENTS_MIN_RECONNECT_DELAY = 1
+EVENTS_MAX_RECONNECT_DELAY = 60
+# a rolling update emits a burst of events, refetched once after the burst
+SWARM_EVENT_DELAY = 1
+
+CONTAINER_EVENT_ACTIONS = {
+    "create",
+    "start",
+    "restart",
+    "die",
+    "stop",
+    "kill",
+    "pause",
+    "unpause",
+    "rename",
+    "update",
+    "health_status",
+    "destroy",
+}
+IMAGE_EVENT_ACTIONS = {"pull", "tag", "untag", "load", "import", "delete"}
+VOLUME_EVENT_ACTIONS = {"create", "destroy"}
+NETWORK_EVENT_ACTIONS = {"connect", "disconnect"}
 
 DOCKER_DATA_KEYS = typing.Literal["containers", "images", "volumes"]
+SWARM_DATA_KEYS = typing.Literal["services", "nodes"]
 
 type DockerConfigEntry = ConfigEntry[ServiceController]
 
 
+def in_time_window(window: str, now: time) -> bool:
+    """Check a local time against a HH:MM-HH:MM window (may pass midnight)."""
+    if not window:
+        return True
+
+    start, end = (time.fromisoformat(x) for x in window.split("-"))
+    if start <= end:
+        return start <= now < end
+
+    return now >= start or now < end
+
+
+def create_api(
+    backend: str,
+    host: str = DEFAULT_HOST,
+    cert_path: str | None = None,
+    tls_verify: bool = DEFAULT_TLS_VERIFY,
+    fast_workers: int = DEFAULT_FAST_WORKERS,
+    slow_workers: int = DEFAULT_SLOW_WORKERS,
+) -> DockerApi:
+    """Create the docker api for the configured backend and host."""
+    # the engine client speaks http only, ssh:// needs docker-py
+    if backend == BACKEND_DOCKER_PY or host.startswith("ssh://"):
+        return DockerApi(host, cert_path, tls_verify, fast_workers, slow_workers)
+
+    return DockerEngineApi(host, cert_path, tls_verify, fast_workers, slow_workers)
+
+
+def get_entry_scope(entry: DockerConfigEntry) -> str:
+    """
+    Prefix of the unique and device ids of a host, images and volumes have
+    the same ids on every host. The local default host keeps the plain ids.
+    """
+    if entry.data.get(CONF_HOST, DEFAULT_HOST) == DEFAULT_HOST:
+        return ""
+
+    return f"{entry.entry_id[-6:].lower()}_"
+
+
 class ServiceController:
     def __init__(self, hass: HomeAssistant, entry: DockerConfigEntry):
-        self.api = DockerApi()
+        self.entry_id = entry.entry_id
+        self.host: str = entry.data.get(CONF_HOST, DEFAULT_HOST)
+        self.api = create_api(
+            entry.options.get(CONF_BACKEND, DEFAULT_BACKEND),
+            self.host,
+            entry.data.get(CONF_CERT_PATH),
+            entry.data.get(CONF_TLS_VERIFY, DEFAULT_TLS_VERIFY),
+            entry.options.get(CONF_FAST_WORKERS, DEFAULT_FAST_WORKERS),
+            entry.options.get(CONF_SLOW_WORKERS, DEFAULT_SLOW_WORKERS),
+        )
         self.data_coordinator = DockerDataUpdateCoordinator(hass, entry)
         self.update_coordinator = DockerContainerVersionUpdateCoordinator(hass, entry)
-        self.name = "Docker Host"
+        self.stats_coordinator = DockerContainerStatsCoordinator(hass, entry)
+        self.swarm_coordinator = DockerSwarmCoordinator(hass, entry)
+        self.name = "Docker Host" if self.host == DEFAULT_HOST else entry.title
+        self.jobs = DockerJobManager(
+            self.name,
+            lambda coro, name: entry.async_create_background_task(
+                hass, coro, name=f"{DOMAIN} {name}"
+            ),
+        )
 
     @property
     def version(self) -> str:
         return self.data_coordinator.data.version
 
     async def async_initialize(self):
-        await self.api.async_connect()
-        await self.data_coordinator.async_config_entry_first_refresh()
-        await self.update_coordinator.async_config_entry_first_refresh()
+        try:
+            await self.api.async_connect()
+            await self.data_coordinator.async_config_entry_first_refresh()
+        except Exception as e:
+            # retried by home assistant, without holding back the other hosts
+            await self.api.disconnect()
+            if isinstance(e, ConfigEntryNotReady):
+                raise
+            raise ConfigEntryNotReady(f"Failed to connect to {self.host}: {e}") from e
+        await self.update_coordinator.async_load()
+        self.update_coordinator.async_start()
+        self.data_coordinator.async_start_event_stream()
+        self.data_coordinator.async_start_disk_usage_scan()
+        self.stats_coordinator.async_start()
+        if self.data_coordinator.data.swarm_manager:
+            # the entities of the services and nodes are added on setup
+            await self.swarm_coordinator.async_refresh()
 
     async def async_shutdown(self):
+        self.jobs.shutdown()
         await self.data_coordinator.async_shutdown()
         await self.update_coordinator.async_shutdown()
+        await self.stats_coordinator.async_shutdown()
+        await self.swarm_coordinator.async_shutdown()
         await self.api.disconnect()
 
         # clean up because: self.data_coordinator.config_entry.runtime_data == self
         self.data_coordinator = None
         self.update_coordinator = None
+        self.stats_coordinator = None
+        self.swarm_coordinator = None
 
 
 class DockerDataUpdateCoordinator(DataUpdateCoordinator[DockerHostInfo]):
@@ -52,11 +230,30 @@ class DockerDataUpdateCoordinator(DataUpdateCoordinator[DockerHostInfo]):
             _LOGGER,
             config_entry=entry,
             name=DOMAIN,
-            update_interval=SCAN_INTERVAL,
+            update_interval=IDLE_SCAN_INTERVAL,
         )
 
         self.tracker = DeviceTracker(hass, entry.entry_id)
+        self.scope = get_entry_scope(entry)
         self.data: DockerHostInfo = {}
+        self.event_stream: bool = entry.options.get(
+            CONF_EVENT_STREAM, DEFAULT_EVENT_STREAM
+        )
+        self._events_task: asyncio.Task | None = None
+        self._events_live = False
+        self._watchers = 0
+        self.disk_usage: DockerDiskUsage | None = None
+        self.disk_usage_interval = timedelta(
+            minutes=entry.options.get(
+                CONF_DISK_USAGE_INTERVAL, DEFAULT_DISK_USAGE_INTERVAL
+            )
+        )
+        self._disk_usage_lock = asyncio.Lock()
+        self._changed: DockerChangeSet | None = None
+        self._swarm_role_changed = False
+        # short id -> the running targeted refresh, and those asked again meanwhile
+        self._container_refreshes: dict[str, asyncio.Task] = {}
+        self._container_refreshes_again: set[str] = set()
 
     @property
     def api(self) -> DockerApi:
@@ -65,7 +262,13 @@ class DockerDataUpdateCoordinator(DataUpdateCoordinator[DockerHostInfo]):
     async def _async_update_data(self) -> DockerHostInfo:
         self.tracker.reset_added_devices()
 
-        data = await self.api.async_fetch_data()
+        data = await self.api.async_fetch_data(self.data or None)
+        apply_disk_usage(data, self.disk_usage)
+
+        # after a failed update all entities are notified (availability)
+        self._changed = (
+            diff_host_info(self.data, data) if self.last_update_success else None
+        )
 
         self.tracker.set_device_ids(
             set(data.containers.keys()),
@@ -73,8 +276,284 @@ class DockerDataUpdateCoordinator(DataUpdateCoordinator[DockerHostInfo]):
             set(data.images.keys()),
         )
 
+        # promoted or demoted, the swarm is refreshed once the new data is set
+        self._swarm_role_changed = bool(
+            self.data and data.swarm_manager != self.data.swarm_manager
+        )
+
         return data
 
+    @callback
+    def async_start_disk_usage_scan(self) -> None:
+        """Measure the sizes now and then on the slow disk usage interval."""
+        self.config_entry.async_on_unload(
+            async_track_time_interval(
+                self.hass,
+                self._async_scheduled_disk_usage_refresh,
+                self.disk_usage_interval,
+                cancel_on_shutdown=True,
+            )
+        )
+        self.config_entry.async_create_background_task(
+            self.hass, self.async_refresh_disk_usage(), name=f"{DOMAIN} disk usage"
+        )
+
+    async def _async_scheduled_disk_usage_refresh(self, _now) -> None:
+        # skip the tick when the previous (or an on demand) scan still runs
+        if not self._disk_usage_lock.locked():
+            await self.async_refresh_disk_usage()
+
+    async def async_refresh_disk_usage(self) -> None:
+        """Run the size computing disk usage scan and publish the sizes."""
+        async with self._disk_usage_lock:
+            try:
+                self.disk_usage = await self.api.async_fetch_disk_usage()
+            except Exception as e:
+                _LOGGER.warning(f"Failed to fetch docker disk usage: {e}")
+                return
+
+        if self.data:
+            self._changed = apply_disk_usage(self.data, self.disk_usage)
+            self.async_update_listeners()
+
+    @callback
+    def async_add_watcher(self) -> typing.Callable[[], None]:
+        """Poll at the watch interval until the returned callback is called."""
+        self._watchers += 1
+        self._async_apply_update_interval()
+
+        @callback
+        def remove_watcher() -> None:
+            self._watchers -= 1
+            self._async_apply_update_interval()
+
+        return remove_watcher
+
+    @callback
+    def _async_apply_update_interval(self) -> None:
+        if self._events_live:
+            # the poll is only a reconciliation while the stream is live
+            interval = (
+                WATCH_RECONCILE_INTERVAL if self._watchers else RECONCILE_INTERVAL
+            )
+        elif self._watchers:
+            interval = WATCH_SCAN_INTERVAL
+        else:
+            interval = IDLE_SCAN_INTERVAL
+
+        if interval == self.update_interval:
+            return
+
+        speed_up = interval < self.update_interval
+        self.update_interval = interval
+        if speed_up:
+            # the scheduled refresh may be far away, refreshing reschedules
+            self.config_entry.async_create_background_task(
+                self.hass, self.async_refresh(), name=f"{DOMAIN} refresh"
+            )
+
+    @callback
+    def async_start_event_stream(self) -> None:
+        """Follow the docker events, when enabled, instead of fast polling."""
+        if self.event_stream and self._events_task is None:
+            self._events_task = self.config_entry.async_create_background_task(
+                self.hass, self._async_watch_events(), name=f"{DOMAIN} events"
+            )
+
+    async def async_shutdown(self) -> None:
+        if self._events_task is not None:
+            self._events_task.cancel()
+            self._events_task = None
+
+        await super().async_shutdown()
+
+    async def _async_watch_events(self) -> None:
+        delay = EVENTS_MIN_RECONNECT_DELAY
+        while True:
+            try:
+                events = await self.api.async_subscribe_events()
+            except Exception as e:
+                _LOGGER.warning(f"Failed to subscribe to docker events: {e}")
+            else:
+                delay = EVENTS_MIN_RECONNECT_DELAY
+                await self._async_follow_events(events)
+                _LOGGER.warning("Docker events stream disconnected")
+
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, EVENTS_MAX_RECONNECT_DELAY)
+
+    async def _async_follow_events(self, events: DockerEventStream) -> None:
+        self._events_live = True
+        self._async_apply_update_interval()
+        try:
+            # full resync because the events before the subscription are lost
+            await self.async_refresh()
+            async for event in events:
+                try:
+                    await self._async_handle_event(event)
+                except Exception as e:
+                    _LOGGER.warning(f"Failed to apply docker event {event}: {e}")
+        finally:
+            events.close()
+            self._events_live = False
+            self._async_apply_update_interval()
+
+    async def _async_handle_event(self, event: dict) -> None:
+        """Apply a single docker event to the cached host info."""
+        kind = event.get("Type")
+        action = event.get("Action", "").split(":", 1)[0]
+        actor = event.get("Actor", {})
+        id = actor.get("ID", "")
+
+        if kind in SWARM_EVENT_TYPES or SWARM_SERVICE_ID_LABEL in actor.get(
+            "Attributes", {}
+        ):
+            self.config_entry.runtime_data.swarm_coordinator.async_handle_event(event)
+
+        if kind == "network" and action in NETWORK_EVENT_ACTIONS:
+            kind = "container"
+            action = "update"
+            id = actor.get("Attributes", {}).get("container", "")
+
+        if kind == "container" and action in CONTAINER_EVENT_ACTIONS:
+            info = None
+            if action != "destroy":
+                info = await self.api.async_fetch_container(
+                    id, self.data.containers.get(id[:12])
+                )
+            key = info.short_id if info else id[:12]
+            changed = _set_item(self.data.containers, key, info, "containers")
+        elif kind == "image" and action in IMAGE_EVENT_ACTIONS:
+            info = None
+            if action != "delete":
+                info = await self.api.async_fetch_image(id)
+            key = info.id[:12] if info else id.removeprefix("sha256:")[:12]
+            changed = _set_item(self.data.images, key, info, "images")
+        elif kind == "volume" and action in VOLUME_EVENT_ACTIONS:
+            info = None
+            if action != "destroy":
+                info = await self.api.async_fetch_volume(id)
+            changed = _set_item(self.data.volumes, id[:26], info, "volumes")
+        else:
+            return
+
+        self._async_publish_items(changed)
+
+    @callback
+    def _async_publish_items(self, changed: DockerChangeSet) -> None:
+        """Notify the patched items with the usage and the devices recalculated."""
+        data = self.data
+        changed |= update_usage(data)
+        changed |= apply_disk_usage(data, self.disk_usage)
+
+        self.tracker.reset_added_devices()
+        self.tracker.set_device_ids(
+            set(data.containers.keys()),
+            set(data.volumes.keys()),
+            set(data.images.keys()),
+        )
+
+        # notify without async_set_updated_data to keep the reconcile poll scheduled
+        self._changed = changed
+        self.async_update_listeners()
+
+    async def async_run_container_action(
+        self,
+        id: str,
+        state: str,
+        action: typing.Callable[[], typing.Awaitable],
+    ) -> None:
+        """
+        Show the transitional state (starting, stopping, ...) while the action
+        runs, then inspect only this container instead of the whole host.
+        """
+        key = id[:12]
+        info = self.data.containers.get(key)
+        if info is not None and info.state != state:
+            # optimistic, the counters of the host wait for the inspect
+            self.data.containers[key] = replace(info, state=state)
+            self._changed = {("containers", key)}
+            self.async_update_listeners()
+
+        try:
+            await action()
+        finally:
+            await self.async_refresh_container(key)
+
+    async def async_refresh_container(self, id: str) -> None:
+        """
+        Inspect a single container and notify only its entities. A request
+        while the container is inspected is coalesced into one more inspect
+        after it, that one sees the state after the action of the request.
+        """
+        key = id[:12]
+        task = self._container_refreshes.get(key)
+        if task is None:
+            task = self.config_entry.async_create_background_task(
+                self.hass,
+                self._async_refresh_container(key),
+                name=f"{DOMAIN} refresh container {key}",
+            )
+            # started eagerly, the inspect may have finished already
+            if not task.done():
+                self._container_refreshes[key] = task
+        else:
+            self._container_refreshes_again.add(key)
+
+        await asyncio.shield(task)
+
+    async def _async_refresh_container(self, key: str) -> None:
+        try:
+            while True:
+                self._container_refreshes_again.discard(key)
+                previous = self.data.containers.get(key)
+                try:
+                    info = await self.api.async_fetch_container(
+                        previous.id if previous else key, previous
+                    )
+                except Exception as e:
+                    # the next poll replaces the transitional state
+                    _LOGGER.warning(f"Failed to refresh container {key}: {e}")
+                    return
+
+                # skip the result when it may predate the action of a new request
+                if key not in self._container_refreshes_again:
+                    self._async_publish_items(
+                        _set_item(self.data.containers, key, info, "containers")
+                    )
+                    return
+        finally:
+            self._container_refreshes.pop(key, None)
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Update the global listeners and only those of the changed items."""
+        if self._swarm_role_changed:
+            # the swarm coordinator reads the role from the stored data
+            self._swarm_role_changed = False
+            self.config_entry.async_create_background_task(
+                self.hass,
+                self.config_entry.runtime_data.swarm_coordinator.async_refresh(),
+                name=f"{DOMAIN} swarm role",
+            )
+
+        changed = self._changed if self.last_update_success else None
+        self._changed = None
+        for update_callback, context in list(self._listeners.values()):
+            if context is None or changed is None or context in changed:
+                update_callback()
+
+
+def _set_item[TItem](
+    items: dict[str, TItem], key: str, item: TItem | None, name: DOCKER_DATA_KEYS
+) -> DockerChangeSet:
+    """Set or remove (when None) a cached item and return what changed."""
+    old = items.pop(key, None)
+    if item is not None:
+        items[key] = item
+
+    return set() if old == item else {(name, key)}
+
 
 class DockerContainerVersionUpdateCoordinator(DataUpdateCoordinator):
     """Check for docker container/image update"""
@@ -85,30 +564,504 @@ class DockerContainerVersionUpdateCoordinator(DataUpdateCoordinator):
             _LOGGER,
             config_entry=entry,
             name="docker_integration_container_versions",
-            update_interval=timedelta(hours=6),
+            update_interval=UPDATE_CHECK_TICK,
         )
 
         self.data: dict[str, DockerImageUpdateInfo] = {}
+        self.next_check: dict[str, datetime] = {}
+        self._semaphore = asyncio.Semaphore(MAX_CONCURRENT_CHECKS)
+        self._registry_semaphores: dict[str, asyncio.Semaphore] = {}
+        self._store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}")
+        self.pre_pull: bool = entry.options.get(CONF_PRE_PULL, DEFAULT_PRE_PULL)
+        self.pre_pull_window: str = entry.options.get(
+            CONF_PRE_PULL_WINDOW, DEFAULT_PRE_PULL_WINDOW
+        )
+        self.pre_pull_budget = (
+            entry.options.get(CONF_PRE_PULL_DAILY_BUDGET, DEFAULT_PRE_PULL_DAILY_BUDGET)
+            * 1024
+            * 1024
+        )
+        self._pre_pull_semaphore = asyncio.Semaphore(
+            entry.options.get(CONF_PRE_PULL_CONCURRENCY, DEFAULT_PRE_PULL_CONCURRENCY)
+        )
+        self._pre_pulling: set[str] = set()
+        # image name -> new version of the last pre-pull, pulled or failed
+        self._pre_pull_attempts: dict[str, str] = {}
+        # (finished at, bytes) of the pre-pulls in the last 24 hours
+        self._pulled: deque[tuple[datetime, int]] = deque()
+        # estimated bytes of the running pre-pulls
+        self._pre_pull_reserved = 0
 
     @property
     def api(self) -> DockerApi:
         return self.config_entry.runtime_data.api
 
+    async def async_load(self):
+        """Restore the registry digest cache and the last check results."""
+        stored = await self._store.async_load() or {}
+        self.api.http.digests = stored.get("digests", {})
+        self.data = dict(
+            (image, DockerImageUpdateInfo(**version))
+            for image, version in stored.get("results", {}).items()
+        )
+        self.next_check = dict(
+            (image, datetime.fromisoformat(at))
+            for image, at in stored.get("next_check", {}).items()
+        )
+
+    @callback
+    def async_start(self):
+        """Check the stale images in the background, serving the restored results."""
+        self.config_entry.async_create_background_task(
+            self.hass, self.async_refresh(), name=f"{DOMAIN} update check"
+        )
+
+    @callback
+    def _data_to_store(self) -> dict:
+        return {
+            "digests": self.api.http.digests,
+            "results": dict(
+                (image, asdict(version)) for image, version in self.data.items()
+            ),
+            "next_check": dict(
+                (image, at.isoformat()) for image, at in self.next_check.items()
+            ),
+        }
+
     async def _async_update_data(self) -> dict[str, DockerImageUpdateInfo]:
-        """Fetch data."""
-        api = self.api
+        """Check the images which are due, keep the results of the others."""
         data: DockerHostInfo = self.config_entry.runtime_data.data_coordinator.data
-        images = dict[str, DockerImageUpdateInfo]()
-        image_names = set(
-            [c.image_name for c in data.containers.values() if c.state == "running"]
+        # image name -> id of the image a running container was created from
+        image_names = dict(
+            (c.image_name, c.image_id)
+            for c in data.containers.values()
+            if c.state == "running"
+        )
+        now = datetime.now(timezone.utc)
+        due = [i for i in image_names if self.next_check.get(i, now) <= now]
+
+        images = dict(
+            (image, version)
+            for image, version in (self.data or {}).items()
+            if image in image_names
         )
-        for image in image_names:
-            version = await api.async_images_check_update(image)
+        # the local digests and labels come from the image listing
+        index = build_image_index(data.images)
+        checks = (
+            self._async_check_image(
+                i,
+                index.get(f"sha256:{image_names[i]}")
+                or index.get(normalize_image_ref(i)),
+            )
+            for i in due
+        )
+        for image, version in zip(due, await asyncio.gather(*checks)):
             if version:
                 images[image] = version
 
+        for image, version in images.items():
+            # a pulled newer image moves the tag away from the running one
+            tagged = index.get(normalize_image_ref(image))
+            pre_pulled = (
+                version.has_newer
+                and tagged is not None
+                and tagged.id != image_names[image]
+            )
+            if version.pre_pulled != pre_pulled:
+                images[image] = replace(version, pre_pulled=pre_pulled)
+
+        for image in self.next_check.keys() - image_names.keys():
+            del self.next_check[image]
+        for image in self._pre_pull_attempts.keys() - image_names.keys():
+            del self._pre_pull_attempts[image]
+
+        self._store.async_delay_save(self._data_to_store, STORAGE_SAVE_DELAY)
+        self._async_schedule_pre_pulls(images)
+
         return images
 
+    @callback
+    def _async_schedule_pre_pulls(self, images: dict[str, DockerImageUpdateInfo]):
+        if not self.pre_pull or not in_time_window(
+            self.pre_pull_window, dt_util.now().time()
+        ):
+            return
+
+        for image, version in images.items():
+            # only a known remote version, and each one once (also when it failed)
+            if (
+                version.has_newer
+                and version.new_ver
+                and not version.pre_pulled
+                and image not in self._pre_pulling
+                and self._pre_pull_attempts.get(image) != version.new_ver
+            ):
+                self._pre_pulling.add(image)
+                self.config_entry.async_create_background_task(
+                    self.hass, self._async_pre_pull(image), name=f"{DOMAIN} pre-pull"
+                )
+
+    @callback
+    def async_forget_image(self, image: str) -> None:
+        """Drop the result of an installed update, the image is checked again."""
+        self.data.pop(image, None)
+        self.next_check.pop(image, None)
+        self._pre_pull_attempts.pop(image, None)
+        self.async_update_listeners()
+        self.config_entry.async_create_background_task(
+            self.hass, self.async_request_refresh(), name=f"{DOMAIN} update check"
+        )
+
+    def _pre_pull_budget_left(self) -> int | None:
+        """Bytes left of the daily budget for a new pre-pull, None without one."""
+        if not self.pre_pull_budget:
+            return None
+
+        day_ago = datetime.now(timezone.utc) - timedelta(days=1)
+        while self._pulled and self._pulled[0][0] < day_ago:
+            self._pulled.popleft()
+
+        used = sum(x[1] for x in self._pulled) + self._pre_pull_reserved
+        return max(self.pre_pull_budget - used, 0)
+
+    async def _async_fits_pre_pull_budget(self, image: str) -> int:
+        """
+        The estimated bytes of the pull when it fits the budget left, else -1.
+        Without an estimate only a used up budget holds the pull back.
+        """
+        left = self._pre_pull_budget_left()
+        if left is None:
+            return 0
+        if left == 0:
+            return -1
+
+        platform = self.config_entry.runtime_data.data_coordinator.data.platform
+        size = await self.api.http.get_registry_image_size(image, platform)
+        if size is None:
+            return 0
+        # the budget may have been reserved by another pre-pull meanwhile
+        return size if size <= self._pre_pull_budget_left() else -1
+
+    async def _async_pre_pull(self, image: str):
+        """Download a newer image in the background within the pre-pull budget."""
+        try:
+            async with self._pre_pull_semaphore:
+                # the window or the budget may be over while waiting for a slot
+                if not in_time_window(self.pre_pull_window, dt_util.now().time()):
+                    _LOGGER.debug(f"Postponed pre-pull of {image}")
+                    return
+                estimate = await self._async_fits_pre_pull_budget(image)
+                if estimate < 0:
+                    _LOGGER.debug(f"Postponed pre-pull of {image}, over the budget")
+                    return
+
+                _LOGGER.debug(f"Pre-pulling {image}")
+                if image in self.data:
+                    self._pre_pull_attempts[image] = self.data[image].new_ver
+                self._pre_pull_reserved += estimate
+                try:
+                    progress = await self.api.async_image_pull(image)
+                finally:
+                    self._pre_pull_reserved -= estimate
+                self._pulled.append((datetime.now(timezone.utc), progress.downloaded))
+        except Exception as e:
+            _LOGGER.warning(f"Failed to pre-pull {image}: {e}")
+            return
+        finally:
+            self._pre_pulling.discard(image)
+
+        if image in self.data:
+            self.data[image] = replace(self.data[image], pre_pulled=True)
+            self.async_update_listeners()
+
+    async def _async_check_image(
+        self, image: str, local_image: DockerImageInfo | None
+    ) -> DockerImageUpdateInfo | None:
+        registry = parse_image_name(image)[0]
+        registry_semaphore = self._registry_semaphores.setdefault(
+            registry, asyncio.Semaphore(MAX_CONCURRENT_REGISTRY_CHECKS)
+        )
+        async with self._semaphore, registry_semaphore:
+            if self.api.http.rate_limit_delay(registry):
+                # stays due and is retried on the next tick
+                _LOGGER.debug(f"Postponed update check of {image} (rate limit)")
+                return None
+
+            first_check = image not in self.next_check
+            try:
+                version = await self.api.async_images_check_update(image, local_image)
+            except Exception as e:
+                _LOGGER.warning(f"Failed to check {image} for update: {e}")
+                self.next_check[image] = datetime.now(timezone.utc) + UPDATE_CHECK_RETRY
+                return None
+
+        # the first checks are spread over the interval instead of all repeating
+        # at once, every following check is jittered around the interval
+        spread = (
+            random.uniform(UPDATE_CHECK_JITTER, 1)
+            if first_check
+            else random.uniform(1 - UPDATE_CHECK_JITTER, 1 + UPDATE_CHECK_JITTER)
+        )
+        self.next_check[image] = (
+            datetime.now(timezone.utc) + UPDATE_CHECK_INTERVAL * spread
+        )
+        return version
+
+
+class DockerContainerStatsCoordinator(
+    DataUpdateCoordinator[dict[str, DockerContainerStats]]
+):
+    """
+    Resource usage of the running containers. Every sampled container has one
+    stats stream, the samples go to the in-memory metrics history and the
+    entities are written once per update interval with the interval means,
+    only those which got a new sample.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry: DockerConfigEntry) -> None:
+        super().__init__(
+            hass,
+            _LOGGER,
+            config_entry=entry,
+            name="docker_integration_container_stats",
+            update_interval=timedelta(
+                seconds=entry.options.get(CONF_STATS_INTERVAL, DEFAULT_STATS_INTERVAL)
+            ),
+        )
+
+        self.data: dict[str, DockerContainerStats] = {}
+        self._latest: dict[str, DockerContainerStats] = {}
+        # short id -> recent samples, kept until the container is removed
+        self.history: dict[str, DockerContainerMetrics] = {}
+        # short id -> (container id, stream reading task)
+        self._streams: dict[str, tuple[str, asyncio.Task]] = {}
+        self._sampled: set[str] = set()
+        self._changed: DockerChangeSet | None = None
+
+    @property
+    def api(self) -> DockerApi:
+        return self.config_entry.runtime_data.api
+
+    @callback
+    def async_start(self):
+        """Follow the container starts and stops of the data coordinator."""
+        data_coordinator = self.config_entry.runtime_data.data_coordinator
+        self.config_entry.async_on_unload(
+            data_coordinator.async_add_listener(self._async_sync_streams)
+        )
+        self._async_sync_streams()
+
+    async def async_shutdown(self) -> None:
+        for short_id in list(self._streams):
+            self._async_close_stream(short_id)
+
+        await super().async_shutdown()
+
+    @callback
+    def _async_sync_streams(self) -> None:
+        """Open the streams of the running containers with enabled entities."""
+        data: DockerHostInfo = self.config_entry.runtime_data.data_coordinator.data
+        # only containers with listening (enabled) entities are sampled
+        wanted = set(context[1] for _, context in self._listeners.values() if context)
+        running = dict(
+            (c.short_id, c.id)
+            for c in data.containers.values()
+            if c.state == "running" and c.short_id in wanted
+        )
+
+        for short_id in (self._streams.keys() | self._latest.keys()) - running.keys():
+            self._async_close_stream(short_id)
+        for short_id in self.history.keys() - data.containers.keys():
+            del self.history[short_id]
+
+        for short_id, id in running.items():
+            if short_id in self._streams and self._streams[short_id][0] == id:
+                continue
+
+            # a recreated container keeps the name but gets a new id
+            self._async_close_stream(short_id)
+            task = self.config_entry.async_create_background_task(
+                self.hass,
+                self._async_follow_stats(short_id, id),
+                name=f"{DOMAIN} stats {short_id}",
+            )
+            # started eagerly, the stream may have failed to open already
+            if not task.done():
+                self._streams[short_id] = (id, task)
+
+    @callback
+    def _async_close_stream(self, short_id: str) -> None:
+        if (stream := self._streams.pop(short_id, None)) is not None:
+            stream[1].cancel()
+        self._latest.pop(short_id, None)
+
+    async def _async_follow_stats(self, short_id: str, id: str) -> None:
+        stream: DockerEventStream | None = None
+        previous = None
+        try:
+            stream = await self.api.async_container_stats_stream(
+                id, self.update_interval.total_seconds()
+            )
+            async for sample in stream:
+                stats = to_container_stats(sample, previous)
+                previous = sample
+                if stats is not None:
+                    self.history.setdefault(short_id, DockerContainerMetrics()).add(
+                        datetime.now(timezone.utc).timestamp(), stats
+                    )
+                    self._latest[short_id] = stats
+                    self._sampled.add(short_id)
+        except Exception as e:
+            _LOGGER.debug(f"Stats stream of {short_id} failed: {e}")
+        finally:
+            if stream is not None:
+                stream.close()
+            # reopened on the next sync while the container is still running,
+            # also after the stream failed to open
+            if self._streams.get(short_id, (None,))[0] == id:
+                del self._streams[short_id]
+
+    async def _async_update_data(self) -> dict[str, DockerContainerStats]:
+        """Publish the interval means, picking up the newly enabled entities."""
+        self._async_sync_streams()
+        removed = self.data.keys() - self._latest.keys()
+        self._changed = set(
+            ("containers", short_id) for short_id in self._sampled | removed
+        )
+        interval = self.update_interval.total_seconds()
+        data = dict(
+            (short_id, self.data[short_id])
+            for short_id in self._latest.keys() - self._sampled
+            if short_id in self.data
+        )
+        for short_id in self._sampled & self._latest.keys():
+            data[short_id] = downsample_stats(
+                self._latest[short_id], self.history[short_id], interval
+            )
+
+        self._sampled = set()
+        return data
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Update only the entities of the containers with a new sample."""
+        changed = self._changed if self.last_update_success else None
+        self._changed = None
+        for update_callback, context in list(self._listeners.values()):
+            if context is None or changed is None or context in changed:
+                update_callback()
+
+
+class DockerSwarmCoordinator(DataUpdateCoordinator[DockerSwarmInfo | None]):
+    """
+    Services, tasks and nodes of the swarm, when the host is a manager. The
+    full listing is only the reconciliation, the service and node events
+    refetch just the changed service (with its tasks) or node. The engine has
+    no task events, the task containers started or stopped on this node
+    refetch their service.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry: DockerConfigEntry) -> None:
+        event_stream = entry.options.get(CONF_EVENT_STREAM, DEFAULT_EVENT_STREAM)
+        super().__init__(
+            hass,
+            _LOGGER,
+            config_entry=entry,
+            name="docker_integration_swarm",
+            update_interval=RECONCILE_INTERVAL if event_stream else IDLE_SCAN_INTERVAL,
+        )
+
+        self.scope = get_entry_scope(entry)
+        self.data: DockerSwarmInfo | None = None
+        self._dirty_services: set[str] = set()
+        self._dirty_nodes: set[str] = set()
+        self._flush_task: asyncio.Task | None = None
+        self._changed: DockerChangeSet | None = None
+
+    @property
+    def api(self) -> DockerApi:
+        return self.config_entry.runtime_data.api
+
+    async def async_shutdown(self) -> None:
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+
+        await super().async_shutdown()
+
+    async def _async_update_data(self) -> DockerSwarmInfo | None:
+        data: DockerHostInfo = self.config_entry.runtime_data.data_coordinator.data
+        if not data.swarm_manager:
+            self._changed = None
+            return None
+
+        swarm = await self.api.async_fetch_swarm()
+        self._changed = (
+            diff_swarm_info(self.data, swarm) if self.last_update_success else None
+        )
+        return swarm
+
+    @callback
+    def async_handle_event(self, event: dict) -> None:
+        """Mark the service or node of a docker event to be refetched."""
+        if self.data is None:
+            return
+
+        actor = event.get("Actor", {})
+        if event.get("Type") == "service":
+            self._dirty_services.add(actor.get("ID", ""))
+        elif event.get("Type") == "node":
+            self._dirty_nodes.add(actor.get("ID", ""))
+        else:
+            self._dirty_services.add(actor["Attributes"][SWARM_SERVICE_ID_LABEL])
+
+        if self._flush_task is None:
+            self._flush_task = self.config_entry.async_create_background_task(
+                self.hass, self._async_flush_events(), name=f"{DOMAIN} swarm events"
+            )
+
+    async def _async_flush_events(self) -> None:
+        await asyncio.sleep(SWARM_EVENT_DELAY)
+        # the events arriving while fetching are flushed by the next task
+        services, self._dirty_services = self._dirty_services, set()
+        nodes, self._dirty_nodes = self._dirty_nodes, set()
+        self._flush_task = None
+
+        try:
+            fetched_services, fetched_nodes = await asyncio.gather(
+                asyncio.gather(
+                    *(self.api.async_fetch_swarm_service(x) for x in services)
+                ),
+                asyncio.gather(*(self.api.async_fetch_swarm_node(x) for x in nodes)),
+            )
+        except Exception as e:
+            # the reconciliation catches up
+            _LOGGER.warning(f"Failed to fetch the changed swarm items: {e}")
+            return
+
+        if self.data is None:
+            return
+
+        old = copy_swarm_info(self.data)
+        for id, (service, tasks) in zip(services, fetched_services):
+            set_swarm_service(self.data, id[:12], service, tasks)
+        for id, node in zip(nodes, fetched_nodes):
+            set_swarm_node(self.data, id[:12], node)
+        count_swarm_tasks(self.data)
+
+        # notify without async_set_updated_data to keep the reconcile poll scheduled
+        self._changed = diff_swarm_info(old, self.data)
+        self.async_update_listeners()
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Update the global listeners and only those of the changed items."""
+        changed = self._changed if self.last_update_success else None
+        self._changed = None
+        for update_callback, context in list(self._listeners.values()):
+            if context is None or changed is None or context in changed:
+                update_callback()
+
 
 class DeviceTracker:
     _current_device_ids = set[str]()
@@ -191,3 +1144,37 @@ def auto_add_containers_devices[TDevice](
     # listen for new containers
     _add_container_entities()
     entry.async_on_unload(coordinator.async_add_listener(_add_container_entities))
+
+
+@callback
+def auto_add_swarm_devices[TDevice](
+    entry: DockerConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+    create_fn: typing.Callable[
+        [SWARM_DATA_KEYS, str, DockerSwarmCoordinator], typing.Iterable[TDevice]
+    ],
+):
+    coordinator = entry.runtime_data.swarm_coordinator
+    added: set[tuple[str, str]] = set()
+
+    @callback
+    def _add_swarm_entities() -> None:
+        """Add the entities of the new services and nodes."""
+        if coordinator.data is None:
+            return
+
+        new = [
+            (key, id)
+            for key in typing.get_args(SWARM_DATA_KEYS)
+            for id in getattr(coordinator.data, key)
+            if (key, id) not in added
+        ]
+        added.update(new)
+        if new:
+            async_add_entities(
+                entity for key, id in new for entity in create_fn(key, id, coordinator)
+            )
+
+    # listen for new services and nodes
+    _add_swarm_entities()
+    entry.async_on_unload(coordinator.async_add_listener(_add_swarm_entities))
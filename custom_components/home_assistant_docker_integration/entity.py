@@ -1,18 +1,27 @@
+import typing
+
 from homeassistant.const import EntityCategory
 from homeassistant.helpers.device_registry import DeviceInfo
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from ._docker_api import DockerContainerInfo
+from ._docker_swarm import DockerSwarmNodeInfo, DockerSwarmServiceInfo
 from .const import DOMAIN
-from .coordinator import DOCKER_DATA_KEYS, DockerDataUpdateCoordinator
+from .coordinator import (
+    DOCKER_DATA_KEYS,
+    DockerDataUpdateCoordinator,
+    DockerSwarmCoordinator,
+)
 
 
 def to_suffix(suffix: str, lead_char=" ") -> str:
     return "" if suffix is None else (lead_char + suffix)
 
 
-def get_unique_id(id: str, key: DOCKER_DATA_KEYS, sub_name: str = None):
-    return f"{DOMAIN}_{key}_{id}{to_suffix(sub_name, '_')}"
+def get_unique_id(
+    id: str, key: DOCKER_DATA_KEYS, sub_name: str = None, scope: str = ""
+):
+    return f"{DOMAIN}_{scope}{key}_{id}{to_suffix(sub_name, '_')}"
 
 
 class BaseDeviceEntity[TDevice](CoordinatorEntity[DockerDataUpdateCoordinator]):
@@ -26,12 +35,15 @@ class BaseDeviceEntity[TDevice](CoordinatorEntity[DockerDataUpdateCoordinator]):
         key: DOCKER_DATA_KEYS = "containers",
         sub_name: str = None,
     ):
-        super().__init__(coordinator)
+        # notified only when this item changed, see async_update_listeners
+        super().__init__(coordinator, context=(key, id))
         self._id = id
         self._key = key
         self._attr_name = name + to_suffix(sub_name, " ")
         self._attr_has_entity_name = True
-        self._attr_unique_id = get_unique_id(id, key, sub_name)
+        self._attr_unique_id = get_unique_id(id, key, sub_name, coordinator.scope)
+        self._attributes_device: TDevice | None = None
+        self._attributes: dict[str, typing.Any] | None = None
 
     def _init_entity_id(self, entity_domain: str):
         self.entity_id = f"{entity_domain}.{self._attr_unique_id}"
@@ -50,21 +62,35 @@ class BaseDeviceEntity[TDevice](CoordinatorEntity[DockerDataUpdateCoordinator]):
         """Return data for this device."""
         return self._dataset.get(self._id)
 
+    def _cached_attributes(
+        self, build: typing.Callable[[TDevice], dict[str, typing.Any]]
+    ) -> dict[str, typing.Any]:
+        """Return the attributes, rebuilt only when the device data changed."""
+        dev = self.device
+        if dev is not self._attributes_device and dev != self._attributes_device:
+            self._attributes_device = dev
+            self._attributes = build(dev)
+        return self._attributes
+
+
+def get_host_prefix(coordinator: DockerDataUpdateCoordinator) -> str:
+    return coordinator.config_entry.title if coordinator.scope else "Local"
+
 
 def create_volumes_device_info(coordinator: DockerDataUpdateCoordinator) -> DeviceInfo:
     return DeviceInfo(
-        identifiers={(DOMAIN, "docker_integration_volumes")},
+        identifiers={(DOMAIN, f"docker_integration_{coordinator.scope}volumes")},
         model="volume",
-        name="Local Docker Volumes",
+        name=f"{get_host_prefix(coordinator)} Docker Volumes",
         via_device=(DOMAIN, coordinator.config_entry.entry_id),
     )
 
 
 def create_images_device_info(coordinator: DockerDataUpdateCoordinator) -> DeviceInfo:
     return DeviceInfo(
-        identifiers={(DOMAIN, "docker_integration_images")},
+        identifiers={(DOMAIN, f"docker_integration_{coordinator.scope}images")},
         model="image",
-        name="Local Docker Images",
+        name=f"{get_host_prefix(coordinator)} Docker Images",
         via_device=(DOMAIN, coordinator.config_entry.entry_id),
     )
 
@@ -73,10 +99,35 @@ def create_containers_device_info(
     info: DockerContainerInfo, coordinator: DockerDataUpdateCoordinator
 ):
     return DeviceInfo(
-        identifiers={(DOMAIN, info.short_id)},
+        identifiers={(DOMAIN, f"{coordinator.scope}{info.short_id}")},
         model="container",
         model_id=info.image_name,
         name=info.name,
         # serial_number=device_serial,
         via_device=(DOMAIN, coordinator.config_entry.entry_id),
     )
+
+
+def create_swarm_service_device_info(
+    info: DockerSwarmServiceInfo, coordinator: DockerSwarmCoordinator
+) -> DeviceInfo:
+    return DeviceInfo(
+        identifiers={(DOMAIN, f"{coordinator.scope}swarm_service_{info.id[:12]}")},
+        model="swarm service",
+        model_id=info.image,
+        name=info.name,
+        via_device=(DOMAIN, coordinator.config_entry.entry_id),
+    )
+
+
+def create_swarm_node_device_info(
+    info: DockerSwarmNodeInfo, coordinator: DockerSwarmCoordinator
+) -> DeviceInfo:
+    return DeviceInfo(
+        identifiers={(DOMAIN, f"{coordinator.scope}swarm_node_{info.id[:12]}")},
+        model="swarm node",
+        model_id=info.role,
+        name=info.hostname,
+        sw_version=info.engine_version,
+        via_device=(DOMAIN, coordinator.config_entry.entry_id),
+    )
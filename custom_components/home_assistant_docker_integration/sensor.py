@@ -1,22 +1,37 @@
 from homeassistant.components.sensor import DOMAIN as SENSOR_DOMAIN
 from homeassistant.components.sensor import (
+    SensorDeviceClass,
     SensorEntity,
     SensorEntityDescription,
+    SensorStateClass,
 )
-from homeassistant.const import EntityCategory
+from homeassistant.const import PERCENTAGE, EntityCategory, UnitOfInformation
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.device_registry import DeviceInfo
 from homeassistant.helpers.entity_platform import AddConfigEntryEntitiesCallback
 from homeassistant.helpers.typing import StateType
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
-from ._docker_api import DockerContainerInfo
+from ._docker_api import DockerContainerInfo, DockerContainerStats
+from ._docker_executor import EXECUTOR_LANES, DockerWorkerLane
+from ._docker_swarm import DockerSwarmNodeInfo, DockerSwarmServiceInfo
 from .const import DOMAIN
 from .coordinator import (
+    SWARM_DATA_KEYS,
     DockerConfigEntry,
+    DockerContainerStatsCoordinator,
     DockerDataUpdateCoordinator,
+    DockerSwarmCoordinator,
     auto_add_containers_devices,
+    auto_add_swarm_devices,
+)
+from .entity import (
+    BaseDeviceEntity,
+    create_containers_device_info,
+    create_swarm_node_device_info,
+    create_swarm_service_device_info,
+    get_unique_id,
 )
-from .entity import BaseDeviceEntity, create_containers_device_info, get_unique_id
 
 DOCKER_SENSOR_TYPES: tuple[SensorEntityDescription, ...] = (
     SensorEntityDescription(
@@ -34,6 +49,67 @@ DOCKER_SENSOR_TYPES: tuple[SensorEntityDescription, ...] = (
 )
 
 
+def _data_size(key: str, name: str, total: bool) -> SensorEntityDescription:
+    return SensorEntityDescription(
+        key=key,
+        name=name,
+        device_class=SensorDeviceClass.DATA_SIZE,
+        state_class=(
+            SensorStateClass.TOTAL_INCREASING if total else SensorStateClass.MEASUREMENT
+        ),
+        native_unit_of_measurement=UnitOfInformation.BYTES,
+        suggested_unit_of_measurement=UnitOfInformation.MEBIBYTES,
+    )
+
+
+# keys are the DockerContainerStats fields
+CONTAINER_STATS_SENSOR_TYPES: tuple[SensorEntityDescription, ...] = (
+    SensorEntityDescription(
+        key="cpu_percent",
+        name="CPU",
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement=PERCENTAGE,
+    ),
+    _data_size("memory_usage", "Memory", total=False),
+    SensorEntityDescription(
+        key="memory_percent",
+        name="Memory Percent",
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement=PERCENTAGE,
+    ),
+    _data_size("network_rx", "Network Received", total=True),
+    _data_size("network_tx", "Network Sent", total=True),
+    _data_size("block_read", "Block Read", total=True),
+    _data_size("block_write", "Block Written", total=True),
+)
+
+# keys are the DockerSwarmServiceInfo and DockerSwarmNodeInfo fields
+SWARM_SENSOR_TYPES: dict[SWARM_DATA_KEYS, tuple[SensorEntityDescription, ...]] = {
+    "services": (
+        SensorEntityDescription(
+            key="running_replicas",
+            name="Running Replicas",
+            state_class=SensorStateClass.MEASUREMENT,
+        ),
+        SensorEntityDescription(
+            key="desired_replicas",
+            name="Desired Replicas",
+            state_class=SensorStateClass.MEASUREMENT,
+        ),
+        SensorEntityDescription(key="update_state", name="Update State"),
+    ),
+    "nodes": (
+        SensorEntityDescription(key="state", name="State"),
+        SensorEntityDescription(key="availability", name="Availability"),
+        SensorEntityDescription(
+            key="running_tasks",
+            name="Running Tasks",
+            state_class=SensorStateClass.MEASUREMENT,
+        ),
+    ),
+}
+
+
 async def async_setup_entry(
     hass: HomeAssistant,
     entry: DockerConfigEntry,
@@ -47,6 +123,10 @@ async def async_setup_entry(
         DockerDiagnosticSensor(coordinator, entity_description)
         for entity_description in DOCKER_SENSOR_TYPES
     )
+    async_add_entities(
+        DockerWorkerLaneSensor(coordinator, entry.runtime_data.api.executor.lanes[lane])
+        for lane in EXECUTOR_LANES
+    )
 
     auto_add_containers_devices(
         entry,
@@ -56,8 +136,32 @@ async def async_setup_entry(
         ),
     )
 
+    stats_coordinator = entry.runtime_data.stats_coordinator
+    for entity_description in CONTAINER_STATS_SENSOR_TYPES:
+        auto_add_containers_devices(
+            entry,
+            async_add_entities,
+            lambda device_id, coordinator, description=entity_description: (
+                DockerContainerStatsSensor(
+                    stats_coordinator, coordinator, device_id, description
+                )
+            ),
+        )
+
+    auto_add_swarm_devices(
+        entry,
+        async_add_entities,
+        lambda key, id, coordinator: (
+            DockerSwarmSensor(coordinator, key, id, description)
+            for description in SWARM_SENSOR_TYPES[key]
+        ),
+    )
+
 
 class DockerContainerStatusSensor(BaseDeviceEntity[DockerContainerInfo], SensorEntity):
+    # change on every (re)start or health check flip
+    _unrecorded_attributes = frozenset({"started_at", "health", "exit_code"})
+
     def __init__(
         self,
         coordinator: DockerDataUpdateCoordinator,
@@ -80,18 +184,116 @@ class DockerContainerStatusSensor(BaseDeviceEntity[DockerContainerInfo], SensorE
 
     @property
     def extra_state_attributes(self):
+        return self._cached_attributes(
+            lambda dev: {
+                "id": dev.id,
+                "sid": dev.short_id,
+                "started_at": dev.started_at,
+                "health": dev.health,
+                "exit_code": dev.exit_code,
+                "ports": dev.ports,
+                "project": dev.compose_project,
+                "mounts": dev.mounts,
+            }
+        )
+
+
+class DockerContainerStatsSensor(
+    CoordinatorEntity[DockerContainerStatsCoordinator], SensorEntity
+):
+    _attr_has_entity_name = True
+    # only the enabled entities are sampled, each one opens a stats stream
+    _attr_entity_registry_enabled_default = False
+
+    def __init__(
+        self,
+        coordinator: DockerContainerStatsCoordinator,
+        data_coordinator: DockerDataUpdateCoordinator,
+        device_id: str,
+        entity_description: SensorEntityDescription,
+    ) -> None:
+        # notified only when this container got a new sample
+        super().__init__(coordinator, context=("containers", device_id))
+        dev = data_coordinator.data.containers.get(device_id)
+        self._id = device_id
+        self._attr_unique_id = get_unique_id(
+            device_id, "containers", entity_description.key, data_coordinator.scope
+        )
+        self._attr_device_info = create_containers_device_info(dev, data_coordinator)
+        self.entity_description = entity_description
+        self.entity_id = f"{SENSOR_DOMAIN}.{self._attr_unique_id}"
+
+    @property
+    def available(self) -> bool:
+        """Only the running containers have stats."""
+        return self._id in self.coordinator.data and super().available
+
+    @property
+    def native_value(self) -> StateType:
+        stats: DockerContainerStats | None = self.coordinator.data.get(self._id)
+        return getattr(stats, self.entity_description.key) if stats else None
+
+
+class DockerSwarmSensor(CoordinatorEntity[DockerSwarmCoordinator], SensorEntity):
+    _attr_has_entity_name = True
+
+    def __init__(
+        self,
+        coordinator: DockerSwarmCoordinator,
+        key: SWARM_DATA_KEYS,
+        id: str,
+        entity_description: SensorEntityDescription,
+    ) -> None:
+        # notified only when this service or node changed
+        super().__init__(coordinator, context=(key, id))
+        self._key = key
+        self._id = id
+        dev = getattr(coordinator.data, key)[id]
+        self._attr_unique_id = get_unique_id(
+            id, f"swarm_{key}", entity_description.key, coordinator.scope
+        )
+        self._attr_device_info = (
+            create_swarm_service_device_info(dev, coordinator)
+            if key == "services"
+            else create_swarm_node_device_info(dev, coordinator)
+        )
+        self.entity_description = entity_description
+        self.entity_id = f"{SENSOR_DOMAIN}.{self._attr_unique_id}"
+
+    @property
+    def device(self) -> DockerSwarmServiceInfo | DockerSwarmNodeInfo | None:
+        """None after the removal or when the host left the swarm."""
+        data = self.coordinator.data
+        return getattr(data, self._key).get(self._id) if data else None
+
+    @property
+    def available(self) -> bool:
+        return self.device is not None and super().available
+
+    @property
+    def native_value(self) -> StateType:
         dev = self.device
-        return {
-            "id": dev.id,
-            "sid": dev.short_id,
-            "status": dev.status,
-            "ports": dev.ports,
-            "project": dev.compose_project,
-            "mounts": dev.mounts,
-        }
+        return getattr(dev, self.entity_description.key) if dev else None
+
+    @property
+    def extra_state_attributes(self):
+        dev = self.device
+        if dev is None:
+            return None
+        if self.entity_description.key == "update_state":
+            return {"message": dev.update_message}
+        if self.entity_description.key == "state":
+            return {
+                "role": dev.role,
+                "manager_status": dev.manager_status,
+                "address": dev.address,
+            }
+        return None
 
 
-class DockerDiagnosticSensor(SensorEntity):
+class DockerDiagnosticSensor(
+    CoordinatorEntity[DockerDataUpdateCoordinator], SensorEntity
+):
     _attr_has_entity_name = True
     _attr_entity_category = EntityCategory.DIAGNOSTIC
 
@@ -101,8 +303,10 @@ class DockerDiagnosticSensor(SensorEntity):
         entity_description: SensorEntityDescription,
     ) -> None:
         """Initiate Sun Sensor."""
-        self._attr_unique_id = get_unique_id(entity_description.key, "host")
-        self._coordinator = coordinator
+        super().__init__(coordinator, context=("host", entity_description.key))
+        self._attr_unique_id = get_unique_id(
+            entity_description.key, "host", scope=coordinator.scope
+        )
         self._attr_device_info = DeviceInfo(
             identifiers={(DOMAIN, coordinator.config_entry.entry_id)}
         )
@@ -111,16 +315,40 @@ class DockerDiagnosticSensor(SensorEntity):
         self.entity_id = f"{SENSOR_DOMAIN}.{self._attr_unique_id}"
 
     @property
-    def available(self) -> bool:
-        """Return if entity is available."""
-        return self._coordinator.last_update_success
+    def native_value(self) -> StateType:
+        """Return value of sensor."""
+        return getattr(self.coordinator.data, self.entity_description.key)
+
+
+class DockerWorkerLaneSensor(SensorEntity):
+    """Queue depth of a worker lane, polled since it changes on every call."""
+
+    _attr_has_entity_name = True
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_should_poll = True
+    _unrecorded_attributes = frozenset({"operations"})
+
+    def __init__(
+        self, coordinator: DockerDataUpdateCoordinator, lane: DockerWorkerLane
+    ) -> None:
+        self._lane = lane
+        self._attr_name = f"Docker {lane.name.capitalize()} Queue"
+        self._attr_unique_id = get_unique_id(
+            f"{lane.name}_queue", "host", scope=coordinator.scope
+        )
+        self._attr_device_info = DeviceInfo(
+            identifiers={(DOMAIN, coordinator.config_entry.entry_id)}
+        )
+        self.entity_id = f"{SENSOR_DOMAIN}.{self._attr_unique_id}"
 
     @property
     def native_value(self) -> StateType:
-        """Return value of sensor."""
-        return getattr(self._coordinator.data, self.entity_description.key)
+        return self._lane.queued
 
-    async def async_update(self) -> None:
-        """Update the entity."""
-        if self.enabled:
-            await self._coordinator.async_request_refresh()
+    @property
+    def extra_state_attributes(self):
+        """The workers and per operation type the wait and run times."""
+        stats = self._lane.to_dict()
+        del stats["queued"]
+        return stats
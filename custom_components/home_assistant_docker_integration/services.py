@@ -1,3 +1,9 @@
+import asyncio
+import re
+import time
+import typing
+from functools import partial
+
 import voluptuous as vol
 from homeassistant.core import (
     HomeAssistant,
@@ -6,11 +12,20 @@ from homeassistant.core import (
     SupportsResponse,
     callback,
 )
+from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers import config_validation as cv
+from homeassistant.util import dt as dt_util
 
-from ._docker_api import DockerApi
+from ._docker_api import (
+    DockerApi,
+    DockerContainerInfo,
+    get_compose_waves,
+    select_containers,
+)
+from ._docker_jobs import DockerJob
+from ._docker_logs import DockerLogSearch, async_search_logs
 from .const import _LOGGER, DOMAIN
-from .coordinator import DockerConfigEntry
+from .coordinator import DockerConfigEntry, ServiceController
 
 CONF_IMAGE = "image"
 CONF_NAME = "name"
@@ -20,6 +35,21 @@ CONF_VOLUMES = "volumes"
 CONF_RESTART_POLICY = "restart_policy"
 
 CONF_ID = "id"
+CONF_HOST = "host"
+CONF_COMPOSE_PROJECT = "compose_project"
+CONF_LABEL = "label"
+CONF_MAX_PARALLEL = "max_parallel"
+CONF_PATTERN = "pattern"
+CONF_REGEX = "regex"
+CONF_IGNORE_CASE = "ignore_case"
+CONF_CONTEXT = "context"
+CONF_MAX_RESULTS = "max_results"
+CONF_SINCE = "since"
+CONF_UNTIL = "until"
+CONF_TIMESTAMPS = "timestamps"
+CONF_TIMEOUT = "timeout"
+
+DEFAULT_MAX_PARALLEL = 4
 
 CREATE_SERVICE = "create"
 START_SERVICE = "start"
@@ -30,10 +60,56 @@ RESTART_SERVICE = "restart"
 PRUNE_VOLUMES_SERVICE = "prune_volumes"
 PRUNE_CONTAINERS_SERVICE = "prune_containers"
 PRUNE_IMAGES_SERVICE = "prune_images"
-EMPTY_SERVICE_SCHEMA = vol.Schema({})
+REFRESH_DISK_USAGE_SERVICE = "refresh_disk_usage"
+SEARCH_LOGS_SERVICE = "search_logs"
+# the config entry id or title of a docker host
+HOST_SERVICE_SCHEMA = vol.Schema({vol.Optional(CONF_HOST): cv.string})
+# seconds the job may run once it holds its locks
+JOB_TIMEOUT_SCHEMA = vol.All(vol.Coerce(int), vol.Range(min=1))
+HOST_JOB_SERVICE_SCHEMA = vol.Schema(
+    {
+        vol.Optional(CONF_HOST): cv.string,
+        vol.Optional(CONF_TIMEOUT): JOB_TIMEOUT_SCHEMA,
+    }
+)
 CONTAINER_SERVICE_SCHEMA = vol.Schema(
     {
         vol.Required(CONF_ID): cv.string,
+        vol.Optional(CONF_HOST): cv.string,
+    }
+)
+
+BULK_CONTAINER_SERVICE_SCHEMA = vol.All(
+    vol.Schema(
+        {
+            vol.Optional(CONF_ID): vol.All(cv.ensure_list, [cv.string]),
+            vol.Optional(CONF_COMPOSE_PROJECT): cv.string,
+            vol.Optional(CONF_LABEL): vol.All(cv.ensure_list, [cv.string]),
+            vol.Optional(CONF_MAX_PARALLEL, default=DEFAULT_MAX_PARALLEL): vol.All(
+                vol.Coerce(int), vol.Range(min=1)
+            ),
+            vol.Optional(CONF_HOST): cv.string,
+        }
+    ),
+    cv.has_at_least_one_key(CONF_ID, CONF_COMPOSE_PROJECT, CONF_LABEL),
+)
+
+SEARCH_LOGS_SERVICE_SCHEMA = vol.Schema(
+    {
+        vol.Required(CONF_ID): cv.string,
+        vol.Required(CONF_PATTERN): cv.string,
+        vol.Optional(CONF_REGEX, default=False): cv.boolean,
+        vol.Optional(CONF_IGNORE_CASE, default=False): cv.boolean,
+        vol.Optional(CONF_CONTEXT, default=2): vol.All(
+            vol.Coerce(int), vol.Range(min=0, max=50)
+        ),
+        vol.Optional(CONF_MAX_RESULTS, default=100): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=1000)
+        ),
+        vol.Optional(CONF_SINCE): cv.datetime,
+        vol.Optional(CONF_UNTIL): cv.datetime,
+        vol.Optional(CONF_TIMESTAMPS, default=False): cv.boolean,
+        vol.Optional(CONF_HOST): cv.string,
     }
 )
 
@@ -45,65 +121,278 @@ CREATE_CONTAINER_SERVICE_SCHEMA = vol.Schema(
         vol.Optional(CONF_PORTS): vol.All(cv.ensure_list, [cv.string]),
         vol.Optional(CONF_VOLUMES): vol.All(cv.ensure_list, [cv.string]),
         vol.Optional(CONF_RESTART_POLICY): cv.string,
+        vol.Optional(CONF_HOST): cv.string,
+        vol.Optional(CONF_TIMEOUT): JOB_TIMEOUT_SCHEMA,
     }
 )
 
 
 @callback
-def _get_api(call: ServiceCall) -> DockerApi | None:
-    entires: list[DockerConfigEntry] = call.hass.config_entries.async_loaded_entries(
+def _get_controllers(call: ServiceCall) -> list[ServiceController]:
+    """The controller of the host given in the call, all without a host."""
+    entries: list[DockerConfigEntry] = call.hass.config_entries.async_loaded_entries(
         DOMAIN
     )
-    if not entires:
+    if not entries:
         _LOGGER.error("Service can't be called because no active config_entries")
-        return None
-    return entires[0].runtime_data.api
+        return []
+
+    host = call.data.get(CONF_HOST)
+    if host is None:
+        return [entry.runtime_data for entry in entries]
+
+    controllers = [
+        entry.runtime_data for entry in entries if host in (entry.entry_id, entry.title)
+    ]
+    if not controllers:
+        raise HomeAssistantError(f"Unknown docker host {host}")
+    return controllers
+
+
+@callback
+def _require_host(call: ServiceCall, controllers: list[ServiceController]) -> None:
+    """A create or a destructive action runs on the named host only."""
+    if len(controllers) > 1 and call.data.get(CONF_HOST) is None:
+        raise HomeAssistantError("Several docker hosts are loaded, set the host")
+
+
+@callback
+def _get_controller(call: ServiceCall) -> ServiceController | None:
+    """The controller of the given host, the host of the container or the first."""
+    controllers = _get_controllers(call)
+    if id := call.data.get(CONF_ID):
+        for controller in controllers:
+            if select_containers(controller.data_coordinator.data.containers, [id]):
+                return controller
+
+    return controllers[0] if controllers else None
+
+
+@callback
+def _get_api(call: ServiceCall) -> DockerApi | None:
+    controller = _get_controller(call)
+    return controller.api if controller else None
+
+
+@callback
+def _submit_jobs(
+    call: ServiceCall,
+    controllers: list[ServiceController],
+    run: typing.Callable[[ServiceController, DockerJob], typing.Awaitable],
+    keys: list[str] | None = None,
+) -> ServiceResponse:
+    """
+    Start the operation as a job on every host and respond at once with the
+    jobs, their progress and results are pushed to the jobs subscription.
+    Without container keys the jobs of one service queue behind each other.
+    """
+    jobs = [
+        controller.jobs.submit(
+            call.service,
+            partial(run, controller),
+            keys or [call.service],
+            call.data.get(CONF_TIMEOUT),
+        )
+        for controller in controllers
+    ]
+    return {"jobs": [job.to_dict() for job in jobs]}
 
 
 async def _async_handle_create(call: ServiceCall) -> ServiceResponse:
     """Create new container."""
-    api = _get_api(call)
-    if not api:
+    controllers = _get_controllers(call)
+    # unlike prune, a container is created on one host only
+    _require_host(call, controllers)
+    if not controllers:
         return
+    controller = controllers[0]
 
     restart_policy = call.data.get(CONF_RESTART_POLICY)
     if restart_policy:
         restart_policy = {"Name": restart_policy}
 
-    api.async_container_create(
-        image=call.data.get(CONF_IMAGE),
-        name=call.data.get(CONF_NAME),
-        network=call.data.get(CONF_NETWORK),
-        ports=call.data.get(CONF_PORTS),
-        volumes=call.data.get(CONF_VOLUMES),
-        restart_policy=restart_policy,
+    async def create(controller: ServiceController, job: DockerJob) -> dict:
+        id = await controller.api.async_container_create(
+            image=call.data.get(CONF_IMAGE),
+            name=call.data.get(CONF_NAME),
+            network=call.data.get(CONF_NETWORK),
+            ports=call.data.get(CONF_PORTS),
+            volumes=call.data.get(CONF_VOLUMES),
+            restart_policy=restart_policy,
+        )
+        return {"id": id}
+
+    return _submit_jobs(call, [controller], create, [call.data[CONF_NAME]])
+
+
+async def _async_fetch_uncached_container(
+    controller: ServiceController, id: str
+) -> DockerContainerInfo | None:
+    """Look up a container by id or name which is not cached yet (just created)."""
+    try:
+        attrs = await controller.api.async_container_inspect(id)
+        if attrs is None:
+            return None
+        return await controller.api.async_fetch_container(attrs["Id"])
+    except Exception as e:
+        _LOGGER.warning(f"Failed to look up container {id} on {controller.name}: {e}")
+        return None
+
+
+async def _async_run_bulk(
+    call: ServiceCall,
+    operation: typing.Callable[[DockerApi, DockerContainerInfo], typing.Awaitable],
+    state: str,
+    reverse: bool = False,
+    destructive: bool = False,
+) -> ServiceResponse:
+    """
+    Run an operation on the selected containers, wave by wave in compose
+    dependency order (reversed to stop) and concurrently within a wave.
+    Every host runs its own waves in parallel to the other hosts. A container
+    shows the transitional state until it is inspected after its operation.
+    The ids found on no host are looked up in docker, else reported failed.
+    """
+    controllers = _get_controllers(call)
+    if destructive:
+        _require_host(call, controllers)
+    if not controllers:
+        return
+
+    ids = call.data.get(CONF_ID)
+    selected = dict(
+        (
+            controller,
+            select_containers(
+                controller.data_coordinator.data.containers,
+                ids,
+                call.data.get(CONF_COMPOSE_PROJECT),
+                call.data.get(CONF_LABEL),
+            ),
+        )
+        for controller in controllers
+    )
+    matched = set(
+        key
+        for containers in selected.values()
+        for c in containers
+        for key in (c.id, c.short_id, c.name)
     )
+    missing = []
+    for id in ids or []:
+        if id in matched:
+            continue
+        for controller in controllers:
+            info = await _async_fetch_uncached_container(controller, id)
+            if info is not None:
+                selected[controller].extend(
+                    select_containers(
+                        {info.short_id: info},
+                        [id],
+                        call.data.get(CONF_COMPOSE_PROJECT),
+                        call.data.get(CONF_LABEL),
+                    )
+                )
+                break
+        else:
+            missing.append(
+                {
+                    "id": id,
+                    "name": None,
+                    "host": None,
+                    "success": False,
+                    "error": "No such container",
+                    "duration": 0,
+                }
+            )
+
+    async def run_host(controller: ServiceController) -> list[dict]:
+        waves = get_compose_waves(selected[controller])
+        if reverse:
+            waves.reverse()
+
+        semaphore = asyncio.Semaphore(
+            call.data.get(CONF_MAX_PARALLEL, DEFAULT_MAX_PARALLEL)
+        )
+        results = []
+        for wave in waves:
+            results.extend(
+                await asyncio.gather(*(run(controller, semaphore, c) for c in wave))
+            )
+        return results
+
+    async def run(
+        controller: ServiceController,
+        semaphore: asyncio.Semaphore,
+        container: DockerContainerInfo,
+    ) -> dict:
+        # waits for a running job on the container, such as an update
+        async with semaphore, controller.jobs.lock(container.name):
+            started = time.monotonic()
+            error = None
+            try:
+                await controller.data_coordinator.async_run_container_action(
+                    container.id,
+                    state,
+                    lambda: operation(controller.api, container),
+                )
+            except Exception as e:
+                _LOGGER.warning(f"{call.service} failed for {container.name}: {e}")
+                error = str(e)
+
+            return {
+                "id": container.short_id,
+                "name": container.name,
+                "host": controller.name,
+                "success": error is None,
+                "error": error,
+                "duration": round(time.monotonic() - started, 3),
+            }
+
+    started = time.monotonic()
+    results = await asyncio.gather(*(run_host(c) for c in controllers))
+
+    return {
+        "results": [result for host in results for result in host] + missing,
+        "duration": round(time.monotonic() - started, 3),
+    }
 
 
 async def _async_handle_start(call: ServiceCall) -> ServiceResponse:
-    api = _get_api(call)
-    if api:
-        await api.async_container_start(id=call.data.get(CONF_ID))
+    return await _async_run_bulk(
+        call, lambda api, c: api.async_container_start(id=c.id), "starting"
+    )
 
 
 async def _async_handle_stop(call: ServiceCall) -> ServiceResponse:
-    api = _get_api(call)
-    if api:
-        _LOGGER.debug(f"Stopping container {call.data}")
-        await api.async_container_stop(id=call.data.get(CONF_ID))
+    _LOGGER.debug(f"Stopping containers {call.data}")
+    return await _async_run_bulk(
+        call,
+        lambda api, c: api.async_container_stop(id=c.id),
+        "stopping",
+        reverse=True,
+        destructive=True,
+    )
 
 
 async def _async_handle_remove(call: ServiceCall) -> ServiceResponse:
-    """Remove container."""
-    api = _get_api(call)
-    if api:
-        await api.async_container_remove(id=call.data.get(CONF_ID), remove_volumes=True)
+    """Remove containers."""
+    return await _async_run_bulk(
+        call,
+        lambda api, c: api.async_container_remove(id=c.id, remove_volumes=True),
+        "removing",
+        reverse=True,
+        destructive=True,
+    )
 
 
 async def _async_handle_restart(call: ServiceCall) -> ServiceResponse:
-    api = _get_api(call)
-    if api:
-        await api.async_container_restart(id=call.data.get(CONF_ID))
+    return await _async_run_bulk(
+        call,
+        lambda api, c: api.async_container_restart(id=c.id),
+        "restarting",
+        destructive=True,
+    )
 
 
 async def _async_handle_logs(call: ServiceCall) -> ServiceResponse:
@@ -115,22 +404,73 @@ async def _async_handle_logs(call: ServiceCall) -> ServiceResponse:
         return {"logs": logs}
 
 
-async def _async_handle_prune_volumes(call: ServiceCall) -> ServiceResponse:
+async def _async_handle_search_logs(call: ServiceCall) -> ServiceResponse:
+    """Search the container log, returning the matching lines with context."""
     api = _get_api(call)
-    if api:
-        await api.async_volumes_prune()
+    if not api:
+        return
+
+    try:
+        search = DockerLogSearch(
+            call.data[CONF_PATTERN],
+            call.data[CONF_REGEX],
+            call.data[CONF_IGNORE_CASE],
+            call.data[CONF_CONTEXT],
+            call.data[CONF_MAX_RESULTS],
+        )
+    except re.error as e:
+        raise HomeAssistantError(f"Invalid pattern: {e}") from e
+
+    since, until = call.data.get(CONF_SINCE), call.data.get(CONF_UNTIL)
+    return await async_search_logs(
+        api,
+        call.data[CONF_ID],
+        search,
+        since=int(dt_util.as_timestamp(since)) if since else None,
+        until=int(dt_util.as_timestamp(until)) if until else None,
+        timestamps=call.data[CONF_TIMESTAMPS],
+    )
+
+
+async def _async_handle_prune_volumes(call: ServiceCall) -> ServiceResponse:
+    return _submit_jobs(
+        call, _get_controllers(call), lambda c, job: c.api.async_volumes_prune()
+    )
 
 
 async def _async_handle_prune_containers(call: ServiceCall) -> ServiceResponse:
-    api = _get_api(call)
-    if api:
-        await api.async_containers_prune()
+    return _submit_jobs(
+        call, _get_controllers(call), lambda c, job: c.api.async_containers_prune()
+    )
 
 
 async def _async_handle_prune_images(call: ServiceCall) -> ServiceResponse:
-    api = _get_api(call)
-    if api:
-        await api.async_images_prune()
+    return _submit_jobs(
+        call, _get_controllers(call), lambda c, job: c.api.async_images_prune()
+    )
+
+
+async def _async_handle_refresh_disk_usage(call: ServiceCall) -> ServiceResponse:
+    """Run the size computing disk usage scan now, responding when it was measured."""
+    controllers = _get_controllers(call)
+    await asyncio.gather(
+        *(c.data_coordinator.async_refresh_disk_usage() for c in controllers)
+    )
+
+    # a failed scan keeps the previous sizes and their time
+    return {
+        "hosts": [
+            {
+                "host": c.name,
+                "measured_at": (
+                    c.data_coordinator.disk_usage.measured_at.isoformat()
+                    if c.data_coordinator.disk_usage
+                    else None
+                ),
+            }
+            for c in controllers
+        ]
+    }
 
 
 ### Register service ###
@@ -142,22 +482,40 @@ def _register_call_service(
     service: str,
     handler,
     supports_response=SupportsResponse.OPTIONAL,
+    schema: vol.Schema = CONTAINER_SERVICE_SCHEMA,
 ) -> None:
     hass.services.async_register(
         DOMAIN,
         service,
         handler,
-        schema=CONTAINER_SERVICE_SCHEMA,
+        schema=schema,
         supports_response=supports_response,
     )
 
 
-def _register_empty_service(hass: HomeAssistant, service: str, handler) -> None:
+@callback
+def _register_bulk_service(hass: HomeAssistant, service: str, handler) -> None:
+    _register_call_service(
+        hass,
+        service,
+        handler,
+        SupportsResponse.OPTIONAL,
+        BULK_CONTAINER_SERVICE_SCHEMA,
+    )
+
+
+@callback
+def _register_host_service(
+    hass: HomeAssistant,
+    service: str,
+    handler,
+    schema: vol.Schema = HOST_JOB_SERVICE_SCHEMA,
+) -> None:
     hass.services.async_register(
         DOMAIN,
         service,
         handler,
-        schema=EMPTY_SERVICE_SCHEMA,
+        schema=schema,
         supports_response=SupportsResponse.OPTIONAL,
     )
 
@@ -173,18 +531,31 @@ def async_register_services(hass: HomeAssistant) -> None:
         schema=CREATE_CONTAINER_SERVICE_SCHEMA,
         supports_response=SupportsResponse.OPTIONAL,
     )
-    _register_call_service(hass, START_SERVICE, _async_handle_start)
-    _register_call_service(hass, STOP_SERVICE, _async_handle_stop)
-    _register_call_service(hass, REMOVE_SERVICE, _async_handle_remove)
+    _register_bulk_service(hass, START_SERVICE, _async_handle_start)
+    _register_bulk_service(hass, STOP_SERVICE, _async_handle_stop)
+    _register_bulk_service(hass, REMOVE_SERVICE, _async_handle_remove)
     _register_call_service(
         hass, LOGS_SERVICE, _async_handle_logs, SupportsResponse.ONLY
     )
-    _register_call_service(hass, RESTART_SERVICE, _async_handle_restart)
-    _register_empty_service(hass, PRUNE_VOLUMES_SERVICE, _async_handle_prune_volumes)
-    _register_empty_service(
+    _register_bulk_service(hass, RESTART_SERVICE, _async_handle_restart)
+    _register_call_service(
+        hass,
+        SEARCH_LOGS_SERVICE,
+        _async_handle_search_logs,
+        SupportsResponse.ONLY,
+        SEARCH_LOGS_SERVICE_SCHEMA,
+    )
+    _register_host_service(hass, PRUNE_VOLUMES_SERVICE, _async_handle_prune_volumes)
+    _register_host_service(
         hass, PRUNE_CONTAINERS_SERVICE, _async_handle_prune_containers
     )
-    _register_empty_service(hass, PRUNE_IMAGES_SERVICE, _async_handle_prune_images)
+    _register_host_service(hass, PRUNE_IMAGES_SERVICE, _async_handle_prune_images)
+    _register_host_service(
+        hass,
+        REFRESH_DISK_USAGE_SERVICE,
+        _async_handle_refresh_disk_usage,
+        HOST_SERVICE_SCHEMA,
+    )
 
 
 @callback
@@ -198,3 +569,5 @@ def async_remove_services(hass: HomeAssistant) -> None:
     hass.services.async_remove(DOMAIN, PRUNE_VOLUMES_SERVICE)
     hass.services.async_remove(DOMAIN, PRUNE_CONTAINERS_SERVICE)
     hass.services.async_remove(DOMAIN, PRUNE_IMAGES_SERVICE)
+    hass.services.async_remove(DOMAIN, REFRESH_DISK_USAGE_SERVICE)
+    hass.services.async_remove(DOMAIN, SEARCH_LOGS_SERVICE)
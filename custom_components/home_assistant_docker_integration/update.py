@@ -4,14 +4,16 @@ from homeassistant.components.update import (
     UpdateEntity,
     UpdateEntityFeature,
 )
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
-from ._docker_api import DockerContainerInfo
+from ._docker_api import DockerContainerInfo, DockerPullProgress
+from ._docker_jobs import DockerJob
 from .coordinator import (
     DockerConfigEntry,
     DockerContainerVersionUpdateCoordinator,
+    DockerDataUpdateCoordinator,
     auto_add_containers_devices,
 )
 from .entity import create_containers_device_info, get_unique_id
@@ -30,7 +32,7 @@ async def async_setup_entry(
         entry,
         async_add_entities,
         lambda id, coordinator: DockerContainerUpdate(
-            update_coordinator, coordinator.data.containers.get(id)
+            update_coordinator, coordinator, coordinator.data.containers.get(id)
         ),
     )
 
@@ -38,7 +40,9 @@ async def async_setup_entry(
 class DockerContainerUpdate(
     CoordinatorEntity[DockerContainerVersionUpdateCoordinator], UpdateEntity
 ):
-    _attr_supported_features = UpdateEntityFeature.INSTALL
+    _attr_supported_features = (
+        UpdateEntityFeature.INSTALL | UpdateEntityFeature.PROGRESS
+    )
     _attr_device_class = UpdateDeviceClass.FIRMWARE
     _attr_has_entity_name = True
     _attr_icon = "mdi:docker"
@@ -46,6 +50,7 @@ class DockerContainerUpdate(
     def __init__(
         self,
         coordinator: DockerContainerVersionUpdateCoordinator,
+        data_coordinator: DockerDataUpdateCoordinator,
         device: DockerContainerInfo,
     ) -> None:
         """Initialize the container power switch."""
@@ -53,11 +58,15 @@ class DockerContainerUpdate(
 
         self._attr_name = "container update"
         self._attr_title = "New container " + device.name
-        self._attr_unique_id = get_unique_id(device.short_id, "containers", "update")
-        self._attr_device_info = create_containers_device_info(device, coordinator)
+        self._attr_unique_id = get_unique_id(
+            device.short_id, "containers", "update", data_coordinator.scope
+        )
+        self._attr_device_info = create_containers_device_info(device, data_coordinator)
 
         self._container_id = device.id
+        self._container_name = device.name
         self._key = device.image_name
+        self._job_id: str | None = None
 
         self.coordinator = coordinator
         self.entity_id = f"{UPDATE_DOMAIN}.{self._attr_unique_id}"
@@ -74,5 +83,51 @@ class DockerContainerUpdate(
     def latest_version(self) -> str | None:
         return self.coordinator.data.get(self._key).new_ver
 
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            self.coordinator.config_entry.runtime_data.jobs.add_listener(
+                self._async_job_changed
+            )
+        )
+
     async def async_install(self, version: str | None, backup: bool, **kwargs) -> None:
-        await self.coordinator.api.async_container_update(self._container_id)
+        """Start the update as a job, it waits for the other jobs on the container."""
+        # a pre-pulled image is already local, only recreate the container
+        version = self.coordinator.data.get(self._key)
+        pull = version is None or not version.pre_pulled
+        jobs = self.coordinator.config_entry.runtime_data.jobs
+
+        async def update(job: DockerJob) -> dict:
+            @callback
+            def pull_progress(progress: DockerPullProgress) -> None:
+                jobs.set_progress(job, progress.percentage)
+
+            downtime = await self.coordinator.api.async_container_update(
+                self._container_id, pull_progress, pull=pull
+            )
+            # the tag now points at the running image
+            self.coordinator.async_forget_image(self._key)
+            return {"downtime": downtime}
+
+        self._attr_in_progress = True
+        self._attr_update_percentage = None
+        self.async_write_ha_state()
+        self._job_id = jobs.submit("update", update, [self._container_name]).id
+
+    @callback
+    def _async_job_changed(self, job: DockerJob) -> None:
+        if job.id != self._job_id:
+            return
+
+        self._attr_update_percentage = job.progress
+        if job.finished:
+            self._job_id = None
+            self._attr_in_progress = False
+            self._attr_update_percentage = None
+            downtime = (job.result or {}).get("downtime")
+            if downtime is not None:
+                self._attr_extra_state_attributes = {
+                    "last_update_downtime": round(downtime, 1)
+                }
+        self.async_write_ha_state()
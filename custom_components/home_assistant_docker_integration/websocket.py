@@ -0,0 +1,553 @@
+import asyncio
+import heapq
+import re
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+import voluptuous as vol
+from homeassistant.components import websocket_api
+from homeassistant.core import HomeAssistant, callback
+
+from ._docker_api import DockerEventStream, select_containers
+from ._docker_jobs import DockerJob
+from ._docker_logs import (
+    DockerLogSearch,
+    async_search_logs,
+    log_sort_key,
+    split_log_lines,
+    split_log_timestamp,
+)
+from ._docker_metrics import METRICS_RESOLUTIONS
+from .const import _LOGGER, DOMAIN
+from .coordinator import DockerConfigEntry, ServiceController
+
+# chunks buffered per subscription, a slow client stops reading the docker stream
+LOG_QUEUE_SIZE = 256
+# seconds lines are collected before they are sent as one message
+LOG_BATCH_INTERVAL = 0.1
+LOG_BATCH_MAX_LINES = 1000
+# lines buffered per container of a merged subscription
+MERGE_QUEUE_SIZE = 256
+# a line is emitted once it is older than this even when a stream is quiet
+MERGE_DELAY = timedelta(seconds=1)
+
+
+@callback
+def _get_controllers(hass: HomeAssistant) -> list[ServiceController]:
+    entries: list[DockerConfigEntry] = hass.config_entries.async_loaded_entries(DOMAIN)
+    return [entry.runtime_data for entry in entries]
+
+
+@callback
+def _get_controller(
+    hass: HomeAssistant, container_id: str | None = None
+) -> ServiceController | None:
+    """The controller of the host running the container, else the first."""
+    controllers = _get_controllers(hass)
+    if container_id:
+        for controller in controllers:
+            containers = controller.data_coordinator.data.containers
+            if select_containers(containers, [container_id]):
+                return controller
+
+    return controllers[0] if controllers else None
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): f"{DOMAIN}/logs/subscribe",
+        vol.Required("container_id"): str,
+        vol.Optional("since"): int,
+        vol.Optional("timestamps", default=False): bool,
+        vol.Optional("tail", default=100): vol.All(int, vol.Range(min=0)),
+    }
+)
+@websocket_api.require_admin
+@websocket_api.async_response
+async def websocket_subscribe_logs(
+    hass: HomeAssistant,
+    connection: websocket_api.ActiveConnection,
+    msg: dict[str, Any],
+) -> None:
+    """Follow the container logs, pushing the new lines in batches."""
+    controller = _get_controller(hass, msg["container_id"])
+    if not controller:
+        connection.send_error(msg["id"], "not_loaded", "Docker is not loaded")
+        return
+
+    try:
+        stream = await controller.api.async_container_logs_stream(
+            msg["container_id"],
+            since=msg.get("since"),
+            timestamps=msg["timestamps"],
+            tail=msg["tail"],
+        )
+    except Exception as e:
+        connection.send_error(msg["id"], "logs_failed", str(e))
+        return
+
+    task = hass.async_create_background_task(
+        _async_forward_logs(connection, msg["id"], stream),
+        name=f"{DOMAIN} logs {msg['container_id']}",
+    )
+
+    @callback
+    def unsubscribe() -> None:
+        stream.close()
+        task.cancel()
+
+    connection.subscriptions[msg["id"]] = unsubscribe
+    connection.send_result(msg["id"])
+
+
+async def _async_forward_logs(
+    connection: websocket_api.ActiveConnection,
+    msg_id: int,
+    stream: DockerEventStream,
+) -> None:
+    queue = asyncio.Queue[bytes | None](LOG_QUEUE_SIZE)
+
+    async def read() -> None:
+        try:
+            async for chunk in stream:
+                await queue.put(chunk)
+        except Exception as e:
+            _LOGGER.debug(f"Log stream failed: {e}")
+        await queue.put(None)
+
+    reader = asyncio.create_task(read())
+    pending = b""
+    try:
+        ended = False
+        while not ended:
+            chunks = [await queue.get()]
+            # collect what arrives within one batch interval
+            await asyncio.sleep(LOG_BATCH_INTERVAL)
+            while not queue.empty():
+                chunks.append(queue.get_nowait())
+
+            ended = chunks[-1] is None
+            lines, pending = split_log_lines(pending, [c for c in chunks if c])
+            for i in range(0, len(lines), LOG_BATCH_MAX_LINES):
+                connection.send_message(
+                    websocket_api.event_message(
+                        msg_id, {"lines": lines[i : i + LOG_BATCH_MAX_LINES]}
+                    )
+                )
+
+        if pending:
+            connection.send_message(
+                websocket_api.event_message(
+                    msg_id, {"lines": split_log_lines(pending, [b"\n"])[0]}
+                )
+            )
+        connection.send_message(websocket_api.event_message(msg_id, {"end": True}))
+    finally:
+        reader.cancel()
+        stream.close()
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): f"{DOMAIN}/logs/subscribe_merged",
+        vol.Optional("container_ids"): [str],
+        vol.Optional("compose_project"): str,
+        vol.Optional("since"): int,
+        vol.Optional("tail", default=100): vol.All(int, vol.Range(min=0)),
+    }
+)
+@websocket_api.require_admin
+@websocket_api.async_response
+async def websocket_subscribe_merged_logs(
+    hass: HomeAssistant,
+    connection: websocket_api.ActiveConnection,
+    msg: dict[str, Any],
+) -> None:
+    """
+    Follow the logs of several containers merged in time order, every line is
+    sent as [container name, timestamp, text]. The containers are selected on
+    every host, with several hosts the name is prefixed by the host name.
+    """
+    controllers = _get_controllers(hass)
+    if not controllers:
+        connection.send_error(msg["id"], "not_loaded", "Docker is not loaded")
+        return
+
+    containers = [
+        (controller, container)
+        for controller in controllers
+        for container in select_containers(
+            controller.data_coordinator.data.containers,
+            msg.get("container_ids"),
+            msg.get("compose_project"),
+        )
+    ]
+    if not containers or not (msg.get("container_ids") or msg.get("compose_project")):
+        connection.send_error(msg["id"], "not_found", "No containers selected")
+        return
+
+    opened = await asyncio.gather(
+        *(
+            controller.api.async_container_logs_stream(
+                c.id, since=msg.get("since"), timestamps=True, tail=msg["tail"]
+            )
+            for controller, c in containers
+        ),
+        return_exceptions=True,
+    )
+    streams = dict(
+        (f"{controller.name}/{c.name}" if len(controllers) > 1 else c.name, stream)
+        for (controller, c), stream in zip(containers, opened)
+        if not isinstance(stream, BaseException)
+    )
+    if not streams:
+        connection.send_error(msg["id"], "logs_failed", str(opened[0]))
+        return
+
+    task = hass.async_create_background_task(
+        _async_forward_merged_logs(connection, msg["id"], streams),
+        name=f"{DOMAIN} merged logs",
+    )
+
+    @callback
+    def unsubscribe() -> None:
+        for stream in streams.values():
+            stream.close()
+        task.cancel()
+
+    connection.subscriptions[msg["id"]] = unsubscribe
+    connection.send_result(msg["id"])
+
+
+async def _async_forward_merged_logs(
+    connection: websocket_api.ActiveConnection,
+    msg_id: int,
+    streams: dict[str, DockerEventStream],
+) -> None:
+    """
+    Bounded k-way merge: the heap holds at most one head line per container
+    and each container has a bounded queue. The smallest head is emitted when
+    every open stream has a head, or once it is older than the merge delay so
+    a quiet container does not hold back the others.
+    """
+    queues = dict(
+        (name, asyncio.Queue[tuple[str, str] | None](MERGE_QUEUE_SIZE))
+        for name in streams
+    )
+
+    async def read(name: str, stream: DockerEventStream) -> None:
+        queue = queues[name]
+        pending = b""
+        try:
+            async for chunk in stream:
+                lines, pending = split_log_lines(pending, [chunk])
+                for line in lines:
+                    await queue.put(split_log_timestamp(line))
+        except Exception as e:
+            _LOGGER.debug(f"Log stream of {name} failed: {e}")
+        await queue.put(None)
+
+    readers = [asyncio.create_task(read(n, s)) for n, s in streams.items()]
+    heads: list[tuple[str, int, str, str, str]] = []
+    # open streams without a line in the heap
+    waiting = set(streams)
+    sequence = 0
+
+    def take(name: str) -> None:
+        nonlocal sequence
+        try:
+            item = queues[name].get_nowait()
+        except asyncio.QueueEmpty:
+            waiting.add(name)
+            return
+
+        if item is not None:
+            sequence += 1
+            timestamp, text = item
+            heapq.heappush(
+                heads, (log_sort_key(timestamp), sequence, name, timestamp, text)
+            )
+
+    try:
+        # give every stream the time to send its tail before merging
+        await asyncio.sleep(MERGE_DELAY.total_seconds())
+        while waiting or heads:
+            for name in list(waiting):
+                waiting.discard(name)
+                take(name)
+
+            watermark = log_sort_key(
+                (datetime.now(timezone.utc) - MERGE_DELAY).strftime(
+                    "%Y-%m-%dT%H:%M:%S.%f"
+                )
+            )
+            lines = []
+            while heads and (not waiting or heads[0][0] <= watermark):
+                _, _, name, timestamp, text = heapq.heappop(heads)
+                lines.append([name, timestamp, text])
+                take(name)
+
+            for i in range(0, len(lines), LOG_BATCH_MAX_LINES):
+                connection.send_message(
+                    websocket_api.event_message(
+                        msg_id, {"lines": lines[i : i + LOG_BATCH_MAX_LINES]}
+                    )
+                )
+
+            if waiting or heads:
+                await asyncio.sleep(LOG_BATCH_INTERVAL)
+
+        connection.send_message(websocket_api.event_message(msg_id, {"end": True}))
+    finally:
+        for reader in readers:
+            reader.cancel()
+        for stream in streams.values():
+            stream.close()
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): f"{DOMAIN}/logs/search",
+        vol.Required("container_id"): str,
+        vol.Required("pattern"): str,
+        vol.Optional("regex", default=False): bool,
+        vol.Optional("ignore_case", default=False): bool,
+        vol.Optional("context", default=2): vol.All(int, vol.Range(min=0, max=50)),
+        vol.Optional("max_results", default=100): vol.All(
+            int, vol.Range(min=1, max=1000)
+        ),
+        vol.Optional("since"): int,
+        vol.Optional("until"): int,
+        vol.Optional("timestamps", default=False): bool,
+    }
+)
+@websocket_api.require_admin
+@websocket_api.async_response
+async def websocket_search_logs(
+    hass: HomeAssistant,
+    connection: websocket_api.ActiveConnection,
+    msg: dict[str, Any],
+) -> None:
+    """Search the container log, returning the matching lines with context."""
+    controller = _get_controller(hass, msg["container_id"])
+    if not controller:
+        connection.send_error(msg["id"], "not_loaded", "Docker is not loaded")
+        return
+
+    try:
+        search = DockerLogSearch(
+            msg["pattern"],
+            msg["regex"],
+            msg["ignore_case"],
+            msg["context"],
+            msg["max_results"],
+        )
+    except re.error as e:
+        connection.send_error(msg["id"], "invalid_format", f"Invalid pattern: {e}")
+        return
+
+    try:
+        result = await async_search_logs(
+            controller.api,
+            msg["container_id"],
+            search,
+            msg.get("since"),
+            msg.get("until"),
+            msg["timestamps"],
+        )
+    except Exception as e:
+        connection.send_error(msg["id"], "logs_failed", str(e))
+        return
+
+    connection.send_result(msg["id"], result)
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): f"{DOMAIN}/metrics/history",
+        vol.Optional("container_ids"): [str],
+        vol.Optional("resolution", default=10): vol.In(
+            [step for step, _ in METRICS_RESOLUTIONS]
+        ),
+        # the newest slots only, a sparkline does not need the full day
+        vol.Optional("points"): vol.All(int, vol.Range(min=1)),
+    }
+)
+@websocket_api.require_admin
+@callback
+def websocket_metrics_history(
+    hass: HomeAssistant,
+    connection: websocket_api.ActiveConnection,
+    msg: dict[str, Any],
+) -> None:
+    """
+    Return the recent resource usage of the sampled containers, per container
+    the start timestamp, the step and the cpu, memory, rx and tx series.
+    """
+    controllers = _get_controllers(hass)
+    if not controllers:
+        connection.send_error(msg["id"], "not_loaded", "Docker is not loaded")
+        return
+
+    ids = msg.get("container_ids")
+    connection.send_result(
+        msg["id"],
+        {
+            "containers": dict(
+                (
+                    short_id,
+                    metrics.rings[msg["resolution"]].to_dict(msg.get("points")),
+                )
+                for controller in controllers
+                for short_id, metrics in controller.stats_coordinator.history.items()
+                if ids is None or short_id in ids
+            )
+        },
+    )
+
+
+@websocket_api.websocket_command({vol.Required("type"): f"{DOMAIN}/executor/stats"})
+@websocket_api.require_admin
+@callback
+def websocket_executor_stats(
+    hass: HomeAssistant,
+    connection: websocket_api.ActiveConnection,
+    msg: dict[str, Any],
+) -> None:
+    """
+    Return the worker lanes of every host by config entry id, per lane the
+    queue depth and per operation type the count, errors and the mean and max
+    wait and run times.
+    """
+    connection.send_result(
+        msg["id"],
+        {
+            "hosts": dict(
+                (
+                    controller.entry_id,
+                    {"name": controller.name, **controller.api.executor.to_dict()},
+                )
+                for controller in _get_controllers(hass)
+            )
+        },
+    )
+
+
+@websocket_api.websocket_command({vol.Required("type"): f"{DOMAIN}/jobs/subscribe"})
+@websocket_api.require_admin
+@callback
+def websocket_subscribe_jobs(
+    hass: HomeAssistant,
+    connection: websocket_api.ActiveConnection,
+    msg: dict[str, Any],
+) -> None:
+    """
+    Follow the jobs of every host, the first event holds the known jobs and
+    every later one a job which changed its state or progress.
+    """
+    controllers = _get_controllers(hass)
+    if not controllers:
+        connection.send_error(msg["id"], "not_loaded", "Docker is not loaded")
+        return
+
+    @callback
+    def forward(job: DockerJob) -> None:
+        connection.send_message(
+            websocket_api.event_message(msg["id"], {"job": job.to_dict()})
+        )
+
+    remove_listeners = [c.jobs.add_listener(forward) for c in controllers]
+
+    @callback
+    def unsubscribe() -> None:
+        for remove_listener in remove_listeners:
+            remove_listener()
+
+    connection.subscriptions[msg["id"]] = unsubscribe
+    connection.send_result(msg["id"])
+    connection.send_message(
+        websocket_api.event_message(
+            msg["id"],
+            {
+                "jobs": [
+                    job.to_dict() for c in controllers for job in c.jobs.jobs.values()
+                ]
+            },
+        )
+    )
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): f"{DOMAIN}/jobs/cancel",
+        vol.Required("job_id"): str,
+    }
+)
+@websocket_api.require_admin
+@callback
+def websocket_cancel_job(
+    hass: HomeAssistant,
+    connection: websocket_api.ActiveConnection,
+    msg: dict[str, Any],
+) -> None:
+    """Cancel a queued or running job, the cancelled state goes to the subscribers."""
+    for controller in _get_controllers(hass):
+        if msg["job_id"] in controller.jobs.jobs:
+            connection.send_result(
+                msg["id"], {"cancelled": controller.jobs.cancel(msg["job_id"])}
+            )
+            return
+
+    connection.send_error(msg["id"], "not_found", "Unknown job")
+
+
+@websocket_api.websocket_command({vol.Required("type"): f"{DOMAIN}/watch"})
+@websocket_api.require_admin
+@callback
+def websocket_watch(
+    hass: HomeAssistant,
+    connection: websocket_api.ActiveConnection,
+    msg: dict[str, Any],
+) -> None:
+    """
+    Held by a visible dashboard, the docker state is refreshed sub-second.
+    The watch ends when a host unloads, a reload (options change) replaces
+    the coordinators and the client subscribes again.
+    """
+    controllers = _get_controllers(hass)
+    if not controllers:
+        connection.send_error(msg["id"], "not_loaded", "Docker is not loaded")
+        return
+
+    remove_watchers = [c.data_coordinator.async_add_watcher() for c in controllers]
+
+    @callback
+    def unsubscribe() -> None:
+        while remove_watchers:
+            remove_watchers.pop()()
+
+    @callback
+    def end() -> None:
+        if connection.subscriptions.pop(msg["id"], None) is None:
+            return
+        unsubscribe()
+        connection.send_message(websocket_api.event_message(msg["id"], {"end": True}))
+
+    for controller in controllers:
+        controller.data_coordinator.config_entry.async_on_unload(end)
+
+    connection.subscriptions[msg["id"]] = unsubscribe
+    connection.send_result(msg["id"])
+
+
+@callback
+def async_register_websocket_commands(hass: HomeAssistant) -> None:
+    """Register the websocket commands (once, they are not unregistered)."""
+    websocket_api.async_register_command(hass, websocket_subscribe_logs)
+    websocket_api.async_register_command(hass, websocket_subscribe_merged_logs)
+    websocket_api.async_register_command(hass, websocket_search_logs)
+    websocket_api.async_register_command(hass, websocket_metrics_history)
+    websocket_api.async_register_command(hass, websocket_executor_stats)
+    websocket_api.async_register_command(hass, websocket_subscribe_jobs)
+    websocket_api.async_register_command(hass, websocket_cancel_job)
+    websocket_api.async_register_command(hass, websocket_watch)
@@ -10,6 +10,12 @@ import {
 } from "https://unpkg.com/lit-element@4.2.1/lit-element.js?module";
 
 const DOMAIN = "docker_integration";
+const MAX_LOG_LINES = 2000;
+const METRICS_REFRESH_INTERVAL = 10000;
+// 10 minutes of the 10 second resolution
+const METRICS_POINTS = 60;
+// ms until a watch ended by a reloading host is held again
+const WATCH_RESUBSCRIBE_DELAY = 2000;
 
 function _assert_element_config(config, config_keys) {
   if (config_keys) {
@@ -47,6 +53,38 @@ function toList(value) {
     : undefined;
 }
 
+// shown by the integration until the action on the container is confirmed
+const TRANSITIONAL_STATES = ["starting", "stopping", "restarting", "removing"];
+
+function containerStatus(state) {
+  const { started_at, health, exit_code } = state.attributes;
+  if (state.state === "running" && started_at) {
+    const since = new Date(started_at).toLocaleString();
+    return health ? `Up since ${since} (${health})` : `Up since ${since}`;
+  }
+  if (state.state === "exited" && exit_code !== null && exit_code !== undefined) {
+    return `Exited (${exit_code})`;
+  }
+  return state.state;
+}
+
+function sparkline(values) {
+  const points = (values || [])
+    .map((value, index) => [index, value])
+    .filter(([, value]) => value !== null);
+  if (points.length < 2) return nothing;
+
+  const max = Math.max(1, ...points.map(([, value]) => value));
+  const step = 100 / (values.length - 1);
+  return html`
+    <svg class="sparkline" viewBox="0 0 100 20" preserveAspectRatio="none">
+      <polyline
+        points=${points.map(([index, value]) => `${index * step},${20 - (value / max) * 20}`).join(" ")}
+      ></polyline>
+    </svg>
+  `;
+}
+
 const d_call = (hass, service, data) => hass.callService(DOMAIN, service, data);
 const r_badge = (state, on, off) => html`<ha-assist-chip class="${state ? "badge-on" : "badge-off"}" .label=${state ? on : off}></ha-assist-chip>`;
 
@@ -139,6 +177,12 @@ class DockerAddDialog extends BaseDialogLitElement {
         },
       },
     },
+    {
+      // required by the service when several docker hosts are loaded
+      name: "host",
+      label: "Host",
+      selector: { config_entry: { integration: DOMAIN } },
+    },
   ];
 
   get heading() { return "Add Container"; }
@@ -172,6 +216,7 @@ class DockerAddDialog extends BaseDialogLitElement {
         ports: portsList,
         volumes: volumesList,
         restart_policy: data.restart_policy || undefined,
+        host: data.host || undefined,
       });
       this.closeDialog();
     };
@@ -215,30 +260,48 @@ class DockerLogsDialog extends BaseDialogLitElement {
 
   get heading() { return "Container Logs"; }
   _logs = "Loading...";
+  _lines = [];
+  _unsubscribe = undefined;
 
-  async async_fetch_logs(id) {
+  async async_subscribe_logs() {
     try {
-      const response = await this.hass.callService(
-        "docker_integration",
-        "logs",
-        { id: this._dialogParams.id },
-        /** target */undefined,
-        /** notifyOnError  */ true,
-        /** returnResponse */ true
+      const project = this._dialogParams.project;
+      this._unsubscribe = await this.hass.connection.subscribeMessage(
+        (message) => this._append_lines(message),
+        project
+          // one time ordered stream of the whole compose project
+          ? { type: `${DOMAIN}/logs/subscribe_merged`, compose_project: project, tail: 100 }
+          : { type: `${DOMAIN}/logs/subscribe`, container_id: this._dialogParams.id, tail: 100 }
       );
-      this._logs = response.response.logs;
     } catch (e) {
       this._logs = "Error fetching logs: " + e.message;
     }
   }
 
+  _append_lines(message) {
+    if (!message.lines) return;
+    const lines = this._dialogParams.project
+      ? message.lines.map(([name, , text]) => `[${name}] ${text}`)
+      : message.lines;
+    // keep the dialog bounded for noisy containers
+    this._lines = this._lines.concat(lines).slice(-MAX_LOG_LINES);
+    this._logs = this._lines.join("\n");
+  }
+
   async showDialog(dialogParams) {
     await super.showDialog(dialogParams);
-    this.async_fetch_logs();
+    this._lines = [];
+    this.async_subscribe_logs();
   }
 
   closeDialog() {
+    // closing the subscription closes the docker log stream
+    if (this._unsubscribe) {
+      this._unsubscribe();
+      this._unsubscribe = undefined;
+    }
     this._logs = undefined;
+    this._lines = [];
     super.closeDialog();
   }
 
@@ -289,9 +352,10 @@ function confirmDialog(element, title, message, callback) {
 }
 
 function find_entities_by_model(devices, entities, model) {
-  const device_id = devices.find((it) => it.model == model).id;
+  // one device per docker host
+  const device_ids = new Set(devices.filter((it) => it.model == model).map((it) => it.id));
   return entities
-    .filter((it) => it.device_id === device_id)
+    .filter((it) => device_ids.has(it.device_id))
     .map((it) => ({ name: it.name || it.original_name, entity_id: it.entity_id }));
 }
 
@@ -376,6 +440,45 @@ class HaDiGrid extends BaseFullWidthLitElement {
     }
   `;
 
+  connectedCallback() {
+    super.connectedCallback();
+    this._onVisibilityChange = () => this._updateWatch();
+    document.addEventListener("visibilitychange", this._onVisibilityChange);
+    this._updateWatch();
+  }
+
+  disconnectedCallback() {
+    super.disconnectedCallback();
+    document.removeEventListener("visibilitychange", this._onVisibilityChange);
+    this._updateWatch();
+  }
+
+  updated(changedProps) {
+    if (changedProps.has("hass") && !changedProps.get("hass")) {
+      this._updateWatch();
+    }
+  }
+
+  /** Hold the watch subscription (fast refresh) only while the grid is visible. */
+  _updateWatch() {
+    const visible = this.isConnected && document.visibilityState === "visible";
+    if (visible && !this._watch && this.hass) {
+      const watch = this.hass.connection.subscribeMessage((event) => {
+        // a host was reloaded, watch its new coordinators
+        if (event.end && this._watch === watch) {
+          watch.then((unsubscribe) => unsubscribe()).catch(() => { });
+          this._watch = undefined;
+          setTimeout(() => this._updateWatch(), WATCH_RESUBSCRIBE_DELAY);
+        }
+      }, { type: `${DOMAIN}/watch` });
+      this._watch = watch;
+      this._watch.catch((e) => console.error("Failed to watch docker", e));
+    } else if (!visible && this._watch) {
+      this._watch.then((unsubscribe) => unsubscribe()).catch(() => { });
+      this._watch = undefined;
+    }
+  }
+
   getItems() { return this.config?.items || []; }
   groupBy() { return null; }
   renderControls() { return nothing; }
@@ -561,6 +664,7 @@ class DockerImageRow extends HaDiRow {
         <div role="cell">${this.config.name}</div>
         <div role="cell">${r_badge(used, "In use", "Not used")}</div>
         <div role="cell">${state.attributes.description}</div>
+        <div role="cell">${state.attributes.size}</div>
     `;
   }
 }
@@ -575,8 +679,8 @@ class DockerImageGrid extends HaDiGrid {
 
   showInactiveContainers = false;
   getItems = () => filter_items(this.config.items, this.showInactiveContainers, this.hass, "on");
-  gridHeaders = ["Name", "Used", "Description"];
-  columnWidths = "32% 82px 40%";
+  gridHeaders = ["Name", "Used", "Description", "Size"];
+  columnWidths = "32% 82px 40% 10%";
 
   renderControls() {
     const onShowInactiveContainers = (event) => {
@@ -609,14 +713,37 @@ class DockerContainerGrid extends HaDiGrid {
     return {
       ...BaseFullWidthLitElement.properties,
       showInactiveContainers: { state: true, type: Boolean },
+      _metrics: { state: true },
     };
   }
 
   showInactiveContainers = false;
+  _metrics = {};
+
+  connectedCallback() {
+    super.connectedCallback();
+    this._fetchMetrics();
+    this._metricsTimer = setInterval(() => this._fetchMetrics(), METRICS_REFRESH_INTERVAL);
+  }
+
+  disconnectedCallback() {
+    super.disconnectedCallback();
+    clearInterval(this._metricsTimer);
+  }
+
+  async _fetchMetrics() {
+    if (!this.hass) return;
+    try {
+      const result = await this.hass.callWS({ type: `${DOMAIN}/metrics/history`, resolution: 10, points: METRICS_POINTS });
+      this._metrics = result.containers;
+    } catch (e) {
+      console.error("Failed to fetch the container metrics", e);
+    }
+  }
   getItems = () => filter_items(this.config.items, this.showInactiveContainers, this.hass, "running");
   groupBy = () => this.getItems().map(item => this.hass.states[item.entity_id]?.attributes.project || null);
-  gridHeaders = ["", "State", "Status", "Ports", "Actions"];
-  columnWidths = "20% 100px 150px auto 60px";
+  gridHeaders = ["", "State", "Status", "CPU", "Ports", "Actions"];
+  columnWidths = "20% 100px 220px 100px auto 60px";
 
   renderControls() {
     const onShowInactiveContainers = (event) => {
@@ -642,39 +769,52 @@ class DockerContainerGrid extends HaDiGrid {
   }
 
   renderRow(item) {
-    return html`<docker-container-row .hass=${this.hass} .config=${item}></docker-container-row>`;
+    const sid = this.hass.states[item.entity_id]?.attributes.sid;
+    return html`<docker-container-row .hass=${this.hass} .config=${item} .metrics=${this._metrics[sid]}></docker-container-row>`;
   }
 }
 
 class DockerContainerRow extends HaDiRow {
+  static get properties() {
+    return {
+      ...BaseFullWidthLitElement.properties,
+      metrics: { attribute: false },
+    };
+  }
+
+  shouldUpdate(changedProps) {
+    return changedProps.has("metrics") || super.shouldUpdate(changedProps);
+  }
+
   renderRow() {
     const state = this.hass.states[this.config.entity_id];
     const id = state.attributes.sid;
     const isRunning = state.state === "running";
+    const isBusy = TRANSITIONAL_STATES.includes(state.state);
     const actions = [
       {
         label: "Start",
         icon: "mdi:play",
         action: () => d_call(this.hass, 'start', { id }),
-        visible: !isRunning,
+        visible: !isRunning && !isBusy,
       },
       {
         label: "Stop",
         icon: "mdi:stop",
         action: () => confirmDialog(this, "Stop Container", "Are you sure you want to stop this container?", () => d_call(this.hass, 'stop', { id })),
-        visible: isRunning,
+        visible: isRunning && !isBusy,
       },
       {
         label: "Restart",
         icon: "mdi:restart",
         action: () => d_call(this.hass, 'restart', { id }),
-        visible: isRunning,
+        visible: isRunning && !isBusy,
       },
       {
         label: "Remove",
         icon: "mdi:delete",
         action: () => confirmDialog(this, "Remove Container", "Are you sure you want to remove this container?", () => d_call(this.hass, 'remove', { id })),
-        visible: !isRunning,
+        visible: !isRunning && !isBusy,
       },
       {
         label: "Logs",
@@ -682,6 +822,12 @@ class DockerContainerRow extends HaDiRow {
         action: () => showDialog(this, "docker-logs-dialog", { id }),
         visible: true,
       },
+      {
+        label: "Project logs",
+        icon: "mdi:text-box-multiple",
+        action: () => showDialog(this, "docker-logs-dialog", { project: state.attributes.project }),
+        visible: !!state.attributes.project,
+      },
     ].filter((a) => a.visible);
 
     return html`
@@ -690,7 +836,8 @@ class DockerContainerRow extends HaDiRow {
           <div class="card-id">${state.attributes.sid}</div>
         </div>
         <div role="cell">${r_badge(isRunning, "Running", "Not running")}</div>
-        <div role="cell">${state.attributes.status}</div>
+        <div role="cell">${containerStatus(state)}</div>
+        <div role="cell" title="CPU %">${sparkline(this.metrics?.cpu)}</div>
         <div role="cell">
           <ha-chip-set class="ports">
             ${state.attributes.ports ? state.attributes.ports.map((port) => html`
@@ -725,10 +872,26 @@ class DockerContainerRow extends HaDiRow {
         font-size: 12px;
         color: var(--secondary-text-color);
       }
+      .sparkline {
+        width: 100%;
+        height: 20px;
+      }
+      .sparkline polyline {
+        fill: none;
+        stroke: var(--primary-color);
+        stroke-width: 1;
+        vector-effect: non-scaling-stroke;
+      }
     `;
   }
 }
 
+// the device identifier is the short id, prefixed by the scope of a remote host
+function containerEntityId(identifier) {
+  const at = identifier.lastIndexOf("_") + 1;
+  return `sensor.docker_integration_${identifier.slice(0, at)}containers_${identifier.slice(at)}`;
+}
+
 class StrategyViewDockerContainers {
   static async generate(config, hass) {
     const [devices, entities] = await Promise.all([
@@ -739,7 +902,7 @@ class StrategyViewDockerContainers {
     const containers = devices
       .filter((it) => it.model == "container")
       .map((it) => ({ name: it.name, id: it.identifiers[0][1] }))
-      .map((it) => ({ ...it, entity_id: `sensor.docker_integration_containers_${it.id}` }));
+      .map((it) => ({ ...it, entity_id: containerEntityId(it.id) }));
     const volumes = find_entities_by_model(devices, entities, "volume").filter((it) => it.entity_id.startsWith("binary_sensor."));
     const images = find_entities_by_model(devices, entities, "image").filter((it) => it.entity_id.startsWith("binary_sensor."));
 
@@ -40,13 +40,18 @@ class MockedBaseEntity:
 
 class MockedCoordinator[TData]:
     def __init__(self, hass, logger, config_entry, name, update_interval):
+        self.hass = hass
         self.config_entry = config_entry
+        self.update_interval = update_interval
         self.data: TData = None
+        self.last_update_success = True
+        self._listeners = {}
 
 
 class MockedCoordinatorEntity[TCoordinator]:
-    def __init__(self, coordinator: TCoordinator):
+    def __init__(self, coordinator: TCoordinator, context=None):
         self.coordinator = coordinator
+        self.coordinator_context = context
 
 
 class Platform:
@@ -58,6 +63,7 @@ class Platform:
     SENSOR = "sensor"
     NUMBER = "number"
     BUTTON = "button"
+    UPDATE = "update"
 
 
 class DeviceInfo:
@@ -102,6 +108,7 @@ sys.modules["homeassistant.const"].CONF_NAME = "CONF_NAME"
 sys.modules["homeassistant.const"].CONF_PORT = "CONF_PORT"
 sys.modules["homeassistant.const"].CONF_UNIQUE_ID = "CONF_UNIQUE_ID"
 sys.modules["homeassistant.core"] = Mock()
+sys.modules["homeassistant.core"].callback = lambda func: func
 sys.modules["homeassistant.config_entries"] = Mock()
 sys.modules["homeassistant.config_entries"].SOURCE_IMPORT = "SOURCE_IMPORT"
 sys.modules["homeassistant.helpers"] = Mock()
@@ -118,9 +125,13 @@ sys.modules["homeassistant.helpers.update_coordinator"].CoordinatorEntity = (
     MockedCoordinatorEntity
 )
 sys.modules["homeassistant.helpers.event"] = Mock()
+sys.modules["homeassistant.helpers.storage"] = Mock()
 sys.modules["homeassistant.helpers.selector"] = Mock()
 sys.modules["homeassistant.helpers.typing"] = Mock()
 sys.modules["homeassistant.exceptions"] = Mock()
+sys.modules["homeassistant.exceptions"].ConfigEntryNotReady = Exception
+sys.modules["homeassistant.exceptions"].HomeAssistantError = Exception
+sys.modules["homeassistant.util"] = Mock()
 sys.modules["homeassistant.components"] = Mock()
 
 
@@ -195,6 +206,8 @@ sys.modules["homeassistant.components.lovelace.dashboard"] = Mock()
 sys.modules["homeassistant.components.lovelace.resources"] = Mock()
 
 sys.modules["docker"] = Mock()
+sys.modules["docker.auth"] = Mock()
+sys.modules["docker.auth"].resolve_authconfig = lambda config, registry: None
 sys.modules["docker.errors"] = Mock()
 sys.modules["docker.errors"].APIError = Exception
 sys.modules["docker.errors"].ImageNotFound = Exception
@@ -1,4 +1,6 @@
-from dataclasses import dataclass
+import asyncio
+from dataclasses import dataclass, field
+from typing import Any
 
 from custom_components.home_assistant_docker_integration._docker_api import (
     DockerContainerInfo,
@@ -11,12 +13,22 @@ from custom_components.home_assistant_docker_integration._docker_api import (
 @dataclass()
 class MockedConfigEntry:
     entry_id: str
+    runtime_data: Any = None
+    options: dict = field(default_factory=dict)
+    data: dict = field(default_factory=dict)
+    title: str = "Docker"
+
+    def async_create_background_task(self, hass, target, name):
+        # home assistant starts the background tasks eagerly
+        return asyncio.Task(target, loop=asyncio.get_running_loop(), eager_start=True)
 
 
 class MockedDataUpdateCoordinator:
     def __init__(self, entry_id: str):
         self.config_entry = MockedConfigEntry(entry_id)
 
+    scope = ""
+
     data = DockerHostInfo(
         version="20",
         containers_total=2,
@@ -28,6 +40,9 @@ class MockedDataUpdateCoordinator:
         volumes=dict(),
     )
 
+    async def async_run_container_action(self, id: str, state: str, action):
+        await action()
+
     def add_container(self, item: DockerContainerInfo):
         self.data.containers[item.short_id] = item
 
@@ -43,24 +58,30 @@ def create_mocked_container(
     short_id="ab1cd2ef3gh4",
     name="Traefik",
     state="running",
-    status="healthy",
+    started_at=None,
+    health="healthy",
+    exit_code=None,
     image_id="qw11er22ty33ui44",
     image_name="traefik/traefik:latest",
     compose_project=None,
     ports=[],
     mounts=[],
+    labels={},
 ):
     return DockerContainerInfo(
         id=id,
         name=name,
         state=state,
-        status=status,
+        started_at=started_at,
+        health=health,
+        exit_code=exit_code,
         image_id=image_id,
         image_name=image_name,
         compose_project=compose_project,
         short_id=short_id,
         ports=ports,
         mounts=mounts,
+        labels=labels,
     )
 
 
@@ -1,18 +1,35 @@
-from dataclasses import dataclass
-from typing import Any
+import asyncio
+from dataclasses import replace
+
+import time as time_module
+from datetime import datetime, time, timedelta, timezone
 
 import pytest
 
-from custom_components.home_assistant_docker_integration._docker_api import DockerApi
+from custom_components.home_assistant_docker_integration._docker_api import (
+    DockerApi,
+    DockerEventStream,
+    DockerImageUpdateInfo,
+    DockerPullProgress,
+)
+from custom_components.home_assistant_docker_integration.const import (
+    CONF_PRE_PULL,
+    CONF_PRE_PULL_DAILY_BUDGET,
+)
 from custom_components.home_assistant_docker_integration.coordinator import (
+    IDLE_SCAN_INTERVAL,
+    RECONCILE_INTERVAL,
+    WATCH_RECONCILE_INTERVAL,
+    WATCH_SCAN_INTERVAL,
     ServiceController,
+    in_time_window,
+)
+from tests.mocks import (
+    MOCKED_IMAGE,
+    MockedConfigEntry,
+    MockedDataUpdateCoordinator,
+    create_mocked_container,
 )
-
-
-@dataclass()
-class MockedConfigEntry:
-    entry_id: str
-    runtime_data: Any
 
 
 @pytest.mark.asyncio
@@ -25,3 +42,471 @@ async def test__ServiceController_should_init():
     assert ctl.data_coordinator.config_entry == data
     assert ctl.update_coordinator.config_entry == data
     assert isinstance(ctl.data_coordinator.api, DockerApi) is True
+
+
+@pytest.mark.asyncio
+async def test__ServiceController_should_scope_remote_hosts():
+    local = ServiceController(None, MockedConfigEntry("01JABCDEF", None))
+    remote = ServiceController(
+        None,
+        MockedConfigEntry(
+            "01JXYZ123",
+            None,
+            options={"backend": "engine"},
+            data={"host": "ssh://docker@nas"},
+            title="NAS",
+        ),
+    )
+
+    assert local.data_coordinator.scope == ""
+    assert local.name == "Docker Host"
+    assert remote.data_coordinator.scope == "xyz123_"
+    assert remote.name == "NAS"
+    # ssh hosts are reached only through docker-py
+    assert isinstance(remote.api, DockerApi) is True
+    assert remote.api.base_url == "ssh://docker@nas"
+
+
+@pytest.mark.asyncio
+async def test__DockerDataUpdateCoordinator_should_apply_destroy_event():
+    data = MockedConfigEntry("20", None)
+    ctl = ServiceController(None, data)
+    data.runtime_data = ctl
+
+    image = replace(MOCKED_IMAGE)
+    container = create_mocked_container(image_id=image.id)
+    coordinator = ctl.data_coordinator
+    coordinator.data = replace(
+        MockedDataUpdateCoordinator.data,
+        containers={container.short_id: container},
+        images={image.id[:12]: image},
+        volumes={},
+    )
+
+    await coordinator._async_handle_event(
+        {"Type": "container", "Action": "destroy", "Actor": {"ID": container.id}}
+    )
+
+    assert container.short_id not in coordinator.data.containers
+    assert coordinator.data.containers_total == 0
+    assert coordinator.data.images[image.id[:12]].in_use is False
+
+
+@pytest.mark.asyncio
+async def test__DockerDataUpdateCoordinator_should_refresh_only_the_acted_container():
+    data = MockedConfigEntry("27", None)
+    ctl = ServiceController(None, data)
+    data.runtime_data = ctl
+
+    web = create_mocked_container(id="a1" * 10, short_id="a1" * 6, state="running")
+    db = create_mocked_container(id="b2" * 10, short_id="b2" * 6, state="running")
+    coordinator = ctl.data_coordinator
+    coordinator.data = replace(
+        MockedDataUpdateCoordinator.data,
+        containers={web.short_id: web, db.short_id: db},
+        images={},
+        volumes={},
+    )
+    states = []
+
+    def web_changed():
+        states.append(coordinator.data.containers[web.short_id].state)
+
+    coordinator._listeners = {
+        1: (web_changed, ("containers", web.short_id)),
+        2: (lambda: states.append("db"), ("containers", db.short_id)),
+    }
+
+    fetched = []
+    stopped = False
+    gate = asyncio.Event()
+
+    async def fetch_container(id, previous):
+        fetched.append(id)
+        state = "exited" if stopped else "running"
+        await gate.wait()
+        return replace(previous, state=state)
+
+    async def stop():
+        nonlocal stopped
+        stopped = True
+
+    coordinator.api.async_fetch_container = fetch_container
+
+    # an inspect is running when the container is stopped
+    refresh = asyncio.ensure_future(coordinator.async_refresh_container(web.id))
+    await asyncio.sleep(0)
+    action = asyncio.ensure_future(
+        coordinator.async_run_container_action(web.id, "stopping", stop)
+    )
+    again = asyncio.ensure_future(coordinator.async_refresh_container(web.id))
+    await asyncio.sleep(0)
+    assert states == ["stopping"]
+
+    gate.set()
+    await asyncio.gather(refresh, action, again)
+
+    # one more inspect for both requests, the stale running one is not shown
+    assert fetched == [web.id, web.id]
+    assert states == ["stopping", "exited"]
+    assert coordinator.data.containers[web.short_id].state == "exited"
+    assert coordinator.data.containers_running == 1
+    assert coordinator._container_refreshes == {}
+
+
+@pytest.mark.asyncio
+async def test__DockerDataUpdateCoordinator_should_notify_only_changed_items():
+    data = MockedConfigEntry("21", None)
+    ctl = ServiceController(None, data)
+    data.runtime_data = ctl
+
+    coordinator = ctl.data_coordinator
+    calls = []
+    coordinator._listeners = {
+        1: (lambda: calls.append("global"), None),
+        2: (lambda: calls.append("a"), ("containers", "a")),
+        3: (lambda: calls.append("b"), ("containers", "b")),
+    }
+
+    coordinator._changed = {("containers", "b")}
+    coordinator.async_update_listeners()
+
+    assert calls == ["global", "b"]
+
+
+@pytest.mark.asyncio
+async def test__DockerContainerVersionUpdateCoordinator_should_skip_rate_limited():
+    data = MockedConfigEntry("22", None)
+    ctl = ServiceController(None, data)
+    data.runtime_data = ctl
+
+    blocked = create_mocked_container(short_id="a1", image_name="ghcr.io/x/blocked")
+    allowed = create_mocked_container(short_id="b2", image_name="nginx:latest")
+    ctl.data_coordinator.data = replace(
+        MockedDataUpdateCoordinator.data,
+        containers={blocked.short_id: blocked, allowed.short_id: allowed},
+    )
+
+    api = ctl.update_coordinator.api
+    api.http._blocked_until["ghcr.io"] = time_module.monotonic() + 60
+    checked = []
+
+    async def check_update(image_name, local_image=None):
+        checked.append(image_name)
+        return DockerImageUpdateInfo(
+            has_newer=False, current_ver="1", new_ver="1", source=""
+        )
+
+    api.async_images_check_update = check_update
+
+    result = await ctl.update_coordinator._async_update_data()
+
+    assert checked == ["nginx:latest"]
+    assert list(result) == ["nginx:latest"]
+    assert "ghcr.io/x/blocked" not in ctl.update_coordinator.next_check
+
+
+@pytest.mark.asyncio
+async def test__DockerContainerVersionUpdateCoordinator_should_check_only_stale():
+    data = MockedConfigEntry("23", None)
+    ctl = ServiceController(None, data)
+    data.runtime_data = ctl
+
+    fresh = create_mocked_container(short_id="a1", image_name="fresh:latest")
+    stale = create_mocked_container(short_id="b2", image_name="stale:latest")
+    ctl.data_coordinator.data = replace(
+        MockedDataUpdateCoordinator.data,
+        containers={fresh.short_id: fresh, stale.short_id: stale},
+    )
+
+    now = datetime.now(timezone.utc)
+    version = {"has_newer": True, "current_ver": "1", "new_ver": "2", "source": ""}
+    stored = {
+        "digests": {},
+        "results": {"fresh:latest": version, "stale:latest": version},
+        "next_check": {
+            "fresh:latest": (now + timedelta(hours=1)).isoformat(),
+            "stale:latest": (now - timedelta(hours=1)).isoformat(),
+        },
+    }
+
+    async def load():
+        return stored
+
+    coordinator = ctl.update_coordinator
+    coordinator._store.async_load = load
+    await coordinator.async_load()
+
+    assert coordinator.data["fresh:latest"].new_ver == "2"
+
+    checked = []
+
+    async def check_update(image_name, local_image=None):
+        checked.append(image_name)
+        return DockerImageUpdateInfo(
+            has_newer=False, current_ver="2", new_ver=None, source=""
+        )
+
+    coordinator.api.async_images_check_update = check_update
+    coordinator.data = await coordinator._async_update_data()
+
+    assert checked == ["stale:latest"]
+    assert coordinator.data["fresh:latest"].has_newer is True
+    assert coordinator.data["stale:latest"].has_newer is False
+    assert coordinator._data_to_store()["results"]["stale:latest"]["current_ver"] == "2"
+
+
+def test__in_time_window_should_handle_midnight():
+    assert in_time_window("", time(12, 0)) is True
+    assert in_time_window("01:00-05:00", time(3, 0)) is True
+    assert in_time_window("01:00-05:00", time(5, 0)) is False
+    assert in_time_window("23:00-02:00", time(23, 30)) is True
+    assert in_time_window("23:00-02:00", time(1, 0)) is True
+    assert in_time_window("23:00-02:00", time(12, 0)) is False
+
+
+@pytest.mark.asyncio
+async def test__DockerContainerVersionUpdateCoordinator_should_detect_pre_pulled():
+    data = MockedConfigEntry("24", None)
+    ctl = ServiceController(None, data)
+    data.runtime_data = ctl
+
+    running = replace(MOCKED_IMAGE, id="1" * 64, repo_digests=["nginx@sha256:1"])
+    pulled = replace(MOCKED_IMAGE, id="2" * 64, repo_tags=["nginx:latest"])
+    container = create_mocked_container(image_id=running.id, image_name="nginx")
+    ctl.data_coordinator.data = replace(
+        MockedDataUpdateCoordinator.data,
+        containers={container.short_id: container},
+        images={running.id[:12]: running, pulled.id[:12]: pulled},
+    )
+
+    local_images = []
+
+    async def check_update(image_name, local_image=None):
+        local_images.append(local_image)
+        return DockerImageUpdateInfo(
+            has_newer=True, current_ver="1", new_ver="2", source=""
+        )
+
+    coordinator = ctl.update_coordinator
+    coordinator.api.async_images_check_update = check_update
+    result = await coordinator._async_update_data()
+
+    assert local_images == [running]
+    assert result["nginx"].pre_pulled is True
+
+
+@pytest.mark.asyncio
+async def test__DockerContainerVersionUpdateCoordinator_should_keep_pre_pull_budget():
+    data = MockedConfigEntry("29", None, options={CONF_PRE_PULL_DAILY_BUDGET: 100})
+    ctl = ServiceController(None, data)
+    data.runtime_data = ctl
+    ctl.data_coordinator.data = replace(
+        MockedDataUpdateCoordinator.data, platform="linux/arm64"
+    )
+
+    sizes = {"big": 80 * 1024 * 1024, "small": 30 * 1024 * 1024}
+    estimated = []
+    pulled = []
+
+    async def image_size(image, platform):
+        estimated.append((image, platform))
+        return sizes[image]
+
+    async def image_pull(image):
+        pulled.append(image)
+        progress = DockerPullProgress()
+        progress.layers["layer"] = [sizes[image], sizes[image], 0]
+        return progress
+
+    coordinator = ctl.update_coordinator
+    coordinator.api.http.get_registry_image_size = image_size
+    coordinator.api.async_image_pull = image_pull
+
+    await coordinator._async_pre_pull("big")
+    # 20 MiB are left, the estimate of another big pull does not fit
+    await coordinator._async_pre_pull("big")
+    await coordinator._async_pre_pull("small")
+
+    assert estimated == [("big", "linux/arm64")] * 2 + [("small", "linux/arm64")]
+    assert pulled == ["big"]
+    assert coordinator._pre_pull_reserved == 0
+
+
+@pytest.mark.asyncio
+async def test__DockerContainerVersionUpdateCoordinator_should_pre_pull_version_once():
+    data = MockedConfigEntry("30", None, options={CONF_PRE_PULL: True})
+    ctl = ServiceController(None, data)
+    data.runtime_data = ctl
+
+    pulled = []
+
+    async def image_pull(image):
+        pulled.append(image)
+        raise OSError("unauthorized")
+
+    async def request_refresh():
+        pass
+
+    coordinator = ctl.update_coordinator
+    coordinator.api.async_image_pull = image_pull
+    coordinator.async_request_refresh = request_refresh
+    coordinator.async_update_listeners = lambda: None
+    coordinator.data = {
+        "nginx": DockerImageUpdateInfo(
+            has_newer=True, current_ver="1", new_ver="2", source=""
+        ),
+        # no local digest, the remote version is not known
+        "local": DockerImageUpdateInfo(
+            has_newer=True, current_ver=None, new_ver=None, source=None
+        ),
+    }
+
+    for _ in range(2):
+        coordinator._async_schedule_pre_pulls(coordinator.data)
+        await asyncio.sleep(0)
+    assert pulled == ["nginx"]
+
+    # a newer version is pulled again
+    coordinator.data["nginx"] = replace(coordinator.data["nginx"], new_ver="3")
+    coordinator._async_schedule_pre_pulls(coordinator.data)
+    await asyncio.sleep(0)
+    assert pulled == ["nginx", "nginx"]
+
+    coordinator.next_check["nginx"] = datetime.now(timezone.utc)
+    coordinator.async_forget_image("nginx")
+    assert "nginx" not in coordinator.data
+    assert "nginx" not in coordinator.next_check
+    assert "nginx" not in coordinator._pre_pull_attempts
+
+
+@pytest.mark.asyncio
+async def test__DockerContainerStatsCoordinator_should_sample_running_containers():
+    data = MockedConfigEntry("25", None)
+    ctl = ServiceController(None, data)
+    data.runtime_data = ctl
+
+    running = create_mocked_container(short_id="a1", state="running")
+    disabled = create_mocked_container(short_id="b2", state="running")
+    ctl.data_coordinator.data = replace(
+        MockedDataUpdateCoordinator.data,
+        containers={running.short_id: running, disabled.short_id: disabled},
+    )
+
+    opened = []
+    closed = []
+
+    async def stats_stream(id, interval):
+        opened.append(id)
+
+        async def samples():
+            yield {
+                "cpu_stats": {"cpu_usage": {"total_usage": 10}, "system_cpu_usage": 1},
+                "memory_stats": {"usage": 100, "limit": 1000},
+            }
+            await asyncio.Event().wait()
+
+        return DockerEventStream(samples(), lambda: closed.append(id))
+
+    coordinator = ctl.stats_coordinator
+    coordinator.api.async_container_stats_stream = stats_stream
+    # only b2 has no enabled entities
+    coordinator._listeners = {1: (lambda: None, ("containers", "a1"))}
+
+    coordinator._async_sync_streams()
+    await asyncio.sleep(0.01)
+    coordinator.data = await coordinator._async_update_data()
+
+    assert opened == [running.id]
+    assert coordinator.data["a1"].memory_usage == 100
+    assert coordinator._changed == {("containers", "a1")}
+
+    # nothing new is sampled, nothing is written
+    coordinator.data = await coordinator._async_update_data()
+    assert coordinator._changed == set()
+
+    ctl.data_coordinator.data.containers["a1"] = replace(running, state="exited")
+    coordinator._async_sync_streams()
+    await asyncio.sleep(0.01)
+    coordinator.data = await coordinator._async_update_data()
+
+    assert closed == [running.id]
+    assert coordinator.data == {}
+    assert coordinator._changed == {("containers", "a1")}
+
+
+@pytest.mark.asyncio
+async def test__DockerContainerStatsCoordinator_should_reopen_after_failed_open():
+    data = MockedConfigEntry("28", None)
+    ctl = ServiceController(None, data)
+    data.runtime_data = ctl
+
+    running = create_mocked_container(short_id="a1", state="running")
+    ctl.data_coordinator.data = replace(
+        MockedDataUpdateCoordinator.data, containers={running.short_id: running}
+    )
+
+    opened = []
+
+    async def stats_stream(id, interval):
+        opened.append(id)
+        if len(opened) == 1:
+            raise Exception("409 container is restarting")
+
+        async def samples():
+            await asyncio.Event().wait()
+            yield {}
+
+        return DockerEventStream(samples(), lambda: None)
+
+    coordinator = ctl.stats_coordinator
+    coordinator.api.async_container_stats_stream = stats_stream
+    coordinator._listeners = {1: (lambda: None, ("containers", "a1"))}
+
+    coordinator._async_sync_streams()
+    await asyncio.sleep(0.01)
+    assert coordinator._streams == {}
+
+    coordinator._async_sync_streams()
+    await asyncio.sleep(0.01)
+
+    assert opened == [running.id, running.id]
+    assert "a1" in coordinator._streams
+    coordinator._async_close_stream("a1")
+
+
+@pytest.mark.asyncio
+async def test__DockerDataUpdateCoordinator_should_poll_fast_only_while_watched():
+    data = MockedConfigEntry("26", None)
+    ctl = ServiceController(None, data)
+    data.runtime_data = ctl
+
+    coordinator = ctl.data_coordinator
+    refreshes = []
+
+    async def refresh():
+        refreshes.append(coordinator.update_interval)
+
+    coordinator.async_refresh = refresh
+    assert coordinator.update_interval == IDLE_SCAN_INTERVAL
+
+    remove_first = coordinator.async_add_watcher()
+    remove_second = coordinator.async_add_watcher()
+    await asyncio.sleep(0)
+    assert coordinator.update_interval == WATCH_SCAN_INTERVAL
+    # only speeding up refreshes right away
+    assert refreshes == [WATCH_SCAN_INTERVAL]
+
+    remove_first()
+    assert coordinator.update_interval == WATCH_SCAN_INTERVAL
+    remove_second()
+    assert coordinator.update_interval == IDLE_SCAN_INTERVAL
+
+    # the live event stream makes the poll a reconciliation, faster when watched
+    coordinator._events_live = True
+    remove_watcher = coordinator.async_add_watcher()
+    await asyncio.sleep(0)
+    assert coordinator.update_interval == WATCH_RECONCILE_INTERVAL
+    assert refreshes[-1] == WATCH_RECONCILE_INTERVAL
+    remove_watcher()
+    assert coordinator.update_interval == RECONCILE_INTERVAL
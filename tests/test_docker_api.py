@@ -0,0 +1,408 @@
+import asyncio
+from contextlib import asynccontextmanager
+from dataclasses import replace
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from custom_components.home_assistant_docker_integration._docker_api import (
+    LOG_STREAM_QUEUE_SIZE,
+    DockerApi,
+    DockerDiskUsage,
+    DockerHttpApi,
+    apply_disk_usage,
+    build_image_index,
+    get_compose_waves,
+    get_manifest_size,
+    diff_host_info,
+    get_repo_digest,
+    keeps_started_at,
+    normalize_image_ref,
+    parse_uptime,
+    select_containers,
+    select_platform_manifest,
+    to_container_info,
+    to_container_stats,
+    to_platform,
+)
+from custom_components.home_assistant_docker_integration._docker_executor import (
+    DockerExecutor,
+)
+from tests.mocks import (
+    MOCKED_IMAGE,
+    MOCKED_VOLUME,
+    MockedDataUpdateCoordinator,
+    create_mocked_container,
+)
+
+
+def test__apply_disk_usage_should_set_sizes_and_timestamp():
+    image = replace(MOCKED_IMAGE)
+    volume = replace(MOCKED_VOLUME)
+    data = replace(
+        MockedDataUpdateCoordinator.data,
+        containers={},
+        images={image.id[:12]: image},
+        volumes={volume.name[:26]: volume},
+    )
+    measured_at = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+    apply_disk_usage(
+        data,
+        DockerDiskUsage(
+            measured_at=measured_at,
+            images={image.id[:12]: 2048},
+            volumes={volume.name[:26]: 1024},
+        ),
+    )
+
+    assert data.images[image.id[:12]].size == "2.0KB"
+    assert data.images[image.id[:12]].size_measured_at == measured_at
+    assert data.volumes[volume.name[:26]].size == "1.0KB"
+    assert data.volumes[volume.name[:26]].size_measured_at == measured_at
+
+
+def test__diff_host_info_should_return_changed_items():
+    old_container = create_mocked_container()
+    new_container = replace(old_container, state="exited")
+    image = replace(MOCKED_IMAGE)
+    old = replace(
+        MockedDataUpdateCoordinator.data,
+        containers={old_container.short_id: old_container},
+        images={image.id[:12]: image},
+        volumes={},
+    )
+    new = replace(
+        old,
+        containers={new_container.short_id: new_container},
+        images={image.id[:12]: replace(image)},
+        containers_running=0,
+    )
+
+    assert diff_host_info(old, new) == {
+        ("host", "containers_running"),
+        ("containers", old_container.short_id),
+    }
+
+
+def test__keeps_started_at_should_match_rounded_hours_and_days():
+    now = datetime.now(timezone.utc)
+
+    # the engine shows "Up 3 hours" from 2.5 hours on
+    assert keeps_started_at("Up 3 hours", now - timedelta(hours=2, minutes=40))
+    assert keeps_started_at("Up 3 hours", now - timedelta(hours=3, minutes=20))
+    assert not keeps_started_at("Up 3 hours", now - timedelta(hours=3, minutes=40))
+    assert keeps_started_at("Up About an hour", now - timedelta(minutes=80))
+
+    # the days are counted from the rounded hours, 2 days from 47.5 hours on
+    assert keeps_started_at("Up 2 days", now - timedelta(hours=47, minutes=40))
+    assert keeps_started_at("Up 2 days", now - timedelta(hours=71))
+    assert not keeps_started_at("Up 2 days", now - timedelta(hours=72))
+    assert keeps_started_at("Up 3 weeks", now - timedelta(weeks=3, minutes=-20))
+
+    assert parse_uptime("Up 45 minutes") == (2700, 2760)
+    assert parse_uptime("Up 2 years") == (2 * 31536000, 3 * 31536000)
+
+
+def test__to_container_info_should_parse_status_and_keep_started_at():
+    started_at = datetime.now(timezone.utc) - timedelta(minutes=3, seconds=20)
+    previous = create_mocked_container(started_at=started_at)
+    listing = {
+        "Id": previous.id,
+        "Names": ["/traefik"],
+        "State": "running",
+        "Status": "Up 3 minutes (unhealthy)",
+        "ImageID": "sha256:" + previous.image_id,
+        "Image": previous.image_name,
+        "Labels": {},
+        "Ports": [],
+        "Mounts": [],
+    }
+
+    info = to_container_info(listing, previous)
+    assert info.started_at == started_at
+    assert info.health == "unhealthy"
+
+    # restarted since the previous fetch
+    info = to_container_info({**listing, "Status": "Up 2 seconds"}, previous)
+    assert info.started_at is None
+
+    info = to_container_info(
+        {**listing, "State": "exited", "Status": "Exited (137) 1 hour ago"}
+    )
+    assert info.exit_code == 137
+
+
+class FakeRegistryResponse:
+    def __init__(self, status, headers=None, body=None):
+        self.status = status
+        self.headers = headers or {}
+        self.body = body or {}
+
+    async def json(self):
+        return self.body
+
+
+class FakeRegistrySession:
+    def __init__(self):
+        self.requests = []
+
+    @asynccontextmanager
+    async def get(self, url, headers=None, params=None, auth=None):
+        self.requests.append(("GET", url))
+        if url == "https://ghcr.io/v2/":
+            yield FakeRegistryResponse(
+                401,
+                {
+                    "Www-Authenticate": 'Bearer realm="https://ghcr.io/token",'
+                    'service="ghcr.io",scope="repository:user/image:pull"'
+                },
+            )
+        elif url == "https://ghcr.io/token":
+            yield FakeRegistryResponse(200, body={"token": "t", "expires_in": 300})
+        else:
+            assert headers["Authorization"] == "Bearer t"
+            yield FakeRegistryResponse(
+                200,
+                {"Docker-Content-Digest": "sha256:2"},
+                {
+                    "annotations": {"org.opencontainers.image.version": "2"},
+                    "layers": [{"size": 100}],
+                },
+            )
+
+    @asynccontextmanager
+    async def head(self, url, headers=None, allow_redirects=False):
+        self.requests.append(("HEAD", url))
+        assert headers["Authorization"] == "Bearer t"
+        if headers.get("If-None-Match") == '"sha256:2"':
+            yield FakeRegistryResponse(304)
+        else:
+            yield FakeRegistryResponse(
+                200, {"Docker-Content-Digest": "sha256:2", "ETag": '"sha256:2"'}
+            )
+
+
+@pytest.mark.asyncio
+async def test__DockerHttpApi_should_reuse_auth_challenge_and_token():
+    http = DockerHttpApi(DockerExecutor(1, 1))
+    http.session = FakeRegistrySession()
+    http._credentials["ghcr.io"] = None
+
+    result = await http.get_registry_image_info("ghcr.io/user/image:1", "sha256:2")
+    assert result == ("sha256:2", {})
+    result = await http.get_registry_image_info("ghcr.io/user/image:2", "sha256:2")
+    assert result == ("sha256:2", {})
+
+    assert http.session.requests == [
+        ("GET", "https://ghcr.io/v2/"),
+        ("GET", "https://ghcr.io/token"),
+        ("HEAD", "https://ghcr.io/v2/user/image/manifests/1"),
+        ("HEAD", "https://ghcr.io/v2/user/image/manifests/2"),
+    ]
+
+
+@pytest.mark.asyncio
+async def test__DockerHttpApi_should_fetch_pull_size_once_per_digest():
+    http = DockerHttpApi(DockerExecutor(1, 1))
+    http.session = FakeRegistrySession()
+    http._credentials["ghcr.io"] = None
+
+    for _ in range(2):
+        size = await http.get_registry_image_size("ghcr.io/user/image:1", "linux/amd64")
+        assert size == 100
+
+    # only the HEAD is repeated, it does not count as a pull
+    assert http.session.requests == [
+        ("GET", "https://ghcr.io/v2/"),
+        ("GET", "https://ghcr.io/token"),
+        ("HEAD", "https://ghcr.io/v2/user/image/manifests/1"),
+        ("GET", "https://ghcr.io/v2/user/image/manifests/sha256:2"),
+        ("HEAD", "https://ghcr.io/v2/user/image/manifests/1"),
+    ]
+
+
+@pytest.mark.asyncio
+async def test__DockerHttpApi_should_fetch_labels_only_for_new_digest():
+    http = DockerHttpApi(DockerExecutor(1, 1))
+    http.session = FakeRegistrySession()
+    http._credentials["ghcr.io"] = None
+    labels = {"org.opencontainers.image.version": "2"}
+
+    result = await http.get_registry_image_info("ghcr.io/user/image", "sha256:1")
+    assert result == ("sha256:2", labels)
+    result = await http.get_registry_image_info("ghcr.io/user/image", "sha256:1")
+    assert result == ("sha256:2", labels)
+
+    manifest = "https://ghcr.io/v2/user/image/manifests/latest"
+    assert http.session.requests[2:] == [
+        ("HEAD", manifest),
+        ("GET", manifest),
+        ("HEAD", manifest),
+    ]
+    assert http.digests["ghcr.io/user/image:latest"]["labels"] == labels
+
+
+class FakeLogsClient:
+    def __init__(self, chunks: list[bytes]):
+        self.api = self
+        self.chunks = chunks
+
+    def logs(self, id, **kwargs):
+        return FakeLogsResponse(self.chunks)
+
+
+class FakeLogsResponse(list):
+    def close(self):
+        pass
+
+
+@pytest.mark.asyncio
+async def test__DockerApi_should_end_logs_stream_on_full_queue():
+    chunks = [f"line {i}\n".encode() for i in range(LOG_STREAM_QUEUE_SIZE)]
+    api = DockerApi()
+    api.client = FakeLogsClient(chunks)
+
+    for read in (True, False):
+        stream = await api.async_container_logs_stream("abc", follow=False)
+        while api.executor.streams:
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0)
+
+        # the pump ended on a full queue, no put of the end is left waiting
+        assert asyncio.all_tasks() == {asyncio.current_task()}
+        if read:
+            assert [x async for x in stream] == chunks
+        else:
+            stream.close()
+    api.executor.shutdown()
+
+
+def test__select_platform_manifest_should_estimate_pull_of_host():
+    index = {
+        "manifests": [
+            {
+                "digest": "sha256:a",
+                "platform": {"os": "linux", "architecture": "amd64"},
+            },
+            {
+                "digest": "sha256:b",
+                "platform": {"os": "linux", "architecture": "arm64"},
+            },
+        ]
+    }
+    platform = to_platform({"OSType": "linux", "Architecture": "aarch64"})
+
+    assert platform == "linux/arm64"
+    assert select_platform_manifest(index, platform) == "sha256:b"
+    assert select_platform_manifest(index, "windows/amd64") is None
+    assert (
+        get_manifest_size(
+            {"config": {"size": 10}, "layers": [{"size": 100}, {"size": 1000}]}
+        )
+        == 1110
+    )
+
+
+def test__build_image_index_should_find_local_digest_by_image_name():
+    image = replace(
+        MOCKED_IMAGE,
+        repo_tags=["nginx:latest", "ghcr.io/user/nginx:1"],
+        repo_digests=["ghcr.io/user/nginx@sha256:2", "nginx@sha256:1"],
+    )
+    index = build_image_index({image.id[:12]: image})
+
+    assert index[normalize_image_ref("docker.io/library/nginx")] is image
+    assert index[normalize_image_ref("ghcr.io/user/nginx:1")] is image
+    assert index[f"sha256:{image.id}"] is image
+    assert get_repo_digest(image.repo_digests, "nginx") == "sha256:1"
+    assert get_repo_digest(image.repo_digests, "ghcr.io/user/nginx:1") == "sha256:2"
+
+
+def _compose_container(short_id, service, depends_on=""):
+    return create_mocked_container(
+        id=short_id * 2,
+        short_id=short_id,
+        name=service,
+        compose_project="app",
+        labels={
+            "com.docker.compose.service": service,
+            "com.docker.compose.depends_on": depends_on,
+        },
+    )
+
+
+def test__select_containers_should_match_all_criteria():
+    db = _compose_container("a1", "db")
+    web = _compose_container("b2", "web", "db:service_healthy:true")
+    other = create_mocked_container(short_id="c3", name="other")
+    containers = {c.short_id: c for c in (db, web, other)}
+
+    assert select_containers(containers, ids=["a1", "other"]) == [db, other]
+    assert select_containers(containers, compose_project="app") == [db, web]
+    assert select_containers(containers, labels=["com.docker.compose.service=web"]) == [
+        web
+    ]
+    assert select_containers(
+        containers, compose_project="app", labels=["com.docker.compose.depends_on"]
+    ) == [db, web]
+
+
+def test__get_compose_waves_should_order_by_depends_on():
+    db = _compose_container("a1", "db")
+    cache = _compose_container("b2", "cache")
+    web = _compose_container(
+        "c3", "web", "db:service_healthy:true,cache:service_started:false"
+    )
+    proxy = _compose_container("d4", "proxy", "web:service_started:false")
+
+    assert get_compose_waves([proxy, web, db, cache]) == [[db, cache], [web], [proxy]]
+
+
+def _stats_sample(total_usage, system_usage, precpu=None):
+    return {
+        "cpu_stats": {
+            "cpu_usage": {"total_usage": total_usage},
+            "system_cpu_usage": system_usage,
+            "online_cpus": 4,
+        },
+        "precpu_stats": precpu or {},
+        "memory_stats": {
+            "usage": 300,
+            "limit": 1000,
+            "stats": {"inactive_file": 100},
+        },
+        "networks": {
+            "eth0": {"rx_bytes": 10, "tx_bytes": 20},
+            "eth1": {"rx_bytes": 1, "tx_bytes": 2},
+        },
+        "blkio_stats": {
+            "io_service_bytes_recursive": [
+                {"major": 8, "minor": 0, "op": "read", "value": 512},
+                {"major": 8, "minor": 0, "op": "write", "value": 256},
+                {"major": 8, "minor": 16, "op": "Read", "value": 512},
+            ]
+        },
+    }
+
+
+def test__to_container_stats_should_use_consecutive_samples():
+    first = _stats_sample(1_000, 100_000)
+    second = _stats_sample(6_000, 200_000)
+
+    # a one shot sample has no precpu_stats
+    assert to_container_stats(first).cpu_percent == 0.0
+
+    stats = to_container_stats(second, first)
+    assert stats.cpu_percent == 20.0
+    assert stats.memory_usage == 200
+    assert stats.memory_percent == 20.0
+    assert (stats.network_rx, stats.network_tx) == (11, 22)
+    assert (stats.block_read, stats.block_write) == (1024, 256)
+
+    # a streamed sample carries the previous one
+    streamed = _stats_sample(6_000, 200_000, first["cpu_stats"])
+    assert to_container_stats(streamed).cpu_percent == 20.0
+
+    # a stopped container reports empty stats
+    assert to_container_stats({"cpu_stats": {}, "memory_stats": {}}) is None
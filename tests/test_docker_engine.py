@@ -0,0 +1,384 @@
+import asyncio
+import base64
+
+import orjson
+import pytest
+from aiohttp import web
+
+from custom_components.home_assistant_docker_integration._docker_api import (
+    DockerUpdateError,
+)
+from custom_components.home_assistant_docker_integration._docker_engine import (
+    DockerEngineApi,
+    split_image_tag,
+)
+from custom_components.home_assistant_docker_integration._docker_jobs import (
+    DockerJobManager,
+)
+
+CONTAINER = {
+    "Id": "ab1cd2ef3gh4ij5kl6mn7",
+    "Names": ["/traefik"],
+    "State": "running",
+    "Status": "Up 3 minutes",
+    "ImageID": "sha256:502bc8dd565a23955c8a372b250a2f659397b39b205d4820bd521776c300ea76",
+    "Image": "traefik:latest",
+    "Labels": {},
+    "Ports": [{"PrivatePort": 80, "PublicPort": 8080}],
+    "Mounts": [],
+}
+IMAGE = {
+    "Id": "sha256:502bc8dd565a23955c8a372b250a2f659397b39b205d4820bd521776c300ea76",
+    "RepoTags": ["traefik:latest"],
+    "Labels": {"org.opencontainers.image.title": "Traefik"},
+    "Containers": -1,
+}
+
+
+async def _start_fake_engine(
+    tmp_path, routes: web.RouteTableDef
+) -> tuple[str, web.AppRunner]:
+    app = web.Application()
+    app.add_routes(routes)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    path = str(tmp_path / "docker.sock")
+    await web.UnixSite(runner, path).start()
+    return path, runner
+
+
+@pytest.mark.asyncio
+async def test__DockerEngineApi_should_fetch_data_over_unix_socket(tmp_path):
+    routes = web.RouteTableDef()
+
+    @routes.get("/info")
+    async def info(_):
+        return web.json_response(
+            {
+                "ServerVersion": "27.0",
+                "FirewallBackend": {"Driver": "iptables"},
+                "Containers": 1,
+                "ContainersRunning": 1,
+                "Images": 1,
+            }
+        )
+
+    @routes.get("/containers/json")
+    async def containers(_):
+        return web.json_response([CONTAINER])
+
+    @routes.get("/containers/{id}/json")
+    async def inspect(_):
+        return web.json_response({"State": {"StartedAt": "2025-01-01T10:00:00.1Z"}})
+
+    @routes.get("/images/json")
+    async def images(_):
+        return web.json_response([IMAGE])
+
+    @routes.get("/volumes")
+    async def volumes(_):
+        return web.json_response({"Volumes": None})
+
+    path, runner = await _start_fake_engine(tmp_path, routes)
+    api = DockerEngineApi(path)
+    await api.async_connect()
+    try:
+        data = await api.async_fetch_data()
+    finally:
+        await api.disconnect()
+        await runner.cleanup()
+
+    assert data.version == "27.0"
+    assert data.containers["ab1cd2ef3gh4"].ports == {"80:8080"}
+    assert data.containers["ab1cd2ef3gh4"].started_at.year == 2025
+    assert data.images["502bc8dd565a"].in_use is True
+
+
+@pytest.mark.asyncio
+async def test__DockerEngineApi_should_demultiplex_logs(tmp_path):
+    routes = web.RouteTableDef()
+
+    @routes.get("/containers/{id}/json")
+    async def inspect(_):
+        return web.json_response({"Config": {"Tty": False}})
+
+    @routes.get("/containers/{id}/logs")
+    async def logs(_):
+        out = b"hello\n"
+        err = b"world\n"
+        return web.Response(
+            body=b"\x01\x00\x00\x00"
+            + len(out).to_bytes(4, "big")
+            + out
+            + b"\x02\x00\x00\x00"
+            + len(err).to_bytes(4, "big")
+            + err
+        )
+
+    path, runner = await _start_fake_engine(tmp_path, routes)
+    api = DockerEngineApi(path)
+    await api.async_connect()
+    try:
+        logs = await api.async_container_logs("ab1cd2ef3gh4")
+    finally:
+        await api.disconnect()
+        await runner.cleanup()
+
+    assert logs == "hello\nworld\n"
+
+
+@pytest.mark.asyncio
+async def test__DockerEngineApi_should_report_pull_progress(tmp_path):
+    routes = web.RouteTableDef()
+    events = [
+        {"status": "Pulling from library/traefik", "id": "latest"},
+        {"status": "Already exists", "id": "l1"},
+        {"status": "Pulling fs layer", "id": "l2"},
+        {
+            "status": "Downloading",
+            "id": "l2",
+            "progressDetail": {"current": 50, "total": 100},
+        },
+        {"status": "Download complete", "id": "l2"},
+        {
+            "status": "Extracting",
+            "id": "l2",
+            "progressDetail": {"current": 100, "total": 100},
+        },
+        {"status": "Pull complete", "id": "l2"},
+        {"status": "Status: Downloaded newer image for traefik:latest"},
+    ]
+
+    @routes.post("/images/create")
+    async def create(request):
+        assert request.query["fromImage"] == "traefik"
+        resp = web.StreamResponse()
+        await resp.prepare(request)
+        for event in events:
+            await resp.write(orjson.dumps(event) + b"\n")
+        return resp
+
+    path, runner = await _start_fake_engine(tmp_path, routes)
+    api = DockerEngineApi(path)
+    await api.async_connect()
+    percentages = []
+    try:
+        await api.async_image_pull(
+            "traefik", lambda p: percentages.append(p.percentage)
+        )
+    finally:
+        await api.disconnect()
+        await runner.cleanup()
+
+    assert percentages == [100, 25, 50, 100]
+
+
+@pytest.mark.asyncio
+async def test__DockerEngineApi_should_send_registry_auth_on_pull(tmp_path):
+    routes = web.RouteTableDef()
+    auths = []
+
+    @routes.post("/images/create")
+    async def create(request):
+        auths.append(request.headers.get("X-Registry-Auth"))
+        return web.json_response({"status": "Downloaded newer image"})
+
+    path, runner = await _start_fake_engine(tmp_path, routes)
+    api = DockerEngineApi(path)
+    api.http._credentials["ghcr.io"] = {"username": "user", "password": "secret"}
+    api.http._credentials["registry-1.docker.io"] = None
+    await api.async_connect()
+    try:
+        await api.async_image_pull("ghcr.io/user/private:1")
+        await api.async_image_pull("traefik")
+    finally:
+        await api.disconnect()
+        await runner.cleanup()
+
+    assert orjson.loads(base64.urlsafe_b64decode(auths[0])) == {
+        "username": "user",
+        "password": "secret",
+    }
+    assert auths[1] is None
+
+
+@pytest.mark.asyncio
+async def test__DockerEngineApi_should_follow_logs_until_closed(tmp_path):
+    routes = web.RouteTableDef()
+
+    @routes.get("/containers/{id}/json")
+    async def inspect(_):
+        return web.json_response({"Config": {"Tty": True}})
+
+    @routes.get("/containers/{id}/logs")
+    async def logs(request):
+        assert request.query["follow"] == "1"
+        assert request.query["tail"] == "10"
+        resp = web.StreamResponse()
+        await resp.prepare(request)
+        await resp.write(b"line 1\n")
+        await resp.write(b"line 2\n")
+        # keeps following until the client closes the stream
+        await asyncio.sleep(1)
+        return resp
+
+    path, runner = await _start_fake_engine(tmp_path, routes)
+    api = DockerEngineApi(path)
+    await api.async_connect()
+    chunks = b""
+    try:
+        stream = await api.async_container_logs_stream("ab1cd2ef3gh4", tail=10)
+        async for chunk in stream:
+            chunks += chunk
+            if chunks.count(b"\n") == 2:
+                stream.close()
+                break
+    finally:
+        await api.disconnect()
+        await runner.cleanup()
+
+    assert chunks == b"line 1\nline 2\n"
+
+
+def _recreate_routes(calls: list, new_state: dict) -> web.RouteTableDef:
+    routes = web.RouteTableDef()
+    old = {
+        "Id": "old0000000000000",
+        "Name": "/traefik",
+        "Config": {"Image": "traefik:latest", "Hostname": "old000000000"},
+        "HostConfig": {"NetworkMode": "proxy"},
+        "State": {"Running": True},
+        "NetworkSettings": {
+            "Networks": {"proxy": {"Aliases": ["old000000000", "web"]}, "db": {}}
+        },
+    }
+
+    @routes.get("/containers/{id}/json")
+    async def inspect(request):
+        if request.match_info["id"] == "new":
+            return web.json_response({"State": new_state})
+        return web.json_response(old)
+
+    @routes.post("/containers/create")
+    async def create(request):
+        body = await request.json()
+        calls.append(("create", request.query["name"], body))
+        return web.json_response({"Id": "new"})
+
+    @routes.post("/networks/{network}/connect")
+    async def connect(request):
+        calls.append(("connect", request.match_info["network"]))
+        return web.Response(status=200)
+
+    @routes.post("/containers/{id}/{action}")
+    async def action(request):
+        calls.append(
+            (
+                request.match_info["action"],
+                request.match_info["id"],
+                request.query.get("name"),
+            )
+        )
+        return web.Response(status=204)
+
+    @routes.delete("/containers/{id}")
+    async def remove(request):
+        calls.append(("remove", request.match_info["id"], None))
+        return web.Response(status=204)
+
+    return routes
+
+
+@pytest.mark.asyncio
+async def test__DockerEngineApi_should_recreate_before_retiring_old(tmp_path):
+    calls = []
+    routes = _recreate_routes(calls, {"Running": True})
+    path, runner = await _start_fake_engine(tmp_path, routes)
+    api = DockerEngineApi(path)
+    await api.async_connect()
+    try:
+        downtime = await api.async_container_update("old", pull=False)
+    finally:
+        await api.disconnect()
+        await runner.cleanup()
+
+    assert downtime is not None
+    _, temp_name, body = calls[0]
+    assert temp_name.startswith("traefik-update-")
+    assert "Hostname" not in body
+    assert body["NetworkingConfig"]["EndpointsConfig"]["proxy"]["Aliases"] == ["web"]
+    assert [c[:2] for c in calls[1:]] == [
+        ("connect", "db"),
+        ("stop", "old"),
+        ("start", "new"),
+        ("rename", "old"),
+        ("rename", "new"),
+        ("remove", "old"),
+    ]
+    assert calls[-2][2] == "traefik"
+
+
+@pytest.mark.asyncio
+async def test__DockerEngineApi_should_roll_back_failed_recreate(tmp_path):
+    calls = []
+    routes = _recreate_routes(calls, {"Running": False, "Status": "exited"})
+    path, runner = await _start_fake_engine(tmp_path, routes)
+    api = DockerEngineApi(path)
+    await api.async_connect()
+    try:
+        with pytest.raises(DockerUpdateError):
+            await api.async_container_update("old", pull=False)
+    finally:
+        await api.disconnect()
+        await runner.cleanup()
+
+    assert [c[:2] for c in calls[1:]] == [
+        ("connect", "db"),
+        ("stop", "old"),
+        ("start", "new"),
+        ("stop", "new"),
+        ("remove", "new"),
+        ("start", "old"),
+    ]
+
+
+@pytest.mark.asyncio
+async def test__DockerEngineApi_should_roll_back_cancelled_update_job(tmp_path):
+    calls = []
+    # the new container never gets ready, the update waits until cancelled
+    routes = _recreate_routes(calls, {"Running": False, "Status": "created"})
+    path, runner = await _start_fake_engine(tmp_path, routes)
+    api = DockerEngineApi(path)
+    await api.async_connect()
+    jobs = DockerJobManager(
+        "Docker Host", lambda coro, name: asyncio.ensure_future(coro)
+    )
+    try:
+        job = jobs.submit(
+            "update", lambda job: api.async_container_update("old", pull=False)
+        )
+        while ("start", "new", None) not in calls:
+            await asyncio.sleep(0.01)
+
+        # stopped and replaced, but not renamed yet
+        assert jobs.cancel(job.id)
+        await job.task
+    finally:
+        await api.disconnect()
+        await runner.cleanup()
+
+    assert job.state == "cancelled"
+    assert [c[:2] for c in calls[1:]] == [
+        ("connect", "db"),
+        ("stop", "old"),
+        ("start", "new"),
+        ("stop", "new"),
+        ("remove", "new"),
+        ("start", "old"),
+    ]
+
+
+def test__split_image_tag_should_default_to_latest():
+    assert split_image_tag("traefik") == ("traefik", "latest")
+    assert split_image_tag("localhost:5000/app") == ("localhost:5000/app", "latest")
+    assert split_image_tag("ghcr.io/org/app:1.2") == ("ghcr.io/org/app", "1.2")
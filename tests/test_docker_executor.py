@@ -0,0 +1,75 @@
+import asyncio
+import time
+
+import pytest
+
+from custom_components.home_assistant_docker_integration._docker_engine import (
+    to_operation,
+)
+from custom_components.home_assistant_docker_integration._docker_executor import (
+    DockerExecutor,
+)
+
+
+@pytest.mark.asyncio
+async def test__DockerExecutor_should_queue_slow_calls_apart_from_fast():
+    executor = DockerExecutor(fast_workers=2, slow_workers=1)
+    slow = executor.lanes["slow"]
+    try:
+        stops = asyncio.gather(
+            executor.slow("container_stop", time.sleep, 0.1),
+            executor.slow("container_stop", time.sleep, 0.1),
+        )
+        await asyncio.sleep(0.02)
+        assert (slow.queued, slow.running) == (1, 1)
+
+        # the polls keep running while every slow worker is busy
+        started = time.monotonic()
+        await executor.fast("fetch_data", lambda: "data")
+        assert time.monotonic() - started < 0.05
+
+        await stops
+    finally:
+        executor.shutdown()
+
+    stats = slow.to_dict()
+    assert (stats["queued"], stats["running"]) == (0, 0)
+    assert stats["operations"]["container_stop"]["count"] == 2
+    # the second stop waited for the first one
+    assert stats["operations"]["container_stop"]["wait_max_ms"] >= 80
+    assert stats["operations"]["container_stop"]["run_mean_ms"] >= 90
+    assert executor.lanes["fast"].to_dict()["operations"]["fetch_data"]["count"] == 1
+
+
+@pytest.mark.asyncio
+async def test__DockerWorkerLane_should_count_errors():
+    executor = DockerExecutor(fast_workers=1, slow_workers=1)
+    try:
+        with pytest.raises(ZeroDivisionError):
+            await executor.fast("divide", lambda: 1 / 0)
+    finally:
+        executor.shutdown()
+
+    assert executor.lanes["fast"].operations["divide"].errors == 1
+
+
+def test__to_operation_should_strip_ids():
+    assert to_operation("GET", "/info") == ("fast", "GET /info")
+    assert to_operation("GET", "/containers/json") == ("fast", "GET /containers/json")
+    assert to_operation("GET", "/containers/ab1cd2/json") == (
+        "fast",
+        "GET /containers/{id}/json",
+    )
+    assert to_operation("GET", "/images/library/nginx:1/json") == (
+        "fast",
+        "GET /images/{id}/json",
+    )
+    assert to_operation("GET", "/system/df") == ("slow", "GET /system/df")
+    assert to_operation("POST", "/containers/ab1cd2/stop") == (
+        "slow",
+        "POST /containers/{id}/stop",
+    )
+    assert to_operation("DELETE", "/containers/ab1cd2") == (
+        "slow",
+        "DELETE /containers/{id}",
+    )
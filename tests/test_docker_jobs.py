@@ -0,0 +1,104 @@
+import asyncio
+
+import pytest
+
+from custom_components.home_assistant_docker_integration._docker_jobs import (
+    DockerJob,
+    DockerJobManager,
+)
+
+
+def _create_manager() -> tuple[DockerJobManager, list[tuple[str, str]]]:
+    manager = DockerJobManager(
+        "Docker Host", lambda coro, name: asyncio.ensure_future(coro)
+    )
+    changes = []
+    manager.add_listener(lambda job: changes.append((job.operation, job.state)))
+    return manager, changes
+
+
+@pytest.mark.asyncio
+async def test__DockerJobManager_should_serialize_jobs_per_container():
+    manager, changes = _create_manager()
+    running = []
+
+    def step(name: str):
+        async def run(job: DockerJob) -> str:
+            running.append(name)
+            await asyncio.sleep(0.05)
+            running.remove(name)
+            return name
+
+        return run
+
+    update = manager.submit("update", step("update"), ["web"])
+    restart = manager.submit("restart", step("restart"), ["web"])
+    other = manager.submit("other", step("other"), ["db"])
+    await asyncio.sleep(0.02)
+
+    # the restart waits for the update of the same container, db runs along
+    assert sorted(running) == ["other", "update"]
+    assert restart.state == "queued"
+
+    await asyncio.gather(update.task, restart.task, other.task)
+    assert [job.state for job in (update, restart, other)] == ["succeeded"] * 3
+    assert restart.result == "restart"
+    assert restart.started_at >= update.finished_at
+    assert changes.index(("update", "succeeded")) < changes.index(
+        ("restart", "running")
+    )
+    assert manager._locks == {}
+
+
+@pytest.mark.asyncio
+async def test__DockerJobManager_should_cancel_and_time_out():
+    manager, changes = _create_manager()
+
+    async def block(job: DockerJob) -> None:
+        manager.set_progress(job, 10)
+        await asyncio.sleep(10)
+
+    stuck = manager.submit("stuck", block, ["web"], timeout=0.05)
+    queued = manager.submit("queued", block, ["web"])
+    await asyncio.sleep(0)
+    assert manager.cancel(queued.id)
+
+    await asyncio.gather(stuck.task, queued.task)
+    assert stuck.state == "timeout"
+    assert stuck.progress == 10
+    assert "0.05" in stuck.error
+    # cancelled while waiting for the lock, it never ran
+    assert queued.state == "cancelled"
+    assert queued.started_at is None
+    assert not manager.cancel(queued.id)
+    assert ("queued", "running") not in changes
+    assert manager._locks == {}
+
+
+@pytest.mark.asyncio
+async def test__DockerJobManager_should_report_failures():
+    manager, _ = _create_manager()
+
+    async def fail(job: DockerJob) -> None:
+        raise ValueError("No such image")
+
+    job = manager.submit("create", fail, ["web"])
+    await job.task
+
+    assert job.to_dict()["state"] == "failed"
+    assert job.to_dict()["error"] == "No such image"
+
+
+@pytest.mark.asyncio
+async def test__DockerJobManager_should_fail_on_timeout_of_the_job():
+    manager, _ = _create_manager()
+
+    async def pull(job: DockerJob) -> None:
+        raise TimeoutError("Registry did not respond")
+
+    job = manager.submit("pull", pull, ["web"])
+    await job.task
+
+    # not the deadline of the job
+    assert job.state == "failed"
+    assert job.error == "Registry did not respond"
@@ -0,0 +1,90 @@
+import pytest
+
+from custom_components.home_assistant_docker_integration._docker_api import (
+    DockerEventStream,
+)
+from custom_components.home_assistant_docker_integration._docker_executor import (
+    DockerExecutor,
+)
+from custom_components.home_assistant_docker_integration._docker_logs import (
+    DockerLogSearch,
+    async_search_logs,
+)
+
+
+def test__DockerLogSearch_should_return_matches_with_context():
+    search = DockerLogSearch("error", ignore_case=True, context=1, max_results=2)
+
+    search.feed([b"start\nan ERROR\nnext\nok\nerror again\nlast\nerror three\n"])
+
+    assert search.results == [
+        {"line_number": 2, "line": "an ERROR", "before": ["start"], "after": ["next"]},
+        {"line_number": 5, "line": "error again", "before": ["ok"], "after": ["last"]},
+    ]
+    assert search.done is True
+    assert search.truncated is True
+
+
+def test__DockerLogSearch_should_not_truncate_exactly_max_results():
+    search = DockerLogSearch("error", context=0, max_results=2)
+
+    search.feed([b"error one\nok\nerror two\n"])
+    assert search.done is False
+    search.feed([b"ok\nlast\n"])
+    search.finish()
+
+    assert len(search.results) == 2
+    assert search.truncated is False
+
+
+def test__DockerLogSearch_should_match_regex_across_chunks():
+    search = DockerLogSearch(r"took \d+ms", regex=True, context=0)
+
+    search.feed([b"request took 1", b"2ms\nrequest"])
+    search.feed([b" took slow"])
+    search.finish()
+
+    assert [r["line"] for r in search.results] == ["request took 12ms"]
+    assert search.lines == 2
+
+
+class FakeLogsApi:
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.closed = False
+        self.kwargs = None
+        self.executor = DockerExecutor(1, 1)
+
+    async def async_container_logs_stream(self, id, **kwargs):
+        self.kwargs = kwargs
+
+        async def chunks():
+            for chunk in self.chunks:
+                yield chunk
+
+        def close():
+            self.closed = True
+
+        return DockerEventStream(chunks(), close)
+
+
+@pytest.mark.asyncio
+async def test__async_search_logs_should_stream_log_window():
+    api = FakeLogsApi([b"a\nfound it\n", b"b\n"])
+
+    try:
+        result = await async_search_logs(
+            api, "ab1cd2ef3gh4", DockerLogSearch("found"), since=10, until=20
+        )
+    finally:
+        api.executor.shutdown()
+
+    assert result["lines_scanned"] == 3
+    # matched on the fast lane, the mutations are not queued behind it
+    assert list(api.executor.lanes["fast"].operations) == ["logs_search"]
+    assert api.executor.lanes["slow"].operations == {}
+    assert result["truncated"] is False
+    assert [m["line"] for m in result["matches"]] == ["found it"]
+    assert api.kwargs["follow"] is False
+    assert api.kwargs["since"] == 10
+    assert api.closed is True
@@ -0,0 +1,79 @@
+import math
+
+from custom_components.home_assistant_docker_integration._docker_api import (
+    DockerContainerStats,
+)
+from custom_components.home_assistant_docker_integration._docker_metrics import (
+    DockerContainerMetrics,
+    MetricsRing,
+    downsample_stats,
+)
+
+
+def _stats(cpu, memory, rx=0, tx=0):
+    return DockerContainerStats(
+        cpu_percent=cpu,
+        memory_usage=memory,
+        memory_limit=1000,
+        memory_percent=memory / 10,
+        network_rx=rx,
+        network_tx=tx,
+        block_read=0,
+        block_write=0,
+    )
+
+
+def test__MetricsRing_should_average_slots_and_clear_gaps():
+    ring = MetricsRing(10, 4)
+    ring.add(100, (1.0, 10.0, math.nan, 0.0))
+    ring.add(105, (3.0, 30.0, 4.0, 0.0))
+    # 110 and 120 are skipped
+    ring.add(130, (5.0, 50.0, 6.0, 0.0))
+
+    result = ring.to_dict()
+    assert result["start"] == 100
+    assert result["cpu"] == [2.0, None, None, 5.0]
+    assert result["rx"] == [4.0, None, None, 6.0]
+
+    # wraps around, the oldest slot is overwritten
+    ring.add(140, (7.0, 70.0, 8.0, 0.0))
+    result = ring.to_dict(2)
+    assert result["start"] == 130
+    assert result["cpu"] == [5.0, 7.0]
+    assert ring.to_dict()["start"] == 110
+
+    # a gap longer than the ring clears every slot
+    ring.add(1000, (9.0, 90.0, 0.0, 0.0))
+    assert ring.to_dict()["cpu"] == [None, None, None, 9.0]
+    assert ring.mean(0, 4) == 9.0
+
+
+def test__MetricsRing_should_clear_nan_fields_on_wrap():
+    ring = MetricsRing(10, 2)
+    ring.add(100, (1.0, 10.0, 4.0, 2.0))
+    ring.add(110, (2.0, 20.0, 5.0, 3.0))
+    # the slot of 100 is reused, the counters started over (NaN rates)
+    ring.add(120, (3.0, 30.0, math.nan, math.nan))
+
+    result = ring.to_dict()
+    assert result["cpu"] == [2.0, 3.0]
+    assert result["rx"] == [5.0, None]
+    assert result["tx"] == [3.0, None]
+
+
+def test__DockerContainerMetrics_should_keep_network_rates():
+    metrics = DockerContainerMetrics()
+    metrics.add(1000, _stats(10.0, 100, rx=0, tx=0))
+    metrics.add(1001, _stats(20.0, 200, rx=500, tx=100))
+    # counters start over after a restart
+    metrics.add(1002, _stats(30.0, 300, rx=10, tx=10))
+
+    fine = metrics.rings[1].to_dict()
+    assert fine["rx"] == [None, 500.0, None]
+    assert fine["tx"] == [None, 100.0, None]
+    assert metrics.rings[60].to_dict()["cpu"] == [20.0]
+
+    stats = downsample_stats(_stats(30.0, 300), metrics, 2)
+    assert stats.cpu_percent == 25.0
+    assert stats.memory_usage == 250
+    assert stats.memory_percent == 25.0
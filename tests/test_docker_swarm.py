@@ -0,0 +1,268 @@
+import asyncio
+from dataclasses import replace
+
+import orjson
+import pytest
+from aiohttp import web
+
+from custom_components.home_assistant_docker_integration import coordinator as module
+from custom_components.home_assistant_docker_integration._docker_engine import (
+    DockerEngineApi,
+)
+from custom_components.home_assistant_docker_integration.coordinator import (
+    ServiceController,
+)
+from tests.mocks import MockedConfigEntry, MockedDataUpdateCoordinator
+
+WEB_ID = "webservice0001aaaaaaaaaaaaa"
+AGENT_ID = "agentservice01bbbbbbbbbbbb"
+MANAGER_ID = "managernode001ccccccccccc"
+WORKER_ID = "workernode0001ddddddddddd"
+
+
+def _task(id: str, service: str, node: str, state: str) -> dict:
+    return {
+        "ID": id,
+        "ServiceID": service,
+        "NodeID": node,
+        "DesiredState": "running",
+        "Status": {"State": state},
+    }
+
+
+class FakeManager:
+    """Swarm manager API on a unix socket, recording the requested paths."""
+
+    def __init__(self):
+        self.requests: list[str] = []
+        self.services = {
+            WEB_ID: {
+                "ID": WEB_ID,
+                "Spec": {
+                    "Name": "web",
+                    "Mode": {"Replicated": {"Replicas": 3}},
+                    "TaskTemplate": {
+                        "ContainerSpec": {"Image": "nginx:1.27@sha256:abc"}
+                    },
+                },
+                "UpdateStatus": {"State": "updating", "Message": "update in progress"},
+            },
+            AGENT_ID: {
+                "ID": AGENT_ID,
+                "Spec": {
+                    "Name": "agent",
+                    "Mode": {"Global": {}},
+                    "TaskTemplate": {"ContainerSpec": {"Image": "agent:2"}},
+                },
+            },
+        }
+        self.tasks = [
+            _task("t1", WEB_ID, MANAGER_ID, "running"),
+            _task("t2", WEB_ID, WORKER_ID, "running"),
+            _task("t3", WEB_ID, WORKER_ID, "preparing"),
+            _task("t4", AGENT_ID, MANAGER_ID, "running"),
+            _task("t5", AGENT_ID, WORKER_ID, "running"),
+        ]
+        self.nodes = {
+            MANAGER_ID: {
+                "ID": MANAGER_ID,
+                "Description": {
+                    "Hostname": "manager",
+                    "Engine": {"EngineVersion": "27.0"},
+                },
+                "Spec": {"Role": "manager", "Availability": "active"},
+                "Status": {"State": "ready", "Addr": "10.0.0.1"},
+                "ManagerStatus": {"Leader": True, "Reachability": "reachable"},
+            },
+            WORKER_ID: {
+                "ID": WORKER_ID,
+                "Description": {"Hostname": "worker"},
+                "Spec": {"Role": "worker", "Availability": "active"},
+                "Status": {"State": "ready", "Addr": "10.0.0.2"},
+            },
+        }
+
+    def routes(self) -> web.RouteTableDef:
+        routes = web.RouteTableDef()
+
+        @routes.get("/services")
+        async def services(request):
+            self.requests.append(request.path)
+            return web.json_response(list(self.services.values()))
+
+        @routes.get("/services/{id}")
+        async def service(request):
+            self.requests.append(request.path)
+            if request.match_info["id"] not in self.services:
+                return web.json_response({"message": "not found"}, status=404)
+            return web.json_response(self.services[request.match_info["id"]])
+
+        @routes.get("/tasks")
+        async def tasks(request):
+            filters = orjson.loads(request.query["filters"])
+            assert filters["desired-state"] == ["running"]
+            service = filters.get("service", [None])[0]
+            self.requests.append(f"/tasks?service={service}" if service else "/tasks")
+            return web.json_response(
+                [x for x in self.tasks if service in (None, x["ServiceID"])]
+            )
+
+        @routes.get("/nodes")
+        async def nodes(request):
+            self.requests.append(request.path)
+            return web.json_response(list(self.nodes.values()))
+
+        @routes.get("/nodes/{id}")
+        async def node(request):
+            self.requests.append(request.path)
+            return web.json_response(self.nodes[request.match_info["id"]])
+
+        return routes
+
+
+async def _start_fake_manager(
+    tmp_path, manager: FakeManager
+) -> tuple[str, web.AppRunner]:
+    app = web.Application()
+    app.add_routes(manager.routes())
+    runner = web.AppRunner(app)
+    await runner.setup()
+    path = str(tmp_path / "docker.sock")
+    await web.UnixSite(runner, path).start()
+    return path, runner
+
+
+@pytest.mark.asyncio
+async def test__DockerEngineApi_should_aggregate_swarm(tmp_path):
+    manager = FakeManager()
+    path, runner = await _start_fake_manager(tmp_path, manager)
+    api = DockerEngineApi(path)
+    await api.async_connect()
+    try:
+        data = await api.async_fetch_swarm()
+    finally:
+        await api.disconnect()
+        await runner.cleanup()
+
+    web_service = data.services[WEB_ID[:12]]
+    assert web_service.name == "web"
+    assert web_service.image == "nginx:1.27"
+    assert web_service.desired_replicas == 3
+    assert web_service.running_replicas == 2
+    assert web_service.update_state == "updating"
+
+    # one task on every node
+    agent = data.services[AGENT_ID[:12]]
+    assert agent.mode == "global"
+    assert (agent.desired_replicas, agent.running_replicas) == (2, 2)
+
+    assert data.nodes[MANAGER_ID[:12]].manager_status == "leader"
+    assert data.nodes[MANAGER_ID[:12]].running_tasks == 2
+    assert data.nodes[WORKER_ID[:12]].running_tasks == 2
+    assert data.nodes[WORKER_ID[:12]].manager_status is None
+
+
+@pytest.mark.asyncio
+async def test__DockerSwarmCoordinator_should_apply_events_incrementally(
+    tmp_path, monkeypatch
+):
+    monkeypatch.setattr(module, "SWARM_EVENT_DELAY", 0)
+    manager = FakeManager()
+    path, runner = await _start_fake_manager(tmp_path, manager)
+
+    entry = MockedConfigEntry("22")
+    ctl = ServiceController(None, entry)
+    entry.runtime_data = ctl
+    ctl.api = DockerEngineApi(path)
+    ctl.data_coordinator.data = replace(
+        MockedDataUpdateCoordinator.data, swarm_manager=True
+    )
+    coordinator = ctl.swarm_coordinator
+    calls = []
+    coordinator._listeners = {
+        1: (lambda: calls.append("web"), ("services", WEB_ID[:12])),
+        2: (lambda: calls.append("agent"), ("services", AGENT_ID[:12])),
+        3: (lambda: calls.append("worker"), ("nodes", WORKER_ID[:12])),
+        4: (lambda: calls.append("manager"), ("nodes", MANAGER_ID[:12])),
+    }
+
+    await ctl.api.async_connect()
+    try:
+        coordinator.data = await coordinator._async_update_data()
+        manager.requests.clear()
+
+        # the third web replica gets running and the rolling update completes
+        manager.tasks[2] = _task("t3", WEB_ID, WORKER_ID, "running")
+        manager.services[WEB_ID]["UpdateStatus"]["State"] = "completed"
+        for action in ("create", "start", "health_status: healthy"):
+            coordinator.async_handle_event(
+                {
+                    "Type": "container",
+                    "Action": action,
+                    "Actor": {
+                        "ID": "c3",
+                        "Attributes": {"com.docker.swarm.service.id": WEB_ID},
+                    },
+                }
+            )
+        coordinator.async_handle_event(
+            {"Type": "service", "Action": "update", "Actor": {"ID": WEB_ID}}
+        )
+        await coordinator._flush_task
+    finally:
+        await ctl.api.disconnect()
+        await runner.cleanup()
+
+    # one refetch of the changed service for the whole burst
+    assert sorted(manager.requests) == [
+        f"/services/{WEB_ID}",
+        f"/tasks?service={WEB_ID}",
+    ]
+    web_service = coordinator.data.services[WEB_ID[:12]]
+    assert web_service.running_replicas == 3
+    assert web_service.update_state == "completed"
+    assert coordinator.data.nodes[WORKER_ID[:12]].running_tasks == 3
+    assert calls == ["web", "worker"]
+
+
+@pytest.mark.asyncio
+async def test__DockerDataUpdateCoordinator_should_refresh_swarm_on_promotion():
+    entry = MockedConfigEntry("23")
+    ctl = ServiceController(None, entry)
+    entry.runtime_data = ctl
+    worker = replace(MockedDataUpdateCoordinator.data, swarm_manager=False)
+    ctl.data_coordinator.data = worker
+
+    class FakeApi:
+        swarm_manager = False
+
+        async def async_fetch_data(self, previous):
+            return replace(worker, swarm_manager=self.swarm_manager)
+
+    refreshes = []
+
+    async def async_refresh():
+        refreshes.append(ctl.data_coordinator.data.swarm_manager)
+
+    ctl.api = FakeApi()
+    ctl.swarm_coordinator.async_refresh = async_refresh
+    coordinator = ctl.data_coordinator
+
+    async def async_refresh_data():
+        # as home assistant, the listeners are updated after the data is set
+        coordinator.data = await coordinator._async_update_data()
+        coordinator.async_update_listeners()
+        await asyncio.sleep(0)
+
+    await async_refresh_data()
+    assert refreshes == []
+
+    # joined as a manager, the swarm is fetched on the new role
+    ctl.api.swarm_manager = True
+    await async_refresh_data()
+    assert refreshes == [True]
+
+    await async_refresh_data()
+    ctl.api.swarm_manager = False
+    await async_refresh_data()
+    assert refreshes == [True, False]
@@ -0,0 +1,87 @@
+from dataclasses import replace
+from types import SimpleNamespace
+
+import pytest
+
+from custom_components.home_assistant_docker_integration import services
+from custom_components.home_assistant_docker_integration.coordinator import (
+    ServiceController,
+)
+from tests.mocks import (
+    MockedConfigEntry,
+    MockedDataUpdateCoordinator,
+    create_mocked_container,
+)
+
+
+class FakeContainersApi:
+    def __init__(self, containers):
+        self.containers = dict((c.name, c) for c in containers)
+        self.stopped = []
+
+    async def async_container_inspect(self, id):
+        container = self.containers.get(id)
+        return {"Id": container.id} if container else None
+
+    async def async_fetch_container(self, id, previous=None):
+        return next((c for c in self.containers.values() if c.id == id), None)
+
+    async def async_container_stop(self, id):
+        self.stopped.append(id)
+
+
+def _create_controller(entry_id: str, title: str, cached, uncached=()):
+    entry = MockedConfigEntry(entry_id, data={"host": f"tcp://{title}"}, title=title)
+    ctl = ServiceController(None, entry)
+    entry.runtime_data = ctl
+    ctl.api = FakeContainersApi([*cached, *uncached])
+    ctl.data_coordinator.data = replace(
+        MockedDataUpdateCoordinator.data,
+        containers=dict((c.short_id, c) for c in cached),
+    )
+    return entry
+
+
+def _create_call(entries, **data):
+    return SimpleNamespace(
+        hass=SimpleNamespace(
+            config_entries=SimpleNamespace(async_loaded_entries=lambda _: entries)
+        ),
+        service="stop",
+        data=data,
+    )
+
+
+@pytest.mark.asyncio
+async def test__stop_should_find_uncached_and_report_unknown_containers():
+    web = create_mocked_container(id="a1" * 32, short_id="a1" * 6, name="web")
+    new = create_mocked_container(id="b2" * 32, short_id="b2" * 6, name="new")
+    entry = _create_controller("1", "nas", [web], [new])
+
+    call = _create_call([entry], id=["web", "new", "gone"])
+    response = await services._async_handle_stop(call)
+
+    # the just created container is not cached yet, it is looked up in docker
+    assert entry.runtime_data.api.stopped == [web.id, new.id]
+    results = dict((x["id"], x) for x in response["results"])
+    assert results[new.short_id]["success"] is True
+    assert results["gone"]["success"] is False
+    assert results["gone"]["error"] == "No such container"
+
+
+@pytest.mark.asyncio
+async def test__stop_should_require_host_with_several_hosts():
+    web = create_mocked_container(name="web")
+    entries = [
+        _create_controller("1", "nas", [web]),
+        _create_controller("2", "pi", [web]),
+    ]
+
+    with pytest.raises(Exception, match="set the host"):
+        await services._async_handle_stop(_create_call(entries, label=["app"]))
+
+    response = await services._async_handle_stop(
+        _create_call(entries, host="pi", id=["web"])
+    )
+    assert [x["host"] for x in response["results"]] == ["pi"]
+    assert entries[0].runtime_data.api.stopped == []
@@ -0,0 +1,83 @@
+from datetime import timedelta
+
+import pytest
+
+from custom_components.home_assistant_docker_integration import websocket
+from custom_components.home_assistant_docker_integration._docker_api import (
+    DockerEventStream,
+)
+from custom_components.home_assistant_docker_integration.websocket import (
+    log_sort_key,
+    split_log_lines,
+)
+
+
+def test__split_log_lines_should_keep_partial_line_pending():
+    lines, pending = split_log_lines(b"", [b"first\nsec", b"ond\nthi"])
+
+    assert lines == ["first", "second"]
+    assert pending == b"thi"
+
+    lines, pending = split_log_lines(pending, [b"rd \xe2\x9c", b"\x93\n"])
+
+    assert lines == ["third ✓"]
+    assert pending == b""
+
+
+class FakeConnection:
+    def __init__(self):
+        self.messages = []
+
+    def send_message(self, message):
+        self.messages.append(message)
+
+
+def _fake_stream(*lines: bytes) -> DockerEventStream:
+    async def chunks():
+        for line in lines:
+            yield line
+
+    return DockerEventStream(chunks(), lambda: None)
+
+
+@pytest.mark.asyncio
+async def test__forward_merged_logs_should_order_lines_by_timestamp(monkeypatch):
+    monkeypatch.setattr(websocket, "MERGE_DELAY", timedelta(milliseconds=10))
+    monkeypatch.setattr(websocket, "LOG_BATCH_INTERVAL", 0.01)
+    monkeypatch.setattr(
+        websocket.websocket_api, "event_message", lambda id, event: event
+    )
+    connection = FakeConnection()
+
+    await websocket._async_forward_merged_logs(
+        connection,
+        1,
+        {
+            "db": _fake_stream(
+                b"2024-05-01T10:00:00.5Z db ready\n",
+                b"2024-05-01T10:00:02Z db query\n",
+            ),
+            "web": _fake_stream(
+                b"2024-05-01T10:00:00.123456789Z web start\n"
+                b"2024-05-01T10:00:01Z web request\n"
+            ),
+        },
+    )
+
+    lines = [line for m in connection.messages for line in m.get("lines", [])]
+    assert [[name, text] for name, _, text in lines] == [
+        ["web", "web start"],
+        ["db", "db ready"],
+        ["web", "web request"],
+        ["db", "db query"],
+    ]
+    assert connection.messages[-1] == {"end": True}
+
+
+def test__log_sort_key_should_order_trimmed_fractions():
+    assert log_sort_key("2024-05-01T10:00:00.5Z") > log_sort_key(
+        "2024-05-01T10:00:00.123456789Z"
+    )
+    assert log_sort_key("2024-05-01T10:00:01Z") > log_sort_key(
+        "2024-05-01T10:00:00.999Z"
+    )